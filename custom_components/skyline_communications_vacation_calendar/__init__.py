@@ -7,11 +7,27 @@ from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceEntry
 
-from .const import DOMAIN
-from .coordinator import CalendarCoordinator
+from .const import (
+    CONF_FEED_TOKEN,
+    CONF_ROSTER,
+    DATA_CALENDAR_FEEDS,
+    DOMAIN,
+    SERVICE_PROFILE,
+)
+from .coordinator import CalendarCoordinator, RosterCoordinator
+from .ics import CalendarFeedView, new_feed_token
+from .services import async_register_services
+from .websocket_api import async_register_websocket_commands
 
 # For your initial PR, limit it to 1 platform.
 PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.CALENDAR, Platform.SENSOR]
+# A roster entry only exposes sensors that summarise the whole element.
+ROSTER_PLATFORMS: list[Platform] = [Platform.SENSOR]
+
+
+def _get_platforms(config_entry: ConfigEntry) -> list[Platform]:
+    """Return the platforms to set up for a config entry."""
+    return ROSTER_PLATFORMS if config_entry.data.get(CONF_ROSTER) else PLATFORMS
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
@@ -19,9 +35,23 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
     hass.data.setdefault(DOMAIN, {})
 
+    # The iCalendar feed view and websocket commands are shared by all config entries.
+    if DATA_CALENDAR_FEEDS not in hass.data:
+        hass.data[DATA_CALENDAR_FEEDS] = {}
+        hass.http.register_view(CalendarFeedView)
+        async_register_websocket_commands(hass)
+
+    # Services are removed when the last config entry is unloaded.
+    if not hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        async_register_services(hass)
+
     # Initialise the coordinator that manages data updates from your api.
     # This is defined in coordinator.py
-    coordinator = CalendarCoordinator(hass, config_entry)
+    coordinator: CalendarCoordinator | RosterCoordinator
+    if config_entry.data.get(CONF_ROSTER):
+        coordinator = RosterCoordinator(hass, config_entry)
+    else:
+        coordinator = CalendarCoordinator(hass, config_entry)
 
     # Perform an initial data load from api.
     # async_config_entry_first_refresh() is special in that it does not log errors if it fails
@@ -40,7 +70,11 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
     # Setup platforms (based on the list of entity types in PLATFORMS defined above)
     # This calls the async_setup method in each of your entity type files.
-    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    await hass.config_entries.async_forward_entry_setups(
+        config_entry, _get_platforms(config_entry)
+    )
+    # The entities are known now, so are the moments at which their state changes.
+    coordinator.async_schedule_transition()
     # for platform in PLATFORMS:
     #     await hass.async_create_task(
     #         hass.config_entries.async_forward_entry_setup(config_entry, platform)
@@ -50,6 +84,21 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     return True
 
 
+async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
+    """Migrate a config entry created by an older version."""
+    if config_entry.version > 1:
+        return False
+
+    if config_entry.minor_version < 2:
+        # Entries with calendars get the secret of their iCalendar feeds.
+        data = {**config_entry.data}
+        if not data.get(CONF_ROSTER):
+            data[CONF_FEED_TOKEN] = new_feed_token()
+        hass.config_entries.async_update_entry(config_entry, data=data, minor_version=2)
+
+    return True
+
+
 async def _async_update_listener(hass: HomeAssistant, config_entry):
     """Handle config options update."""
     # Reload the integration when the options change.
@@ -68,18 +117,19 @@ async def async_remove_config_entry_device(
 
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    # Unload services
-    for service in hass.services.async_services_for_domain(DOMAIN):
-        hass.services.async_remove(DOMAIN, service)
-
     # Unload platforms
     unload_ok = await hass.config_entries.async_unload_platforms(
-        config_entry, PLATFORMS
+        config_entry, _get_platforms(config_entry)
     )
 
     # Remove the config entry from the hass data object.
     if unload_ok:
         hass.data[DOMAIN].pop(config_entry.entry_id)
 
+    # Unload services, they are shared by all config entries.
+    if unload_ok and not hass.data[DOMAIN]:
+        for service in hass.services.async_services_for_domain(DOMAIN):
+            hass.services.async_remove(DOMAIN, service)
+
     # Return that unloading was successful.
     return unload_ok
@@ -1,6 +1,6 @@
 """Skyline Communications Vacation Calendar."""
 
-from datetime import datetime
+from functools import partial
 import logging
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
@@ -8,7 +8,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -17,8 +17,9 @@ from .const import (
     MODEL_NAME,
     SERVICE_NAME,
 )
-from .coordinator import CalendarCoordinator
-from .skyline.calendar_api import CalendarEntry, CalendarEntryType
+from .coordinator import CalendarCoordinator, UserCalendar
+from .loop_budget import LoopBudgetEntity
+from .skyline.calendar_api import CalendarEntryType
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,13 +32,15 @@ async def async_setup_entry(
     """Set up the Binary Sensors."""
     coordinator: CalendarCoordinator = hass.data[DOMAIN][config_entry.entry_id]
 
-    binary_sensors = [WorkDayBinarySensor(coordinator, coordinator.entries)]
+    binary_sensors = [
+        WorkDayBinarySensor(coordinator, fullname) for fullname in coordinator.users
+    ]
 
     # Create the binary sensors.
     async_add_entities(binary_sensors)
 
 
-class WorkDayBinarySensor(CoordinatorEntity, BinarySensorEntity):
+class WorkDayBinarySensor(LoopBudgetEntity, BinarySensorEntity):
     """Implementation of a sensor."""
 
     holiday_types = [
@@ -47,37 +50,37 @@ class WorkDayBinarySensor(CoordinatorEntity, BinarySensorEntity):
     ]
     coordinator: CalendarCoordinator
 
-    def __init__(
-        self, coordinator: CalendarCoordinator, entries: list[CalendarEntry]
-    ) -> None:
+    def __init__(self, coordinator: CalendarCoordinator, fullname: str) -> None:
         """Initialise sensor."""
         super().__init__(coordinator)
-        self.calculate_workday(entries)
+        self.fullname = fullname
+        self.user.register_lookup(self.holiday_types)
+        self.is_workday = self.calculate_workday()
+
+    @property
+    def user(self) -> UserCalendar:
+        """Return the calendar data of the user."""
+        return self.coordinator.users[self.fullname]
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
-        _LOGGER.debug("User: %s", self.coordinator.fullname)
-        self.calculate_workday(self.coordinator.entries)
-        self.async_write_ha_state()
+        _LOGGER.debug("User: %s", self.fullname)
+        self.async_update_state(
+            self.calculate_workday,
+            partial(setattr, self, "is_workday"),
+            self.user.size,
+        )
 
-    def calculate_workday(self, entries: list[CalendarEntry]):
+    def calculate_workday(self) -> bool:
         """Calculate if today is a work day or not."""
 
         # This needs to enumerate to true or false
-        now = datetime.now().astimezone()
+        now = dt_util.now()
 
-        matching_entries = [
-            entry
-            for entry in entries
-            if entry.event_date <= now <= entry.end_date
-            and entry.category in self.holiday_types
-        ]
+        matching_entries = self.user.get_entries_at(now, self.holiday_types)
 
-        if matching_entries:
-            self.is_workday = False
-        else:
-            self.is_workday = True
+        return not matching_entries
 
     @property
     def device_class(self) -> str | None:
@@ -98,7 +101,7 @@ class WorkDayBinarySensor(CoordinatorEntity, BinarySensorEntity):
             identifiers={
                 (
                     DOMAIN,
-                    f"slc-vaction-calendar-{self.coordinator.fullname}",
+                    f"slc-vaction-calendar-{self.fullname}",
                 )
             },
             configuration_url=DOMAIN_METRICS_URL,
@@ -107,7 +110,7 @@ class WorkDayBinarySensor(CoordinatorEntity, BinarySensorEntity):
     @property
     def name(self) -> str:
         """Return the name of the sensor."""
-        return f"Workday binary sensor for {self.coordinator.fullname}"
+        return f"Workday binary sensor for {self.fullname}"
 
     @property
     def is_on(self) -> bool | None:
@@ -119,7 +122,7 @@ class WorkDayBinarySensor(CoordinatorEntity, BinarySensorEntity):
         """Return unique id."""
         # All entities must have a unique id.  Think carefully what you want this to be as
         # changing it later will cause HA to create new entities.
-        return f"{DOMAIN}-workday-{self.coordinator.fullname}"
+        return f"{DOMAIN}-workday-{self.coordinator.user_unique_id(self.fullname)}"
 
     @property
     def extra_state_attributes(self):
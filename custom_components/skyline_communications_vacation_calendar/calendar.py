@@ -1,31 +1,41 @@
 """Skyline Communications Vacation Calendar."""
 
+from collections.abc import Iterator
 from datetime import date, datetime, time, timedelta
+from typing import Any
 
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .config_flow import default_calendar_entity_foreach_type, default_calendar_types
 from .const import (
+    CONF_FULLNAMES,
     CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE,
     CONF_OPTION_CALENDAR_TYPES,
+    CONF_OPTION_UPCOMING_EVENTS,
+    DEFAULT_CALENDAR_ENTITY_FOREACH_TYPE,
+    DEFAULT_CALENDAR_TYPES,
+    DEFAULT_UPCOMING_EVENTS,
     DOMAIN,
     DOMAIN_METRICS_URL,
     MANUFACTURER_NAME,
     MODEL_NAME,
+    OFFLOAD_ENTRY_THRESHOLD,
     SERVICE_NAME,
 )
-from .coordinator import CalendarCoordinator
+from .coordinator import CalendarCoordinator, UserCalendar
+from .ics import async_register_feed
+from .loop_budget import LoopBudgetEntity
 from .skyline.calendar_api import (
     CalendarEntry,
     CalendarEntryType,
     get_calendar_type_display_value,
     to_calendar_entry_types,
 )
+from .skyline.upcoming import UpcomingEntries
 
 
 async def async_setup_entry(
@@ -36,36 +46,53 @@ async def async_setup_entry(
     """Set up the Skyline Communications Vacation Calendar entry."""
     coordinator: CalendarCoordinator = hass.data[DOMAIN][config_entry.entry_id]
     calendar_entity_per_type: bool = config_entry.options.get(
-        CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE, default_calendar_entity_foreach_type
+        CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE, DEFAULT_CALENDAR_ENTITY_FOREACH_TYPE
     )
     entities: list[SLCVacationCalendarEntity] = []
     calendar_types: list[CalendarEntryType] = to_calendar_entry_types(
-        config_entry.options.get(CONF_OPTION_CALENDAR_TYPES, default_calendar_types)
+        config_entry.options.get(CONF_OPTION_CALENDAR_TYPES, DEFAULT_CALENDAR_TYPES)
+    )
+    upcoming_events = int(
+        config_entry.options.get(CONF_OPTION_UPCOMING_EVENTS, DEFAULT_UPCOMING_EVENTS)
     )
 
-    if calendar_entity_per_type:
-        for calendar_type in calendar_types:
+    for fullname in coordinator.users:
+        # Entries tracking several users need the name to keep the ids unique.
+        unique_id = config_entry.entry_id
+        if CONF_FULLNAMES in config_entry.data:
+            unique_id = f"{unique_id}-{fullname}"
+
+        if calendar_entity_per_type:
+            for calendar_type in calendar_types:
+                calendar_item_to_add = SLCVacationCalendarEntity(
+                    f"{get_calendar_type_display_value(calendar_type)} Calendar - {fullname}",
+                    f"{calendar_type}-{unique_id}",
+                    [calendar_type],
+                    coordinator,
+                    fullname,
+                    upcoming_events,
+                )
+                entities.append(calendar_item_to_add)
+        else:
             calendar_item_to_add = SLCVacationCalendarEntity(
-                f"{get_calendar_type_display_value(calendar_type)} Calendar - {coordinator.fullname}",
-                f"{calendar_type}-{config_entry.entry_id}",
-                [calendar_type],
+                f"Calendar - {fullname}",
+                unique_id,
+                calendar_types,
                 coordinator,
+                fullname,
+                upcoming_events,
             )
             entities.append(calendar_item_to_add)
-    else:
-        calendar_item_to_add = SLCVacationCalendarEntity(
-            f"Calendar - {coordinator.fullname}", config_entry.entry_id, calendar_types, coordinator
-        )
-        entities.append(calendar_item_to_add)
 
     async_add_entities(entities)
 
 
-class SLCVacationCalendarEntity(CoordinatorEntity, CalendarEntity):
+class SLCVacationCalendarEntity(LoopBudgetEntity, CalendarEntity):
     """Representation of a Skyline Communications Calendar element."""
 
     _attr_has_entity_name = False
-    _entries: list[CalendarEntry] = []
+    # The upcoming events change whenever one starts, history does not need them.
+    _unrecorded_attributes = frozenset({"upcoming_events"})
     _calendar_types: list[CalendarEntryType] = []
     coordinator: CalendarCoordinator
 
@@ -75,14 +102,42 @@ class SLCVacationCalendarEntity(CoordinatorEntity, CalendarEntity):
         unique_id: str,
         calendar_types: list[CalendarEntryType],
         coordinator: CalendarCoordinator,
+        fullname: str,
+        upcoming_events: int = DEFAULT_UPCOMING_EVENTS,
     ) -> None:
         """Initialize SLCVacationCalendarEntity."""
         super().__init__(coordinator)
+        self.fullname = fullname
         self._attr_name = name
         self._attr_unique_id = unique_id
         self._calendar_types = calendar_types
-        self._entries = self.get_filtered_entries_by_types()
-        self._event = self.get_current_or_upcoming_event()
+        self.user.register_lookup(calendar_types)
+        self._upcoming = UpcomingEntries(tuple(calendar_types), upcoming_events)
+        self._set_events(self._calculate_events())
+
+    @property
+    def user(self) -> UserCalendar:
+        """Return the calendar data of the user."""
+        return self.coordinator.users[self.fullname]
+
+    async def async_added_to_hass(self) -> None:
+        """Make the iCalendar feed of the entity available."""
+        await super().async_added_to_hass()
+        self.async_on_remove(async_register_feed(self.hass, self))
+
+    @property
+    def extra_state_attributes(self):
+        """Return the extra state attributes."""
+        return {"upcoming_events": self._upcoming_events}
+
+    def iter_feed_events(self) -> Iterator[CalendarEvent]:
+        """Return an iterator over all retained events for the iCalendar feed.
+
+        It only reads the store of the moment of the call, which is never
+        changed, so it can be consumed in the executor.
+        """
+        entries = self.user.store.iter_entries(self._calendar_types)
+        return map(self.get_calendar_event_from_calender_entry, entries)
 
     @property
     def event(self) -> CalendarEvent | None:
@@ -92,9 +147,21 @@ class SLCVacationCalendarEntity(CoordinatorEntity, CalendarEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
-        self._entries = self.get_filtered_entries_by_types()
-        self._event = self.get_current_or_upcoming_event()
-        self.async_write_ha_state()
+        self.async_update_state(
+            self._calculate_events, self._set_events, self.user.size
+        )
+
+    def _calculate_events(self) -> tuple[CalendarEvent | None, list[dict[str, Any]]]:
+        entries = self._upcoming.get(self.user.store, dt_util.now())
+        return self.get_current_or_upcoming_event(), [
+            self.get_calendar_event_from_calender_entry(entry).as_dict()
+            for entry in entries
+        ]
+
+    def _set_events(
+        self, events: tuple[CalendarEvent | None, list[dict[str, Any]]]
+    ) -> None:
+        self._event, self._upcoming_events = events
 
     async def async_get_events(
         self,
@@ -104,45 +171,38 @@ class SLCVacationCalendarEntity(CoordinatorEntity, CalendarEntity):
     ) -> list[CalendarEvent]:
         """Return calendar events within a datetime range."""
 
-        event_list: list[CalendarEvent] = []
-
-        for event in self._entries:
-            if start_date <= event.event_date <= end_date:
-                event = self.get_calendar_event_from_calender_entry(event)
-                event_list.append(event)
-
-        return event_list
+        entries = await self.coordinator.async_get_entries_between(
+            self.fullname, start_date, end_date, self._calendar_types
+        )
+        if len(entries) > OFFLOAD_ENTRY_THRESHOLD:
+            self.coordinator.loop_budget.record_offloaded("async_get_events")
+            return await hass.async_add_executor_job(self._to_calendar_events, entries)
+        with self.coordinator.loop_budget.measure(
+            "async_get_events", self.entity_id, len(entries)
+        ):
+            return self._to_calendar_events(entries)
 
-    def get_filtered_entries_by_types(self) -> list[CalendarEntry]:
-        """Return only the entries from the correct CalendarEntryType defined in _calendar_types."""
-        return [
-            x for x in self.coordinator.entries if (x.category in self._calendar_types)
-        ]
+    def _to_calendar_events(self, entries: list[CalendarEntry]) -> list[CalendarEvent]:
+        return [self.get_calendar_event_from_calender_entry(entry) for entry in entries]
 
     def get_current_or_upcoming_event(self) -> CalendarEvent | None:
         """Return the current ongoing event if it exists, otherwise the next upcoming event. Return None if no relevant events exist."""
 
-        # Current time with system timezone
-        now = datetime.now().astimezone()
-
-        current_event = None
-        future_events = []
-
-        for e in self._entries:
-            if e.event_date <= now < e.end_date:
-                # Currently ongoing
-                current_event = e
-                break  # stop at first ongoing event
-            elif e.event_date > now:
-                # Future events
-                future_events.append(e)
+        now = dt_util.now()
 
+        current_event = next(
+            (
+                e
+                for e in self.user.get_entries_at(now, self._calendar_types)
+                if now < e.end_date
+            ),
+            None,
+        )
         if current_event:
             return self.get_calendar_event_from_calender_entry(current_event)
 
-        if future_events:
-            # Next upcoming event
-            next_event = min(future_events, key=lambda e: e.event_date)
+        # Next upcoming event
+        if next_event := self.user.get_next_entry(now, self._calendar_types):
             return self.get_calendar_event_from_calender_entry(next_event)
 
         return None
@@ -224,7 +284,7 @@ class SLCVacationCalendarEntity(CoordinatorEntity, CalendarEntity):
             identifiers={
                 (
                     DOMAIN,
-                    f"slc-vaction-calendar-{self.coordinator.fullname}",
+                    f"slc-vaction-calendar-{self.fullname}",
                 )
             },
             configuration_url=DOMAIN_METRICS_URL,
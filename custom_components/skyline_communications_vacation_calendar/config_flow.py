@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator
+from contextlib import closing
 import logging
 from typing import Any
 
@@ -18,55 +20,70 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.selector import (
     BooleanSelector,
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
     SelectOptionDict,
     SelectSelector,
     SelectSelectorConfig,
     SelectSelectorMode,
+    TextSelector,
+    TextSelectorConfig,
 )
 
 from .const import (
     CONF_ELEMENT_ID,
+    CONF_FEED_TOKEN,
     CONF_FULLNAME,
+    CONF_FULLNAMES,
     CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE,
     CONF_OPTION_CALENDAR_TYPES,
+    CONF_OPTION_COALESCE,
+    CONF_OPTION_LOOP_BUDGET,
+    CONF_OPTION_POLL_CEILING,
+    CONF_OPTION_POLL_FLOOR,
+    CONF_OPTION_RETENTION_DAYS,
+    CONF_OPTION_UPCOMING_EVENTS,
+    CONF_ROSTER,
+    DEFAULT_CALENDAR_ENTITY_FOREACH_TYPE,
+    DEFAULT_CALENDAR_TYPES,
+    DEFAULT_COALESCE,
+    DEFAULT_LOOP_BUDGET_MS,
+    DEFAULT_POLL_CEILING_MINUTES,
+    DEFAULT_POLL_FLOOR_MINUTES,
+    DEFAULT_RETENTION_DAYS,
+    DEFAULT_UPCOMING_EVENTS,
     DOMAIN,
     SERVICE_NAME,
 )
+from .directory import async_get_directory
+from .ics import new_feed_token
 from .skyline.calendar_api import (
+    CalendarEntry,
     CalendarEntryType,
     CalendarException,
     CalendarHelper,
     get_calendar_type_display_value,
 )
+from .skyline.directory import UserDirectory
 
 _LOGGER = logging.getLogger(__name__)
 
-possible_calendar_types = [
-    SelectOptionDict(
-        value=str(CalendarEntryType.Absent.value),
-        label=get_calendar_type_display_value(CalendarEntryType.Absent),
-    ),
-    SelectOptionDict(
-        value=str(CalendarEntryType.Public_Holiday.value),
-        label=get_calendar_type_display_value(CalendarEntryType.Public_Holiday),
-    ),
-    SelectOptionDict(
-        value=str(CalendarEntryType.WfH.value),
-        label=get_calendar_type_display_value(CalendarEntryType.WfH),
-    ),
-    SelectOptionDict(
-        value=str(CalendarEntryType.Weekend.value),
-        label=get_calendar_type_display_value(CalendarEntryType.Weekend),
-    ),
-]
-
-default_calendar_types = [
-    str(CalendarEntryType.Absent.value),
-    str(CalendarEntryType.Public_Holiday.value),
-    str(CalendarEntryType.WfH.value),
-]
-
-default_calendar_entity_foreach_type = True
+
+def calendar_type_options() -> list[SelectOptionDict]:
+    """Return the calendar types that can be chosen in the options."""
+    return [
+        SelectOptionDict(
+            value=str(calendar_type.value),
+            label=get_calendar_type_display_value(calendar_type),
+        )
+        for calendar_type in (
+            CalendarEntryType.Absent,
+            CalendarEntryType.Public_Holiday,
+            CalendarEntryType.WfH,
+            CalendarEntryType.Weekend,
+        )
+    ]
 
 
 STEP_USER_AUTHENTICATION_SCHEME = vol.Schema(
@@ -75,13 +92,38 @@ STEP_USER_AUTHENTICATION_SCHEME = vol.Schema(
     }
 )
 
-STEP_USER_DATA_SCHEMA = vol.Schema(
+STEP_ELEMENT_DATA_SCHEMA = vol.Schema(
     {
-        vol.Required(CONF_FULLNAME): str,
         vol.Required(CONF_ELEMENT_ID): str,
     }
 )
 
+# Number of names suggested when a typed name is not a user of the element.
+SUGGESTION_LIMIT = 5
+
+
+def user_schema(key: str, directory: UserDirectory, multiple: bool) -> vol.Schema:
+    """Return the schema to pick users from the directory, or type other names."""
+    return vol.Schema(
+        {
+            vol.Required(key): SelectSelector(
+                SelectSelectorConfig(
+                    options=directory.names,
+                    multiple=multiple,
+                    custom_value=True,
+                    sort=False,
+                    mode=SelectSelectorMode.DROPDOWN,
+                )
+            ),
+        }
+    )
+
+
+def first_entry(entries: Iterator[CalendarEntry]) -> CalendarEntry | None:
+    """Return the first entry of a download without downloading the others."""
+    with closing(entries):
+        return next(entries, None)
+
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
@@ -95,10 +137,11 @@ class SLCVacationCalendarConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Skyline Communications Vacation Calendar."""
 
     VERSION = 1
-    MINOR_VERSION = 1
+    MINOR_VERSION = 2
 
     _input_data: dict[str, Any]
     _title: str
+    _directory: UserDirectory
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -125,7 +168,9 @@ class SLCVacationCalendarConfigFlow(ConfigFlow, domain=DOMAIN):
                 self._input_data = user_input
 
                 # Call the next step
-                return await self.async_step_settings()
+                return self.async_show_menu(
+                    step_id="mode", menu_options=["settings", "group", "roster"]
+                )
 
         return self.async_show_form(
             step_id="user",
@@ -137,48 +182,197 @@ class SLCVacationCalendarConfigFlow(ConfigFlow, domain=DOMAIN):
     async def async_step_settings(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
-        """Handle the second step.
+        """Handle the element step of a single user, the user is picked next."""
+        return await self._async_step_element("settings", user_input)
+
+    async def async_step_group(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle the element step of a group, the users are picked next."""
+        return await self._async_step_element("group", user_input)
+
+    async def _async_step_element(
+        self, step_id: str, user_input: dict[str, Any] | None
+    ) -> ConfigFlowResult:
+        """Ask for the element and load the directory of its users."""
+
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            try:
+                api = CalendarHelper(self._input_data[CONF_API_KEY])
+                self._directory = await async_get_directory(
+                    self.hass, api, user_input[CONF_ELEMENT_ID]
+                )
+            except CalendarException as ce:
+                _LOGGER.exception("Could not get the users of the element")
+                errors["base"] = f"{ce}"
+            except Exception:
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+
+            if "base" not in errors:
+                self._input_data.update(user_input)
+                if step_id == "group":
+                    return await self.async_step_fullnames()
+                return await self.async_step_fullname()
 
-        Our second config flow step.
-        Works just the same way as the first step.
-        Except as it is our last step, we create the config entry after any validation.
+        return self.async_show_form(
+            step_id=step_id,
+            data_schema=STEP_ELEMENT_DATA_SCHEMA,
+            errors=errors,
+            last_step=False,
+        )
+
+    async def _async_resolve(self, names: list[str]) -> tuple[list[str], list[str]]:
+        """Return the users for the picked or typed names, and the unknown names.
+
+        A name that is not in the directory is replaced by the only user it
+        matches. Names that match no user or several of them are looked up with
+        the api, as the directory only has the users with recent entries.
         """
+        resolved: list[str] = []
+        unknown: list[str] = []
+        api = CalendarHelper(self._input_data[CONF_API_KEY])
+        for name in names:
+            if name not in self._directory:
+                matches = self._directory.search(name, 2)
+                if len(matches) == 1:
+                    name = matches[0]
+                else:
+                    try:
+                        await self.hass.async_add_executor_job(
+                            first_entry,
+                            api.iter_entries(name, self._input_data[CONF_ELEMENT_ID]),
+                        )
+                    except CalendarException:
+                        unknown.append(name)
+                        continue
+            resolved.append(name)
+        return list(dict.fromkeys(resolved)), unknown
+
+    def _suggestions(self, names: list[str]) -> dict[str, str]:
+        """Return the placeholders that explain which names are unknown."""
+        suggestions = dict.fromkeys(
+            match
+            for name in names
+            for match in self._directory.search(name, SUGGESTION_LIMIT)
+        )
+        return {
+            "names": ", ".join(names),
+            "suggestions": ", ".join(list(suggestions)[:SUGGESTION_LIMIT]) or "-",
+        }
+
+    async def async_step_fullname(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle picking the user, creating the config entry."""
+
+        errors: dict[str, str] = {}
+        placeholders: dict[str, str] = {}
+
+        if user_input is not None:
+            try:
+                fullnames, unknown = await self._async_resolve(
+                    [user_input[CONF_FULLNAME]]
+                )
+            except Exception:
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+            else:
+                if unknown:
+                    errors[CONF_FULLNAME] = "unknown_user"
+                    placeholders = self._suggestions(unknown)
+                else:
+                    self._title = f"{SERVICE_NAME} - {fullnames[0]}"
+                    await self.async_set_unique_id(self._title)
+                    self._abort_if_unique_id_configured()
+
+                    self._input_data[CONF_FULLNAME] = fullnames[0]
+                    self._input_data[CONF_FEED_TOKEN] = new_feed_token()
+                    return self.async_create_entry(
+                        title=self._title, data=self._input_data
+                    )
+
+        return self.async_show_form(
+            step_id="fullname",
+            data_schema=user_schema(CONF_FULLNAME, self._directory, False),
+            errors=errors,
+            description_placeholders=placeholders,
+            last_step=True,
+        )
+
+    async def async_step_fullnames(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle picking the users of the group, creating the config entry."""
+
+        errors: dict[str, str] = {}
+        placeholders: dict[str, str] = {}
+
+        if user_input is not None:
+            try:
+                fullnames, unknown = await self._async_resolve(
+                    user_input[CONF_FULLNAMES]
+                )
+            except Exception:
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+            else:
+                if unknown:
+                    errors[CONF_FULLNAMES] = "unknown_user"
+                    placeholders = self._suggestions(unknown)
+                else:
+                    self._title = f"{SERVICE_NAME} - {', '.join(fullnames)}"
+                    await self.async_set_unique_id(self._title)
+                    self._abort_if_unique_id_configured()
+
+                    self._input_data[CONF_FULLNAMES] = fullnames
+                    self._input_data[CONF_FEED_TOKEN] = new_feed_token()
+                    return self.async_create_entry(
+                        title=self._title, data=self._input_data
+                    )
+
+        return self.async_show_form(
+            step_id="fullnames",
+            data_schema=user_schema(CONF_FULLNAMES, self._directory, True),
+            errors=errors,
+            description_placeholders=placeholders,
+            last_step=True,
+        )
+
+    async def async_step_roster(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle the roster step, which tracks all users of an element."""
 
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            # The form has been filled in and submitted, so process the data provided.
             try:
                 api = CalendarHelper(self._input_data[CONF_API_KEY])
-                await api.get_entries_async(
-                    self.hass, user_input[CONF_FULLNAME], user_input[CONF_ELEMENT_ID]
+                await self.hass.async_add_executor_job(
+                    first_entry, api.iter_roster_entries(user_input[CONF_ELEMENT_ID])
                 )
-                # info = await validate_input(self.hass, user_input)
             except CalendarException as ce:
-                _LOGGER.exception()
+                _LOGGER.exception("Could not get the roster")
                 errors["base"] = f"{ce}"
             except Exception:
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
 
             if "base" not in errors:
-                # ----------------------------------------------------------------------------
-                # Validation was successful, so create the config entry.
-                # ----------------------------------------------------------------------------
-                self._title = f"{SERVICE_NAME} - {user_input[CONF_FULLNAME]}"
+                self._title = f"{SERVICE_NAME} - Roster {user_input[CONF_ELEMENT_ID]}"
                 await self.async_set_unique_id(self._title)
                 self._abort_if_unique_id_configured()
 
                 self._input_data.update(user_input)
+                self._input_data[CONF_ROSTER] = True
                 return self.async_create_entry(title=self._title, data=self._input_data)
 
-        # ----------------------------------------------------------------------------
-        # Show settings form.  The step id always needs to match the bit after async_step_ in your method.
-        # Set last_step to True here if it is last step.
-        # ----------------------------------------------------------------------------
         return self.async_show_form(
-            step_id="settings",
-            data_schema=STEP_USER_DATA_SCHEMA,
+            step_id="roster",
+            data_schema=STEP_ELEMENT_DATA_SCHEMA,
             errors=errors,
             last_step=True,
         )
@@ -214,21 +408,26 @@ class SLCVacationCalendarConfigFlow(ConfigFlow, domain=DOMAIN):
                     reason="reconfigure_successful",
                 )
 
+        schema: dict[vol.Marker, Any] = {
+            vol.Required(CONF_API_KEY, default=config_entry.data[CONF_API_KEY]): str,
+        }
+        if CONF_FULLNAMES in config_entry.data:
+            schema[
+                vol.Required(
+                    CONF_FULLNAMES, default=config_entry.data[CONF_FULLNAMES]
+                )
+            ] = TextSelector(TextSelectorConfig(multiple=True))
+        elif not config_entry.data.get(CONF_ROSTER):
+            schema[
+                vol.Required(CONF_FULLNAME, default=config_entry.data[CONF_FULLNAME])
+            ] = str
+        schema[
+            vol.Required(CONF_ELEMENT_ID, default=config_entry.data[CONF_ELEMENT_ID])
+        ] = str
+
         return self.async_show_form(
             step_id="reconfigure",
-            data_schema=vol.Schema(
-                {
-                    vol.Required(
-                        CONF_API_KEY, default=config_entry.data[CONF_API_KEY]
-                    ): str,
-                    vol.Required(
-                        CONF_FULLNAME, default=config_entry.data[CONF_FULLNAME]
-                    ): str,
-                    vol.Required(
-                        CONF_ELEMENT_ID, default=config_entry.data[CONF_ELEMENT_ID]
-                    ): str,
-                }
-            ),
+            data_schema=vol.Schema(schema),
             errors=errors,
         )
 
@@ -246,33 +445,125 @@ class OptionsFlowHandler(OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Handle options flow."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            if user_input.get(
+                CONF_OPTION_POLL_FLOOR, DEFAULT_POLL_FLOOR_MINUTES
+            ) > user_input.get(CONF_OPTION_POLL_CEILING, DEFAULT_POLL_CEILING_MINUTES):
+                errors[CONF_OPTION_POLL_CEILING] = "ceiling_below_floor"
+            else:
+                return self.async_create_entry(title="", data=user_input)
 
-        data_schema = vol.Schema(
+        options = self.config_entry.options
+        schema: dict[vol.Marker, Any] = {}
+        # The roster has no calendar entities and does not keep entries of users.
+        if not self.config_entry.data.get(CONF_ROSTER):
+            schema.update(
+                {
+                    vol.Required(
+                        CONF_OPTION_CALENDAR_TYPES,
+                        default=options.get(
+                            CONF_OPTION_CALENDAR_TYPES, DEFAULT_CALENDAR_TYPES
+                        ),
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=calendar_type_options(),
+                            multiple=True,
+                            mode=SelectSelectorMode.DROPDOWN,
+                        )
+                    ),
+                    vol.Required(
+                        CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE,
+                        default=options.get(
+                            CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE,
+                            DEFAULT_CALENDAR_ENTITY_FOREACH_TYPE,
+                        ),
+                    ): BooleanSelector(),
+                    vol.Required(
+                        CONF_OPTION_UPCOMING_EVENTS,
+                        default=options.get(
+                            CONF_OPTION_UPCOMING_EVENTS, DEFAULT_UPCOMING_EVENTS
+                        ),
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=0,
+                            max=50,
+                            step=1,
+                            mode=NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Required(
+                        CONF_OPTION_RETENTION_DAYS,
+                        default=options.get(
+                            CONF_OPTION_RETENTION_DAYS, DEFAULT_RETENTION_DAYS
+                        ),
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=1,
+                            max=3650,
+                            step=1,
+                            unit_of_measurement="days",
+                            mode=NumberSelectorMode.BOX,
+                        )
+                    ),
+                }
+            )
+        schema.update(
             {
                 vol.Required(
-                    CONF_OPTION_CALENDAR_TYPES,
-                    default=self.config_entry.options.get(
-                        CONF_OPTION_CALENDAR_TYPES, default_calendar_types
+                    CONF_OPTION_COALESCE,
+                    default=options.get(CONF_OPTION_COALESCE, DEFAULT_COALESCE),
+                ): BooleanSelector(),
+                vol.Required(
+                    CONF_OPTION_LOOP_BUDGET,
+                    default=options.get(
+                        CONF_OPTION_LOOP_BUDGET, DEFAULT_LOOP_BUDGET_MS
                     ),
-                ): SelectSelector(
-                    SelectSelectorConfig(
-                        options=possible_calendar_types,
-                        multiple=True,
-                        mode=SelectSelectorMode.DROPDOWN,
+                ): NumberSelector(
+                    NumberSelectorConfig(
+                        min=1,
+                        max=1000,
+                        step=1,
+                        unit_of_measurement="ms",
+                        mode=NumberSelectorMode.BOX,
                     )
                 ),
                 vol.Required(
-                    CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE,
-                    default=self.config_entry.options.get(
-                        CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE,
-                        default_calendar_entity_foreach_type,
+                    CONF_OPTION_POLL_FLOOR,
+                    default=options.get(
+                        CONF_OPTION_POLL_FLOOR, DEFAULT_POLL_FLOOR_MINUTES
                     ),
-                ): BooleanSelector(),
+                ): NumberSelector(
+                    NumberSelectorConfig(
+                        min=1,
+                        max=1440,
+                        step=1,
+                        unit_of_measurement="min",
+                        mode=NumberSelectorMode.BOX,
+                    )
+                ),
+                vol.Required(
+                    CONF_OPTION_POLL_CEILING,
+                    default=options.get(
+                        CONF_OPTION_POLL_CEILING, DEFAULT_POLL_CEILING_MINUTES
+                    ),
+                ): NumberSelector(
+                    NumberSelectorConfig(
+                        min=1,
+                        max=1440,
+                        step=1,
+                        unit_of_measurement="min",
+                        mode=NumberSelectorMode.BOX,
+                    )
+                ),
             }
         )
-        return self.async_show_form(step_id="init", data_schema=data_schema)
+        data_schema = vol.Schema(schema)
+        if user_input is not None:
+            data_schema = self.add_suggested_values_to_schema(data_schema, user_input)
+        return self.async_show_form(
+            step_id="init", data_schema=data_schema, errors=errors
+        )
 
 
 class CannotConnect(HomeAssistantError):
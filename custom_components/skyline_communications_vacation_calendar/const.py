@@ -7,7 +7,38 @@ SERVICE_NAME = f"SLC {NAME}"
 MANUFACTURER_NAME = "Employees of Skyline Communications"
 MODEL_NAME = f"Domain Metrics - {NAME}"
 CONF_FULLNAME = "full_name"
+CONF_FULLNAMES = "full_names"
 CONF_ELEMENT_ID = "element_id"
+CONF_ROSTER = "roster"
+# Secret in the path of the iCalendar feeds, which calendar clients fetch without a login.
+CONF_FEED_TOKEN = "feed_token"
 CONF_OPTION_CALENDAR_TYPES = "calendar_types"
 CONF_OPTION_CALENDAR_ENTITY_FOREACH_TYPE = "calendar_entity_foreach_type"
+CONF_OPTION_RETENTION_DAYS = "retention_days"
+CONF_OPTION_LOOP_BUDGET = "loop_budget_ms"
+CONF_OPTION_POLL_FLOOR = "poll_floor_minutes"
+CONF_OPTION_POLL_CEILING = "poll_ceiling_minutes"
+CONF_OPTION_COALESCE = "coalesce_entries"
+CONF_OPTION_UPCOMING_EVENTS = "upcoming_events"
+# Interval between downloads outside working hours, within the floor and ceiling.
 DEFAULT_SCAN_INTERVAL = 3600
+DEFAULT_POLL_FLOOR_MINUTES = 15
+DEFAULT_POLL_CEILING_MINUTES = 240
+# Values of CalendarEntryType.Absent, Public_Holiday and WfH.
+DEFAULT_CALENDAR_TYPES = ["0", "5", "1"]
+DEFAULT_CALENDAR_ENTITY_FOREACH_TYPE = True
+DEFAULT_COALESCE = False
+# Number of upcoming events a calendar entity shows as an attribute.
+DEFAULT_UPCOMING_EVENTS = 5
+DATA_CALENDAR_FEEDS = f"{DOMAIN}_calendar_feeds"
+DATA_PROFILER = f"{DOMAIN}_profiler"
+DATA_USER_DIRECTORIES = f"{DOMAIN}_user_directories"
+SERVICE_PROFILE = "profile"
+SERVICE_SEARCH_EVENTS = "search_events"
+SERVICE_DUMP_DIAGNOSTICS = "dump_diagnostics"
+SERVICE_FIND_COMMON_WORKDAYS = "find_common_workdays"
+DEFAULT_RETENTION_DAYS = 90
+MAX_PARALLEL_FETCHES = 4
+DEFAULT_LOOP_BUDGET_MS = 25
+# Entities and queries covering more entries are computed in the executor.
+OFFLOAD_ENTRY_THRESHOLD = 5000
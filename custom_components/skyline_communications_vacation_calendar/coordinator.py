@@ -1,60 +1,346 @@
-"""Integration 101 Template integration using DataUpdateCoordinator."""
+"""Coordinators that download the calendars of the users and keep their snapshots."""
 
-from datetime import timedelta
+from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import datetime, timedelta
 import logging
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_API_KEY, CONF_HOST
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_point_in_time
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .const import (
     CONF_ELEMENT_ID,
+    CONF_FEED_TOKEN,
     CONF_FULLNAME,
+    CONF_FULLNAMES,
+    CONF_OPTION_COALESCE,
+    CONF_OPTION_LOOP_BUDGET,
+    CONF_OPTION_POLL_CEILING,
+    CONF_OPTION_POLL_FLOOR,
+    CONF_OPTION_RETENTION_DAYS,
+    DEFAULT_COALESCE,
+    DEFAULT_LOOP_BUDGET_MS,
+    DEFAULT_POLL_CEILING_MINUTES,
+    DEFAULT_POLL_FLOOR_MINUTES,
+    DEFAULT_RETENTION_DAYS,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
     DOMAIN_METRICS_URL,
+    MAX_PARALLEL_FETCHES,
+    OFFLOAD_ENTRY_THRESHOLD,
 )
-from .skyline.calendar_api import CalendarEntry, CalendarException, CalendarHelper
+from .directory import async_add_users
+from .loop_budget import LoopBudget
+from .profiler import async_get_profiler, profiled
+from .skyline.calendar_api import (
+    CalendarEntry,
+    CalendarEntryType,
+    CalendarException,
+    CalendarHelper,
+)
+from .skyline.coalesce import coalesce_entries
+from .skyline.history import HistoryCache, next_month
+from .skyline.polling import UPCOMING_CATEGORIES, PollingPolicy
+from .skyline.recurrence import RecurrenceRule
+from .skyline.roster import RosterTable
+from .skyline.snapshot import CalendarSnapshot, LookupKey
+from .skyline.statistics import STATISTIC_CATEGORIES, AbsenceStatistics
+from .skyline.store import CalendarStore
+from .skyline.transitions import Transitions
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class CalendarCoordinator(DataUpdateCoordinator):
-    """My example coordinator."""
+def get_fullnames(data: Mapping[str, Any]) -> list[str]:
+    """Return the users tracked by the data of a config entry."""
+    if CONF_FULLNAMES in data:
+        return list(data[CONF_FULLNAMES])
+    return [data[CONF_FULLNAME]]
 
-    entries: list[CalendarEntry]
-    counter: int = 0
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
-        """Initialize coordinator."""
+class UserCalendar:
+    """Calendar data of one of the users tracked by a coordinator."""
 
-        # Set variables from values entered in config flow setup
-        self.host = DOMAIN_METRICS_URL
-        self.api_key = config_entry.data[CONF_API_KEY]
-        self.fullname = config_entry.data[CONF_FULLNAME]
-        self.element_id = config_entry.data[CONF_ELEMENT_ID]
+    def __init__(
+        self,
+        api_key: str,
+        fullname: str,
+        element_id: str,
+        coalesce: bool = False,
+        host: str | None = None,
+    ) -> None:
+        """Initialize."""
+        self.fullname = fullname
+        self.element_id = element_id
+        self.coalesce = coalesce
+        # Every user has its own helper so the fetch metrics of parallel downloads
+        # do not overwrite each other.
+        self.api = CalendarHelper(api_key, host)
+        # Replaced as a whole, never changed in place.
+        self.snapshot = CalendarSnapshot()
+        # Lookups the entities of the user read, precomputed in every snapshot.
+        self.lookup_keys: set[LookupKey] = set()
+        # Categories whose transitions the entities of the user read.
+        self.transition_keys: set[LookupKey] = set()
+        # Compacted entries that were downloaded again, for the calendar panel.
+        self.history = HistoryCache(dt_util.get_default_time_zone())
+        self.history_lock = asyncio.Lock()
 
-        # set variables from options.  You need a default here incase options have not been set
-        # self.poll_interval = config_entry.options.get(
-        #    CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
-        # )
-        self.poll_interval = DEFAULT_SCAN_INTERVAL
+    def register_lookup(self, categories: Iterable[CalendarEntryType]) -> None:
+        """Precompute the ongoing and next entries of the categories from now on."""
+        self.lookup_keys.add(tuple(categories))
+
+    def register_transitions(self, categories: Iterable[CalendarEntryType]) -> None:
+        """Precompute the transitions of the categories on every download."""
+        self.transition_keys.add(tuple(categories))
+
+    @property
+    def store(self) -> CalendarStore:
+        """Return the retained entries."""
+        return self.snapshot.store
+
+    @property
+    def statistics(self) -> AbsenceStatistics:
+        """Return the day counts per category."""
+        return self.snapshot.statistics
+
+    @property
+    def generation(self) -> int:
+        """Return a number that is incremented whenever the retained entries change."""
+        return self.snapshot.generation
+
+    @property
+    def modified(self) -> datetime | None:
+        """Return when the retained entries last changed."""
+        return self.snapshot.modified
+
+    @property
+    def entries(self) -> list[CalendarEntry]:
+        """Return the non recurring entries within the retention window."""
+        return self.store.entries
+
+    @property
+    def recurrences(self) -> list[RecurrenceRule]:
+        """Return the recurring entries within the retention window."""
+        return self.store.recurrences
+
+    @property
+    def size(self) -> int:
+        """Return the number of entries within the retention window."""
+        return self.store.size
+
+    def fetch(
+        self,
+        retained_from: datetime,
+        counted_from: datetime,
+        keys: tuple[LookupKey, ...],
+        transition_keys: tuple[LookupKey, ...] = (),
+    ) -> CalendarSnapshot:
+        """Download the entries and build the next snapshot while they are decoded.
+
+        Runs in the executor, the statistics are updated with the entries since
+        counted_from and the lookups and transitions are computed for the given keys.
+        """
+        counted_entries: list[CalendarEntry] = []
+
+        def collect_counted_entries() -> Iterator[CalendarEntry]:
+            for entry in self.api.iter_entries(self.fullname, self.element_id):
+                if (
+                    entry.category in STATISTIC_CATEGORIES
+                    and entry.end_date >= counted_from
+                ):
+                    counted_entries.append(entry)
+                yield entry
+
+        entries: Iterable[CalendarEntry] = collect_counted_entries()
+        if self.coalesce:
+            entries = coalesce_entries(entries)
+        store = CalendarStore(entries, retained_from)
+        return self.snapshot.updated(
+            store, counted_entries, dt_util.utcnow(), keys, transition_keys
+        )
+
+    def fetch_history(self, start: datetime, end: datetime) -> list[CalendarEntry]:
+        """Download the entries again and keep the ones that start within the range."""
+        return [
+            entry
+            for entry in self.api.iter_entries(self.fullname, self.element_id)
+            if start <= entry.event_date < end
+        ]
+
+    def get_entries_between(
+        self,
+        start: datetime,
+        end: datetime,
+        categories: Iterable[CalendarEntryType],
+    ) -> list[CalendarEntry]:
+        """Return the retained entries of the given categories that start within the range."""
+        return self.store.entries_between(start, end, categories)
+
+    def get_entries_at(
+        self, moment: datetime, categories: Iterable[CalendarEntryType]
+    ) -> list[CalendarEntry]:
+        """Return the entries of the given categories that are ongoing at the moment."""
+        return list(self.snapshot.lookup(moment, categories).current)
+
+    def get_next_entry(
+        self, moment: datetime, categories: Iterable[CalendarEntryType]
+    ) -> CalendarEntry | None:
+        """Return the first entry of the given categories that starts after the moment."""
+        return self.snapshot.lookup(moment, categories).next
+
+    def get_transitions(self, categories: Iterable[CalendarEntryType]) -> Transitions:
+        """Return when the periods covered by entries of the categories start and end."""
+        return self.snapshot.get_transitions(categories)
+
+
+class SkylineCoordinator(DataUpdateCoordinator, ABC):
+    """Download scheduling shared by the coordinators of the integration.
+
+    Downloads follow an adaptive polling policy. In between, the listeners are
+    updated at the moments the state of the entities changes, like an entry
+    starting or ending, instead of on a fixed interval.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        """Initialize coordinator."""
+        options = config_entry.options
+        self.loop_budget = LoopBudget(
+            options.get(CONF_OPTION_LOOP_BUDGET, DEFAULT_LOOP_BUDGET_MS)
+        )
+        floor = timedelta(
+            minutes=options.get(CONF_OPTION_POLL_FLOOR, DEFAULT_POLL_FLOOR_MINUTES)
+        )
+        ceiling = max(
+            floor,
+            timedelta(
+                minutes=options.get(
+                    CONF_OPTION_POLL_CEILING, DEFAULT_POLL_CEILING_MINUTES
+                )
+            ),
+        )
+        base = max(floor, min(timedelta(seconds=DEFAULT_SCAN_INTERVAL), ceiling))
+        self.polling = PollingPolicy(floor, base, ceiling)
+        self._cancel_transition: CALLBACK_TYPE | None = None
+        config_entry.async_on_unload(self._async_cancel_transition)
 
-        # Initialise DataUpdateCoordinator
         super().__init__(
             hass,
             _LOGGER,
             name=f"{DOMAIN} ({config_entry.unique_id})",
             # Method to call on every update interval.
             update_method=self.async_update_data,
-            # Polling interval. Will only be polled if there are subscribers.
-            # Using config option here but you can just use a value.
-            update_interval=timedelta(seconds=60),
+            # Adapted after every download.
+            update_interval=floor,
+        )
+
+    @abstractmethod
+    async def async_update_data(self) -> Any:
+        """Download the data."""
+
+    @abstractmethod
+    def next_transition(self, now: datetime) -> datetime | None:
+        """Return the first moment after now at which the state of an entity changes."""
+
+    async def _async_prepare_transition(self) -> None:
+        """Prepare the data the entities read at a transition."""
+
+    def _downloaded(self, changed: bool, upcoming: datetime | None) -> None:
+        """Adapt the interval until the next download to the result of this one."""
+        self.polling.record(changed)
+        self.update_interval = self.polling.interval(dt_util.now(), upcoming)
+        _LOGGER.debug(
+            "%s: data %s, next download in %s",
+            self.name,
+            "changed" if changed else "unchanged",
+            self.update_interval,
+        )
+        self.async_schedule_transition()
+
+    @callback
+    def async_schedule_transition(self) -> None:
+        """Update the listeners at the next transition, or at midnight at the latest."""
+        self._async_cancel_transition()
+        now = dt_util.now()
+        # The statistic sensors change period at midnight.
+        moment = dt_util.start_of_local_day() + timedelta(days=1)
+        if (transition := self.next_transition(now)) is not None:
+            moment = min(moment, transition)
+        self._cancel_transition = async_track_point_in_time(
+            self.hass, self._async_handle_transition, moment
+        )
+
+    async def _async_handle_transition(self, _now: datetime) -> None:
+        self._cancel_transition = None
+        await self._async_prepare_transition()
+        self.async_update_listeners()
+        self.async_schedule_transition()
+
+    @callback
+    def _async_cancel_transition(self) -> None:
+        if self._cancel_transition is not None:
+            self._cancel_transition()
+            self._cancel_transition = None
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners and count the refresh when it is being profiled."""
+        super().async_update_listeners()
+        if (profiler := async_get_profiler(self.hass)) is not None:
+            profiler.async_refreshed(self)
+
+
+class CalendarCoordinator(SkylineCoordinator):
+    """Coordinator that refreshes the calendars of one or more users of an element."""
+
+    users: dict[str, UserCalendar]
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        """Initialize coordinator."""
+
+        # Set variables from values entered in config flow setup
+        # Only set on entries that talk to another instance of the api, like a stub.
+        self.host = config_entry.data.get(CONF_HOST, DOMAIN_METRICS_URL)
+        self.api_key = config_entry.data[CONF_API_KEY]
+        self.element_id = config_entry.data[CONF_ELEMENT_ID]
+        self.entry_id = config_entry.entry_id
+        self.is_group = CONF_FULLNAMES in config_entry.data
+        self.feed_token: str | None = config_entry.data.get(CONF_FEED_TOKEN)
+        coalesce = config_entry.options.get(CONF_OPTION_COALESCE, DEFAULT_COALESCE)
+        self.users = {
+            fullname: UserCalendar(
+                self.api_key, fullname, self.element_id, coalesce, self.host
+            )
+            for fullname in get_fullnames(config_entry.data)
+        }
+
+        # set variables from options.  You need a default here incase options have not been set
+        self.retention_days: int = int(
+            config_entry.options.get(CONF_OPTION_RETENTION_DAYS, DEFAULT_RETENTION_DAYS)
         )
 
+        # Initialise DataUpdateCoordinator
+        super().__init__(hass, config_entry)
+
         # Initialise your api here
-        self.api = CalendarHelper(self.api_key)
+        self.api = CalendarHelper(self.api_key, self.host)
+
+    def user_unique_id(self, fullname: str) -> str:
+        """Return the part of the unique ids of the entities of a user.
+
+        A user can be tracked by a single user entry and by groups at the same
+        time, so groups add their entry id to keep the ids unique.
+        """
+        if self.is_group:
+            return f"{self.entry_id}-{fullname}"
+        return fullname
 
     async def async_update_data(self):
         """Fetch data from API endpoint.
@@ -63,23 +349,252 @@ class CalendarCoordinator(DataUpdateCoordinator):
         so entities can quickly look up their data.
         """
 
-        self.counter = self.counter + 1
-        if self.counter == 1:
-            try:
-                await self.api.authenticate_async(self.hass)
-                self.entries = await self.api.get_entries_async(
-                    self.hass, self.fullname, self.element_id
+        generations = [user.generation for user in self.users.values()]
+        try:
+            await self.api.authenticate_async(self.hass)
+            # All users are refreshed in the same cycle, a failure for one of
+            # them fails the whole cycle.
+            semaphore = asyncio.Semaphore(MAX_PARALLEL_FETCHES)
+            retained_from = self.retained_from()
+            start_of_year = dt_util.start_of_local_day().replace(month=1, day=1)
+            await asyncio.gather(
+                *(
+                    self._async_update_user(
+                        user, semaphore, retained_from, start_of_year
+                    )
+                    for user in self.users.values()
                 )
+            )
 
-            except CalendarException as err:
-                _LOGGER.error(err)
-                raise UpdateFailed(err) from err
-            except Exception as err:
-                # This will show entities as unavailable by raising UpdateFailed exception
-                raise UpdateFailed(f"Error communicating with API: {err}") from err
+        except CalendarException as err:
+            _LOGGER.error(err)
+            raise UpdateFailed(err) from err
+        except Exception as err:
+            # This will show entities as unavailable by raising UpdateFailed exception
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
 
-        if self.counter >= 60:
-            self.counter = 0
+        now = dt_util.now()
+        self._downloaded(
+            generations != [user.generation for user in self.users.values()],
+            min(
+                (
+                    entry.event_date
+                    for user in self.users.values()
+                    if (entry := user.store.next_entry(now, UPCOMING_CATEGORIES))
+                ),
+                default=None,
+            ),
+        )
 
         # What is returned here is stored in self.data by the DataUpdateCoordinator
-        return self.entries
+        return self.users
+
+    async def _async_update_user(
+        self,
+        user: UserCalendar,
+        semaphore: asyncio.Semaphore,
+        retained_from: datetime,
+        counted_from: datetime,
+    ) -> None:
+        """Download the entries of a user, at most MAX_PARALLEL_FETCHES at once."""
+        async with semaphore:
+            user.snapshot = await self.hass.async_add_executor_job(
+                profiled(self.hass, user.fetch),
+                retained_from,
+                counted_from,
+                tuple(user.lookup_keys),
+                tuple(user.transition_keys),
+            )
+        if (metrics := user.api.last_fetch_metrics) is not None:
+            _LOGGER.debug(
+                "Fetched %s entries for %s in %.2fs: %s bytes on the wire (%s), %s bytes decoded",
+                metrics.entry_count,
+                user.fullname,
+                metrics.duration,
+                metrics.wire_bytes,
+                metrics.content_encoding or "identity",
+                metrics.decoded_bytes,
+            )
+
+    def next_transition(self, now: datetime) -> datetime | None:
+        """Return when the first precomputed lookup expires or period starts or ends."""
+        # Entities added since the last download still need their lookups.
+        if any(
+            user.snapshot.is_expired(now, user.lookup_keys)
+            or user.snapshot.lacks_transitions(user.transition_keys)
+            for user in self.users.values()
+        ):
+            return now
+        moments = [
+            lookup.valid_until
+            for user in self.users.values()
+            for lookup in user.snapshot.lookups.values()
+        ]
+        moments.extend(
+            transitions.next_after(now)
+            for user in self.users.values()
+            for transitions in user.snapshot.transitions.values()
+        )
+        return min((moment for moment in moments if moment is not None), default=None)
+
+    async def _async_prepare_transition(self) -> None:
+        """Recompute the lookups in the executor once an entry started or ended."""
+        now = dt_util.utcnow()
+        for user in self.users.values():
+            keys = tuple(user.lookup_keys)
+            transition_keys = tuple(user.transition_keys)
+            snapshot = user.snapshot
+            if snapshot.is_expired(now, keys) or snapshot.lacks_transitions(
+                transition_keys
+            ):
+                updated = await self.hass.async_add_executor_job(
+                    self._prepare_snapshot, snapshot, now, keys, transition_keys
+                )
+                # A download may have published a newer snapshot meanwhile.
+                if user.snapshot is snapshot:
+                    user.snapshot = updated
+
+    @staticmethod
+    def _prepare_snapshot(
+        snapshot: CalendarSnapshot,
+        now: datetime,
+        keys: tuple[LookupKey, ...],
+        transition_keys: tuple[LookupKey, ...],
+    ) -> CalendarSnapshot:
+        return snapshot.with_transitions(transition_keys).with_lookups(now, keys)
+
+    def retained_from(self) -> datetime:
+        """Return the moment before which ended entries are compacted."""
+        return dt_util.start_of_local_day() - timedelta(days=self.retention_days)
+
+    async def async_get_entries_between(
+        self,
+        fullname: str,
+        start: datetime,
+        end: datetime,
+        categories: Iterable[CalendarEntryType],
+    ) -> list[CalendarEntry]:
+        """Return the entries of a user that start within the range, including compacted ones.
+
+        Compacted history is only downloaded again for the months of the range
+        that are not cached yet, a failing download raises HomeAssistantError.
+        """
+        user = self.users[fullname]
+        if user.size > OFFLOAD_ENTRY_THRESHOLD:
+            self.loop_budget.record_offloaded("async_get_entries_between")
+            entries = await self.hass.async_add_executor_job(
+                user.get_entries_between, start, end, categories
+            )
+        else:
+            with self.loop_budget.measure(
+                "async_get_entries_between", fullname, user.size
+            ):
+                entries = user.get_entries_between(start, end, categories)
+        if user.store.is_retained(start):
+            return entries
+        return await self._async_get_history(user, start, end, categories) + entries
+
+    async def _async_get_history(
+        self,
+        user: UserCalendar,
+        start: datetime,
+        end: datetime,
+        categories: Iterable[CalendarEntryType],
+    ) -> list[CalendarEntry]:
+        """Return the compacted entries within the range, downloading each month once.
+
+        Months of compacted entries stay valid when the retained entries change,
+        see HistoryCache, and queries that need the same months wait for a
+        single download.
+        """
+        retained_from = user.store.retained_from
+        key = (user.generation, retained_from)
+        async with user.history_lock:
+            if months := user.history.missing(key, start, min(end, retained_from)):
+                try:
+                    history = await self.hass.async_add_executor_job(
+                        profiled(self.hass, user.fetch_history),
+                        months[0],
+                        next_month(months[-1]),
+                    )
+                except (CalendarException, OSError) as err:
+                    raise HomeAssistantError(
+                        f"Could not download the history of {user.fullname}: {err}"
+                    ) from err
+                user.history.fill(key, months, history, retained_from)
+            return user.history.entries_between(
+                start, end, categories, retained_from
+            )
+
+
+class RosterCoordinator(SkylineCoordinator):
+    """Coordinator that downloads the entries of all users of an element at once."""
+
+    table: RosterTable
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        """Initialize coordinator."""
+
+        self.api_key = config_entry.data[CONF_API_KEY]
+        self.element_id = config_entry.data[CONF_ELEMENT_ID]
+        self.host = config_entry.data.get(CONF_HOST, DOMAIN_METRICS_URL)
+        self.coalesce: bool = config_entry.options.get(
+            CONF_OPTION_COALESCE, DEFAULT_COALESCE
+        )
+
+        super().__init__(hass, config_entry)
+
+        self.api = CalendarHelper(self.api_key, self.host)
+
+    async def async_update_data(self):
+        """Fetch the entries of the element and store them in a columnar table."""
+
+        previous = getattr(self, "table", None)
+        try:
+            await self.api.authenticate_async(self.hass)
+            self.table = await self.hass.async_add_executor_job(
+                profiled(self.hass, self._fetch_table), self.retained_from()
+            )
+            _LOGGER.debug(
+                "Fetched %s entries of %s users for element %s",
+                len(self.table),
+                len(self.table.users),
+                self.element_id,
+            )
+
+        except CalendarException as err:
+            _LOGGER.error(err)
+            raise UpdateFailed(err) from err
+        except Exception as err:
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        # The config flow picks users from the same element, keep their names.
+        async_add_users(self.hass, self.host, self.element_id, self.table.users)
+        # Entries ending count as upcoming as well, the roster changes then too. The
+        # table is scanned in the executor, it can hold the entries of many users.
+        upcoming = await self.hass.async_add_executor_job(
+            self.table.next_change_of,
+            dt_util.now(),
+            UPCOMING_CATEGORIES,
+            dt_util.get_default_time_zone(),
+        )
+        self._downloaded(self.table != previous, upcoming)
+
+        return self.table
+
+    def next_transition(self, now: datetime) -> datetime | None:
+        """Return when the next entry starts or ends."""
+        return self.table.next_change(now, dt_util.get_default_time_zone())
+
+    def retained_from(self) -> datetime:
+        """Return the moment before which ended entries are not needed."""
+        return dt_util.start_of_local_day()
+
+    def _fetch_table(self, retained_from: datetime) -> RosterTable:
+        """Download the entries of the element and store them while they are decoded."""
+        entries: Iterable[CalendarEntry] = self.api.iter_roster_entries(
+            self.element_id, retained_from
+        )
+        if self.coalesce:
+            entries = coalesce_entries(entries)
+        return RosterTable(entries)
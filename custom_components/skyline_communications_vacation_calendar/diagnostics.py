@@ -1,25 +1,181 @@
 """Diagnostics support for Skyline Communications Vacation Calendar."""
 
-from typing import Any
+from dataclasses import asdict
+from datetime import UTC, datetime, timedelta
+import json
+import logging
+from pathlib import Path
+from typing import Any, TextIO
 
+from homeassistant.components import persistent_notification
 from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY
 from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
-from .coordinator import CalendarCoordinator
+from .const import CONF_FEED_TOKEN, CONF_FULLNAME, DOMAIN
+from .coordinator import CalendarCoordinator, RosterCoordinator, UserCalendar
+from .skyline.calendar_api import CalendarEntryType
 
-TO_REDACT = {CONF_API_KEY}
+_LOGGER = logging.getLogger(__name__)
+
+TO_REDACT = {CONF_API_KEY, CONF_FEED_TOKEN}
+
+# Entries starting this long before or after today are included as a sample.
+SAMPLE_WINDOW = timedelta(days=7)
+# Maximum number of entries in the sample of a user or roster.
+SAMPLE_LIMIT = 50
+
+
+def _polling(coordinator: CalendarCoordinator | RosterCoordinator) -> dict[str, Any]:
+    """Return the state of the adaptive polling of a coordinator."""
+    interval = coordinator.update_interval
+    return {
+        **coordinator.polling.as_dict(),
+        "interval_seconds": interval.total_seconds() if interval else None,
+    }
+
+
+def _refresh(coordinator: CalendarCoordinator | RosterCoordinator) -> dict[str, Any]:
+    """Return the outcome of the last refresh of a coordinator."""
+    return {
+        "last_update_success": coordinator.last_update_success,
+        "last_exception": repr(coordinator.last_exception)
+        if coordinator.last_exception
+        else None,
+    }
+
+
+def _row_as_dict(
+    user: str, category: CalendarEntryType, start: int, end: int
+) -> dict[str, Any]:
+    return {
+        CONF_FULLNAME: user,
+        "category": category.name,
+        "start": datetime.fromtimestamp(start, UTC).isoformat(),
+        "end": datetime.fromtimestamp(end, UTC).isoformat(),
+    }
+
+
+def _user_summary(user: UserCalendar, today: datetime) -> dict[str, Any]:
+    """Return a summary of the data of a user that does not grow with its history."""
+    snapshot = user.snapshot
+    metrics = user.api.last_fetch_metrics
+    sample = sorted(
+        user.store.entries_between(
+            today - SAMPLE_WINDOW, today + SAMPLE_WINDOW, CalendarEntryType
+        ),
+        key=lambda entry: entry.event_date,
+    )
+    return {
+        "store": user.store.as_summary(),
+        "snapshot": {
+            "generation": snapshot.generation,
+            "modified": snapshot.modified,
+            "lookups": len(snapshot.lookups),
+            "transitions": {
+                "+".join(category.name for category in key): len(transitions)
+                for key, transitions in snapshot.transitions.items()
+            },
+            "search_index_entries": len(snapshot.index),
+        },
+        "last_fetch": None
+        if metrics is None
+        else {**asdict(metrics), "compression_ratio": metrics.compression_ratio},
+        "sample": [entry.as_dict() for entry in sample[:SAMPLE_LIMIT]],
+        "sample_truncated": len(sample) > SAMPLE_LIMIT,
+    }
 
 
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, config_entry: ConfigEntry
 ) -> dict[str, Any]:
-    """Return diagnostics for a config entry."""
-    coordinator: CalendarCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    """Return diagnostics for a config entry.
+
+    Only a bounded summary is returned, the dump_diagnostics action writes all
+    entries to a file.
+    """
+    coordinator: CalendarCoordinator | RosterCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ]
+    today = dt_util.start_of_local_day()
+
+    if isinstance(coordinator, RosterCoordinator):
+        start = int((today - SAMPLE_WINDOW).timestamp())
+        end = int((today + SAMPLE_WINDOW).timestamp())
+        sample = [
+            _row_as_dict(*row)
+            for row in coordinator.table.iter_rows()
+            if start <= row[2] <= end
+        ]
+        return {
+            "config_entry_data": async_redact_data(dict(config_entry.data), TO_REDACT),
+            "roster": {
+                "users": len(coordinator.table.users),
+                "entries": len(coordinator.table),
+                "changes": len(coordinator.table.change_column),
+                "sample": sample[:SAMPLE_LIMIT],
+                "sample_truncated": len(sample) > SAMPLE_LIMIT,
+            },
+            "refresh": _refresh(coordinator),
+            "loop_budget": coordinator.loop_budget.as_dict(),
+            "polling": _polling(coordinator),
+        }
 
     return {
         "config_entry_data": async_redact_data(dict(config_entry.data), TO_REDACT),
-        "observation_data": coordinator.entries,
+        "users": {
+            fullname: _user_summary(user, today)
+            for fullname, user in coordinator.users.items()
+        },
+        "refresh": _refresh(coordinator),
+        "loop_budget": coordinator.loop_budget.as_dict(),
+        "polling": _polling(coordinator),
     }
+
+
+def _write_line(file: TextIO, record: dict[str, Any]) -> None:
+    file.write(json.dumps(record, default=str, ensure_ascii=False))
+    file.write("\n")
+
+
+def _write_dump(
+    path: Path, coordinators: dict[str, CalendarCoordinator | RosterCoordinator]
+) -> int:
+    """Write every retained entry as a line of json and return how many there are."""
+    count = 0
+    with path.open("w", encoding="utf-8") as file:
+        for entry_id, coordinator in coordinators.items():
+            if isinstance(coordinator, RosterCoordinator):
+                for row in coordinator.table.iter_rows():
+                    _write_line(
+                        file, {"config_entry": entry_id, "entry": _row_as_dict(*row)}
+                    )
+                    count += 1
+                continue
+            for fullname, user in coordinator.users.items():
+                store = user.store
+                owner = {"config_entry": entry_id, "user": fullname}
+                for summary in store.summaries:
+                    _write_line(file, {**owner, "summary": summary.as_dict()})
+                for rule in store.recurrences:
+                    _write_line(file, {**owner, "rule": rule.as_dict()})
+                for entry in store.entries:
+                    _write_line(file, {**owner, "entry": entry.as_dict()})
+                    count += 1
+    return count
+
+
+async def async_dump_diagnostics(hass: HomeAssistant) -> Path:
+    """Write the data of all config entries to a json lines file in the config dir."""
+    coordinators = dict(hass.data.get(DOMAIN, {}))
+    name = f"{DOMAIN}_dump_{dt_util.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    path = Path(hass.config.path(f"{name}.jsonl"))
+    count = await hass.async_add_executor_job(_write_dump, path, coordinators)
+    message = f"{count} calendar entries were written to `{path}`."
+    _LOGGER.info(message)
+    persistent_notification.async_create(
+        hass, message, title="Vacation calendar dump", notification_id=name
+    )
+    return path
@@ -0,0 +1,94 @@
+"""Cached directories of the users of an element, to pick names from in the config flow."""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_USER_DIRECTORIES, DOMAIN
+from .skyline.calendar_api import CalendarHelper
+from .skyline.directory import UserDirectory
+
+_LOGGER = logging.getLogger(__name__)
+
+# A cached directory older than this is refreshed in the background.
+DIRECTORY_MAX_AGE = timedelta(hours=12)
+# Users with entries within this period before today are in the directory.
+DIRECTORY_HISTORY = timedelta(days=365)
+
+
+@dataclass
+class _CachedDirectory:
+    directory: UserDirectory
+    fetched: datetime
+    refreshing: bool = False
+
+
+def _fetch_names(api: CalendarHelper, element_id: str) -> set[str]:
+    """Download the entries of the element and keep only the names of their users."""
+    retain_after = dt_util.start_of_local_day() - DIRECTORY_HISTORY
+    return {entry.name for entry in api.iter_roster_entries(element_id, retain_after)}
+
+
+async def _async_fetch(
+    hass: HomeAssistant, api: CalendarHelper, element_id: str
+) -> UserDirectory:
+    names = await hass.async_add_executor_job(_fetch_names, api, element_id)
+    cache: dict[tuple[str, str], _CachedDirectory] = hass.data.setdefault(
+        DATA_USER_DIRECTORIES, {}
+    )
+    directory = UserDirectory(names)
+    cache[(api.host, element_id)] = _CachedDirectory(directory, dt_util.utcnow())
+    return directory
+
+
+async def _async_refresh(
+    hass: HomeAssistant, api: CalendarHelper, element_id: str, cached: _CachedDirectory
+) -> None:
+    try:
+        await _async_fetch(hass, api, element_id)
+    except Exception as err:  # pylint: disable=broad-except
+        # The cached directory is still used, the next lookup tries again.
+        _LOGGER.debug("Could not refresh the users of element %s: %s", element_id, err)
+    finally:
+        cached.refreshing = False
+
+
+async def async_get_directory(
+    hass: HomeAssistant, api: CalendarHelper, element_id: str
+) -> UserDirectory:
+    """Return the users of an element, downloading them only the first time.
+
+    A directory older than DIRECTORY_MAX_AGE is returned as is and refreshed in
+    the background, so only the very first lookup of an element waits.
+    """
+    cache: dict[tuple[str, str], _CachedDirectory] = hass.data.get(
+        DATA_USER_DIRECTORIES, {}
+    )
+    if (cached := cache.get((api.host, element_id))) is None:
+        return await _async_fetch(hass, api, element_id)
+    if dt_util.utcnow() - cached.fetched > DIRECTORY_MAX_AGE and not cached.refreshing:
+        cached.refreshing = True
+        hass.async_create_background_task(
+            _async_refresh(hass, api, element_id, cached),
+            f"{DOMAIN} refresh users of {element_id}",
+        )
+    return cached.directory
+
+
+@callback
+def async_add_users(
+    hass: HomeAssistant, host: str, element_id: str, names: list[str]
+) -> None:
+    """Add names that were downloaded anyway, like those of a roster, to the cache."""
+    cache: dict[tuple[str, str], _CachedDirectory] = hass.data.setdefault(
+        DATA_USER_DIRECTORIES, {}
+    )
+    if (cached := cache.get((host, element_id))) is None:
+        cache[(host, element_id)] = _CachedDirectory(
+            UserDirectory(names), dt_util.utcnow()
+        )
+    elif not all(name in cached.directory for name in names):
+        cached.directory = UserDirectory([*cached.directory.names, *names])
@@ -0,0 +1,222 @@
+"""iCalendar feeds of the Skyline Communications Vacation Calendar entities."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, datetime
+from http import HTTPStatus
+import secrets
+from typing import TYPE_CHECKING
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.calendar import CalendarEvent
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_CALENDAR_FEEDS, DOMAIN, SERVICE_NAME
+
+if TYPE_CHECKING:
+    from .calendar import SLCVacationCalendarEntity
+
+# Calendar clients cannot log in, the secret token of the config entry is in the path.
+FEED_URL = f"/api/{DOMAIN}/feed/{{token}}/{{entity_id}}.ics"
+CONTENT_TYPE = "text/calendar; charset=utf-8"
+
+def _escape(text: str) -> str:
+    """Escape a text value (RFC 5545 3.3.11)."""
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line so no line is longer than 75 octets (RFC 5545 3.1)."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Do not split a multi byte character.
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    parts.append(encoded.decode())
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _format_time(name: str, value: date | datetime) -> str:
+    if isinstance(value, datetime):
+        return f"{name}:{dt_util.as_utc(value).strftime('%Y%m%dT%H%M%SZ')}"
+    return f"{name};VALUE=DATE:{value.strftime('%Y%m%d')}"
+
+
+def iter_ics_lines(
+    name: str, events: Iterable[CalendarEvent], stamp: datetime
+) -> Iterator[str]:
+    """Yield the folded lines of an iCalendar document with the given events."""
+    yield _fold("BEGIN:VCALENDAR")
+    yield _fold("VERSION:2.0")
+    yield _fold(f"PRODID:-//{SERVICE_NAME}//{DOMAIN}//EN")
+    yield _fold(f"X-WR-CALNAME:{_escape(name)}")
+    for event in events:
+        yield _fold("BEGIN:VEVENT")
+        yield _fold(f"UID:{_escape(event.uid or '')}")
+        yield _fold(_format_time("DTSTAMP", stamp))
+        yield _fold(_format_time("DTSTART", event.start))
+        yield _fold(_format_time("DTEND", event.end))
+        yield _fold(f"SUMMARY:{_escape(event.summary)}")
+        if event.description:
+            yield _fold(f"DESCRIPTION:{_escape(event.description)}")
+        yield _fold("END:VEVENT")
+    yield _fold("END:VCALENDAR")
+
+
+def serialize_ics(
+    name: str, events: Iterable[CalendarEvent], stamp: datetime
+) -> bytes:
+    """Return the encoded iCalendar document with the given events."""
+    return "".join(iter_ics_lines(name, events, stamp)).encode()
+
+
+def new_feed_token() -> str:
+    """Return a new secret for the paths of the iCalendar feeds of an entry."""
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeed:
+    """Serialized iCalendar document of a calendar entity, cached per data generation."""
+
+    def __init__(self, entity: SLCVacationCalendarEntity) -> None:
+        """Initialize."""
+        self.entity = entity
+        self._etag: str | None = None
+        self._body: bytes | None = None
+        self._removed_listeners: list[Callable[[], None]] = []
+
+    @property
+    def last_modified(self) -> datetime:
+        """Return when the data of the feed last changed."""
+        return (self.entity.user.modified or dt_util.utcnow()).replace(microsecond=0)
+
+    @property
+    def etag(self) -> str:
+        """Return an entity tag that changes whenever the data of the feed changes."""
+        return (
+            f'"{self.entity.user.generation}-{int(self.last_modified.timestamp())}"'
+        )
+
+    @callback
+    def async_on_removed(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call the listener once the feed is removed and return how to stop that."""
+        self._removed_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            if listener in self._removed_listeners:
+                self._removed_listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_removed(self) -> None:
+        """Tell the listeners that the entity of the feed was removed."""
+        listeners, self._removed_listeners = self._removed_listeners, []
+        for listener in listeners:
+            listener()
+
+    @property
+    def url(self) -> str | None:
+        """Return the path of the feed, which holds the secret of the config entry."""
+        if (token := self.entity.coordinator.feed_token) is None:
+            return None
+        return FEED_URL.format(token=token, entity_id=self.entity.entity_id)
+
+    def is_authorized(self, token: str) -> bool:
+        """Return whether the token is the secret of the config entry of the feed."""
+        expected = self.entity.coordinator.feed_token
+        return expected is not None and secrets.compare_digest(token, expected)
+
+    def cached_body(self, etag: str) -> bytes | None:
+        """Return the serialized document if it was created for the entity tag."""
+        return self._body if etag == self._etag else None
+
+    def store_body(self, etag: str, body: bytes) -> None:
+        """Keep the serialized document for the entity tag."""
+        self._etag = etag
+        self._body = body
+
+
+@callback
+def async_register_feed(
+    hass: HomeAssistant, entity: SLCVacationCalendarEntity
+) -> Callable[[], None]:
+    """Make the feed of a calendar entity available and return how to remove it."""
+    feeds: dict[str, CalendarFeed] = hass.data.setdefault(DATA_CALENDAR_FEEDS, {})
+    entity_id = entity.entity_id
+    feeds[entity_id] = feed = CalendarFeed(entity)
+
+    @callback
+    def unregister() -> None:
+        if feeds.get(entity_id) is feed:
+            del feeds[entity_id]
+        feed.async_removed()
+
+    return unregister
+
+
+class CalendarFeedView(HomeAssistantView):
+    """Serve the calendar entities of the integration as iCalendar feeds."""
+
+    url = FEED_URL
+    name = f"api:{DOMAIN}:feed"
+    # The token in the path authorizes the request.
+    requires_auth = False
+
+    async def get(
+        self, request: web.Request, token: str, entity_id: str
+    ) -> web.Response:
+        """Return the iCalendar document, or 304 when the client has it already."""
+        hass: HomeAssistant = request.app[KEY_HASS]
+        feed: CalendarFeed | None = hass.data.get(DATA_CALENDAR_FEEDS, {}).get(
+            entity_id
+        )
+        # A wrong token does not reveal whether the entity exists.
+        if feed is None or not feed.is_authorized(token):
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        etag = feed.etag
+        last_modified = feed.last_modified
+        headers = {
+            hdrs.ETAG: etag,
+            hdrs.LAST_MODIFIED: last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+            hdrs.CACHE_CONTROL: "no-cache",
+            hdrs.CONTENT_TYPE: CONTENT_TYPE,
+        }
+
+        if_none_match = request.headers.get(hdrs.IF_NONE_MATCH)
+        if if_none_match is not None:
+            if etag in (tag.strip() for tag in if_none_match.split(",")):
+                return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+        elif (
+            since := request.if_modified_since
+        ) is not None and since >= last_modified:
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        if (body := feed.cached_body(etag)) is None:
+            # A calendar can hold many events, they are serialized in the executor.
+            body = await hass.async_add_executor_job(
+                serialize_ics,
+                feed.entity.name or entity_id,
+                feed.entity.iter_feed_events(),
+                last_modified,
+            )
+            feed.store_body(etag, body)
+        return web.Response(body=body, headers=headers)
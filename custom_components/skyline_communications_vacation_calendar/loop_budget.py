@@ -0,0 +1,169 @@
+"""Timing guard for the work the integration does on the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Any, TypeVar
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN, OFFLOAD_ENTRY_THRESHOLD
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Name under which the recomputations of entities after a refresh are recorded.
+UPDATE_CALLBACK = "_handle_coordinator_update"
+
+# Upper bounds in milliseconds of the histogram buckets, the last bucket is unbounded.
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+@dataclass
+class Histogram:
+    """Distribution of the durations of a callback."""
+
+    counts: list[int] = field(
+        default_factory=lambda: [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+    )
+    total: float = 0.0
+    maximum: float = 0.0
+    offloaded: int = 0
+
+    def add(self, duration: float) -> None:
+        """Add a duration in seconds."""
+        self.counts[bisect_left(HISTOGRAM_BUCKETS_MS, duration * 1000)] += 1
+        self.total += duration
+        self.maximum = max(self.maximum, duration)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a json serializable representation of the histogram."""
+        count = sum(self.counts)
+        labels = [f"<= {bound} ms" for bound in HISTOGRAM_BUCKETS_MS]
+        labels.append(f"> {HISTOGRAM_BUCKETS_MS[-1]} ms")
+        return {
+            "count": count,
+            "mean_ms": round(1000 * self.total / count, 3) if count else None,
+            "max_ms": round(1000 * self.maximum, 3),
+            "offloaded": self.offloaded,
+            "buckets": dict(zip(labels, self.counts, strict=True)),
+        }
+
+
+class LoopBudget:
+    """Records how long callbacks run on the event loop and warns when too long."""
+
+    def __init__(self, budget_ms: float) -> None:
+        """Initialize."""
+        self.budget = budget_ms / 1000
+        self.histograms: dict[str, Histogram] = {}
+        # Callbacks that are over budget, warned about once until back within budget.
+        self._over_budget: set[tuple[str, str]] = set()
+
+    def record(self, name: str, source: str, size: int, duration: float) -> None:
+        """Record the duration of a callback of an entity or user over size entries."""
+        self.histograms.setdefault(name, Histogram()).add(duration)
+        key = (name, source)
+        if duration <= self.budget:
+            self._over_budget.discard(key)
+            return
+        if key in self._over_budget:
+            return
+        self._over_budget.add(key)
+        _LOGGER.warning(
+            "%s of %s took %.1f ms on the event loop for %s entries, "
+            "more than the budget of %.0f ms",
+            name,
+            source,
+            duration * 1000,
+            size,
+            self.budget * 1000,
+        )
+
+    def record_offloaded(self, name: str) -> None:
+        """Count a callback that ran in the executor instead of on the event loop."""
+        self.histograms.setdefault(name, Histogram()).offloaded += 1
+
+    @contextmanager
+    def measure(self, name: str, source: str, size: int) -> Iterator[None]:
+        """Measure the duration of the code in the with block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, source, size, time.perf_counter() - started)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a json serializable representation of the histograms."""
+        return {
+            "budget_ms": self.budget * 1000,
+            "callbacks": {
+                name: histogram.as_dict()
+                for name, histogram in self.histograms.items()
+            },
+        }
+
+
+class LoopBudgetEntity(CoordinatorEntity):
+    """Coordinator entity whose state is recomputed within the loop budget."""
+
+    _update_task: asyncio.Task[None] | None = None
+    _update_again = False
+
+    @callback
+    def async_update_state(
+        self, compute: Callable[[], _T], apply: Callable[[_T], None], size: int = 1
+    ) -> None:
+        """Recompute the state of the entity after a refresh and write it.
+
+        size is the number of entries the computation reads from, the size of
+        the store of a user or the table of a roster. The computation runs in
+        the executor above OFFLOAD_ENTRY_THRESHOLD entries, so a large history
+        does not stall the event loop. Its result is always applied on the event
+        loop. At most one computation is pending, refreshes meanwhile only compute
+        once more.
+        """
+        if self._update_task is not None:
+            self._update_again = True
+            return
+        if size <= OFFLOAD_ENTRY_THRESHOLD:
+            with self.coordinator.loop_budget.measure(
+                UPDATE_CALLBACK, self.entity_id, size
+            ):
+                apply(compute())
+            self.async_write_ha_state()
+            return
+        self._update_task = self.hass.async_create_background_task(
+            self._async_update_offloaded(compute, apply),
+            f"{DOMAIN} update {self.entity_id}",
+        )
+
+    async def _async_update_offloaded(
+        self, compute: Callable[[], _T], apply: Callable[[_T], None]
+    ) -> None:
+        try:
+            while True:
+                self._update_again = False
+                self.coordinator.loop_budget.record_offloaded(UPDATE_CALLBACK)
+                value = await self.hass.async_add_executor_job(compute)
+                apply(value)
+                self.async_write_ha_state()
+                if not self._update_again:
+                    return
+        finally:
+            self._update_task = None
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop a pending computation, the entity is not written anymore."""
+        await super().async_will_remove_from_hass()
+        if self._update_task is not None:
+            self._update_task.cancel()
+            self._update_task = None
@@ -0,0 +1,201 @@
+"""Profiling of the update cycle of the Skyline Communications Vacation Calendar integration."""
+
+from __future__ import annotations
+
+import cProfile
+from collections.abc import Callable
+from datetime import timedelta
+import functools
+import io
+import logging
+from pathlib import Path
+import pstats
+import threading
+import tracemalloc
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components import persistent_notification
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_PROFILER, DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Profiling stops after this long, even when not all refreshes happened.
+MAX_PROFILE_DURATION = timedelta(minutes=30)
+# Number of functions and allocations written to the report.
+REPORT_LIMIT = 40
+TRACEMALLOC_FRAMES = 10
+
+
+class RefreshProfiler:
+    """Profiles the next refreshes of all coordinators with cProfile and tracemalloc.
+
+    The event loop is profiled as a whole while the profiler runs, so the refreshes,
+    the entity updates they trigger and the calendar queries are all included.
+    Executor jobs of the coordinators are profiled in their own thread and merged.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinators: list[DataUpdateCoordinator],
+        refreshes: int,
+    ) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._remaining = {id(coordinator): refreshes for coordinator in coordinators}
+        self._loop_profile = cProfile.Profile()
+        self._job_profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._cancel_timeout: CALLBACK_TYPE | None = None
+        self._started = dt_util.utcnow()
+
+    @callback
+    def async_start(self) -> None:
+        """Start profiling the event loop and tracing the allocations."""
+        try:
+            self._loop_profile.enable()
+        except ValueError as err:
+            raise HomeAssistantError(f"Cannot start profiling: {err}") from err
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self._cancel_timeout = async_call_later(
+            self.hass, MAX_PROFILE_DURATION, self._async_timeout
+        )
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Return the function profiled in the executor thread that runs it."""
+
+        @functools.wraps(func)
+        def profiled(*args: Any) -> Any:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is active in this thread.
+                return func(*args)
+            try:
+                return func(*args)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._job_profiles.append(profile)
+
+        return profiled
+
+    @callback
+    def async_refreshed(self, coordinator: DataUpdateCoordinator) -> None:
+        """Count a finished refresh and stop once all refreshes are profiled."""
+        key = id(coordinator)
+        if key not in self._remaining:
+            return
+        self._remaining[key] -= 1
+        if self._remaining[key] <= 0:
+            del self._remaining[key]
+        if not self._remaining:
+            self.async_stop()
+
+    @callback
+    def _async_timeout(self, _now: Any) -> None:
+        self._cancel_timeout = None
+        _LOGGER.warning(
+            "Profiling stopped after %s before all refreshes happened",
+            MAX_PROFILE_DURATION,
+        )
+        self.async_stop()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop profiling and write the report to the config directory."""
+        if self.hass.data.get(DATA_PROFILER) is self:
+            del self.hass.data[DATA_PROFILER]
+        if self._cancel_timeout is not None:
+            self._cancel_timeout()
+            self._cancel_timeout = None
+        self._loop_profile.disable()
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        self.hass.async_create_background_task(
+            self._async_write_report(snapshot), f"{DOMAIN} profile report"
+        )
+
+    async def _async_write_report(self, snapshot: tracemalloc.Snapshot | None) -> None:
+        name = f"{DOMAIN}_profile_{self._started.strftime('%Y%m%d_%H%M%S')}"
+        base = Path(self.hass.config.path(name))
+        await self.hass.async_add_executor_job(self._write_report, base, snapshot)
+        message = (
+            f"The profile was written to `{base}.cprof`, "
+            f"the summary and the top memory allocations to `{base}.txt`."
+        )
+        _LOGGER.info(message)
+        persistent_notification.async_create(
+            self.hass, message, title="Vacation calendar profile", notification_id=name
+        )
+
+    def _write_report(self, base: Path, snapshot: tracemalloc.Snapshot | None) -> None:
+        with self._lock:
+            profiles = [self._loop_profile, *self._job_profiles]
+        stats: pstats.Stats | None = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+
+        report = io.StringIO()
+        report.write(f"Profile of {DOMAIN} started at {self._started.isoformat()}\n\n")
+        if stats is not None:
+            stats.dump_stats(f"{base}.cprof")
+            stats.stream = report  # type: ignore[attr-defined]
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_LIMIT)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(REPORT_LIMIT)
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                )
+            )
+            report.write(f"Top {REPORT_LIMIT} memory allocations\n\n")
+            for statistic in snapshot.statistics("lineno")[:REPORT_LIMIT]:
+                report.write(f"{statistic}\n")
+        Path(f"{base}.txt").write_text(report.getvalue(), encoding="utf-8")
+
+
+@callback
+def async_get_profiler(hass: HomeAssistant) -> RefreshProfiler | None:
+    """Return the running profiler, if any."""
+    return hass.data.get(DATA_PROFILER)
+
+
+def profiled(hass: HomeAssistant, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Return the function profiled when a profiler runs, for executor jobs."""
+    if (profiler := async_get_profiler(hass)) is None:
+        return func
+    return profiler.wrap(func)
+
+
+@callback
+def async_start_profiler(
+    hass: HomeAssistant, coordinators: list[DataUpdateCoordinator], refreshes: int
+) -> RefreshProfiler:
+    """Start profiling the next refreshes of the coordinators."""
+    if async_get_profiler(hass) is not None:
+        raise HomeAssistantError("The update cycle is already being profiled")
+    profiler = RefreshProfiler(hass, coordinators, refreshes)
+    profiler.async_start()
+    hass.data[DATA_PROFILER] = profiler
+    return profiler
@@ -1,6 +1,8 @@
 """Skyline Communications Vacation Calendar."""
 
-from datetime import datetime
+from abc import abstractmethod
+from datetime import datetime, timedelta
+from functools import partial
 import logging
 
 from homeassistant.components.sensor import (
@@ -9,10 +11,11 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -21,11 +24,25 @@ from .const import (
     MODEL_NAME,
     SERVICE_NAME,
 )
-from .coordinator import CalendarCoordinator
-from .skyline.calendar_api import CalendarEntry, CalendarEntryType
+from .coordinator import CalendarCoordinator, RosterCoordinator, UserCalendar
+from .loop_budget import LoopBudgetEntity
+from .skyline.calendar_api import CalendarEntryType, get_calendar_type_display_value
+from .skyline.statistics import STATISTIC_CATEGORIES
+from .skyline.transitions import TransitionCursor
+from .skyline.workdays import DAY_OFF_CATEGORIES
 
 _LOGGER = logging.getLogger(__name__)
 
+PERIOD_MONTH = "month"
+PERIOD_YEAR = "year"
+
+# Categories for which a roster entry shows who is in it right now.
+ROSTER_CATEGORIES = (
+    CalendarEntryType.Absent,
+    CalendarEntryType.WfH,
+    CalendarEntryType.Public_Holiday,
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -33,15 +50,34 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ):
     """Set up the Binary Sensors."""
-    coordinator: CalendarCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator: CalendarCoordinator | RosterCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ]
+
+    if isinstance(coordinator, RosterCoordinator):
+        async_add_entities(
+            RosterSensor(coordinator, category) for category in ROSTER_CATEGORIES
+        )
+        return
 
-    sensors = [DaySensor(coordinator, coordinator.entries)]
+    sensors: list[SensorEntity] = []
+    for fullname in coordinator.users:
+        sensors.append(DaySensor(coordinator, fullname))
+        sensors.extend(
+            AbsenceStatisticSensor(coordinator, fullname, category, period)
+            for category in STATISTIC_CATEGORIES
+            for period in (PERIOD_MONTH, PERIOD_YEAR)
+        )
+        sensors.append(DaysUntilAbsenceSensor(coordinator, fullname))
+        sensors.append(NextDayOffSensor(coordinator, fullname))
+        sensors.append(AbsenceEndSensor(coordinator, fullname))
+        sensors.append(NextWorkdaySensor(coordinator, fullname))
 
     # Create the binary sensors.
     async_add_entities(sensors)
 
 
-class DaySensor(CoordinatorEntity, SensorEntity):
+class DaySensor(LoopBudgetEntity, SensorEntity):
     """Implementation of a sensor."""
 
     options = [
@@ -64,39 +100,41 @@ class DaySensor(CoordinatorEntity, SensorEntity):
     _attr_state_class = SensorStateClass.MEASUREMENT
     coordinator: CalendarCoordinator
 
-    def __init__(
-        self, coordinator: CalendarCoordinator, entries: list[CalendarEntry]
-    ) -> None:
+    def __init__(self, coordinator: CalendarCoordinator, fullname: str) -> None:
         """Initialise sensor."""
         super().__init__(coordinator)
+        self.fullname = fullname
         self._attr_options = self.options
-        self.calculate_day_type(entries)
+        self.user.register_lookup(self.calendar_options)
+        self.day_type = self.calculate_day_type()
+
+    @property
+    def user(self) -> UserCalendar:
+        """Return the calendar data of the user."""
+        return self.coordinator.users[self.fullname]
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        _LOGGER.debug("User: %s", self.coordinator.fullname)
-        self.calculate_day_type(self.coordinator.entries)
-        self.async_write_ha_state()
+        _LOGGER.debug("User: %s", self.fullname)
+        self.async_update_state(
+            self.calculate_day_type,
+            partial(setattr, self, "day_type"),
+            self.user.size,
+        )
 
-    def calculate_day_type(self, entries: list[CalendarEntry]):
+    def calculate_day_type(self) -> str:
         """Caculate the type of day based on the latest vacation entries."""
 
         # This needs to enumerate to true or false
-        now = datetime.now().astimezone()
+        now = dt_util.now()
 
-        matching_entries = [
-            entry
-            for entry in entries
-            if entry.event_date <= now <= entry.end_date
-            and entry.category in self.calendar_options
-        ]
+        matching_entries = self.user.get_entries_at(now, self.calendar_options)
 
         if matching_entries:
-            self.day_type = matching_entries[0].category.name
-        else:
-            self.day_type = "Workday"
+            return matching_entries[0].category.name
+        return "Workday"
 
     @property
     def device_class(self) -> str:
@@ -116,7 +154,7 @@ class DaySensor(CoordinatorEntity, SensorEntity):
             identifiers={
                 (
                     DOMAIN,
-                    f"slc-vaction-calendar-{self.coordinator.fullname}",
+                    f"slc-vaction-calendar-{self.fullname}",
                 )
             },
             configuration_url=DOMAIN_METRICS_URL,
@@ -125,7 +163,7 @@ class DaySensor(CoordinatorEntity, SensorEntity):
     @property
     def name(self) -> str:
         """Return the name of the sensor."""
-        return f"Workday sensor for {self.coordinator.fullname}"
+        return f"Workday sensor for {self.fullname}"
 
     @property
     def native_value(self) -> str:
@@ -150,7 +188,7 @@ class DaySensor(CoordinatorEntity, SensorEntity):
         """Return unique id."""
         # All entities must have a unique id.  Think carefully what you want this to be as
         # changing it later will cause HA to create new entities.
-        return f"{DOMAIN}-workday-{self.coordinator.fullname}"
+        return f"{DOMAIN}-workday-{self.coordinator.user_unique_id(self.fullname)}"
 
     @property
     def extra_state_attributes(self):
@@ -168,3 +206,280 @@ class DaySensor(CoordinatorEntity, SensorEntity):
             )
 
         return attrs
+
+
+class _CalendarSensor(LoopBudgetEntity, SensorEntity):
+    """Base for the sensors of a user that are calculated from the calendar."""
+
+    coordinator: CalendarCoordinator
+
+    def __init__(self, coordinator: CalendarCoordinator, fullname: str) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator)
+        self.fullname = fullname
+
+    @property
+    def user(self) -> UserCalendar:
+        """Return the calendar data of the user."""
+        return self.coordinator.users[self.fullname]
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device information."""
+        return DeviceInfo(
+            entry_type=DeviceEntryType.SERVICE,
+            name=SERVICE_NAME,
+            manufacturer=MANUFACTURER_NAME,
+            model=MODEL_NAME,
+            sw_version=None,
+            identifiers={
+                (
+                    DOMAIN,
+                    f"slc-vaction-calendar-{self.fullname}",
+                )
+            },
+            configuration_url=DOMAIN_METRICS_URL,
+        )
+
+
+class AbsenceStatisticSensor(_CalendarSensor):
+    """Number of days of a category in the current month or year."""
+
+    _attr_native_unit_of_measurement = UnitOfTime.DAYS
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_icon = "mdi:calendar-month"
+
+    def __init__(
+        self,
+        coordinator: CalendarCoordinator,
+        fullname: str,
+        category: CalendarEntryType,
+        period: str,
+    ) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator, fullname)
+        self.category = category
+        self.period = period
+        self._attr_name = (
+            f"{get_calendar_type_display_value(category)} days this {period}"
+            f" for {fullname}"
+        )
+        self._attr_unique_id = (
+            f"{DOMAIN}-{category.name.lower()}-days-{period}"
+            f"-{coordinator.user_unique_id(fullname)}"
+        )
+        self._set_days(self.calculate_days())
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update sensor with latest data from coordinator."""
+        self.async_update_state(self.calculate_days, self._set_days, self.user.size)
+
+    def calculate_days(self) -> tuple[datetime, int]:
+        """Read the start and the day count of the current period from the statistics."""
+        today = dt_util.start_of_local_day()
+        statistics = self.user.statistics
+        if self.period == PERIOD_MONTH:
+            return today.replace(day=1), statistics.days_in_month(
+                self.category, today.year, today.month
+            )
+        return today.replace(month=1, day=1), statistics.days_in_year(
+            self.category, today.year
+        )
+
+    def _set_days(self, days: tuple[datetime, int]) -> None:
+        self._attr_last_reset, self._attr_native_value = days
+
+
+class DaysUntilAbsenceSensor(_CalendarSensor):
+    """Number of days until the next absence, 0 while absent."""
+
+    _attr_native_unit_of_measurement = UnitOfTime.DAYS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:calendar-arrow-right"
+    categories = (CalendarEntryType.Absent,)
+
+    def __init__(self, coordinator: CalendarCoordinator, fullname: str) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator, fullname)
+        self._attr_name = f"Days until next absence for {fullname}"
+        self._attr_unique_id = (
+            f"{DOMAIN}-days-until-absence-{coordinator.user_unique_id(fullname)}"
+        )
+        self.user.register_lookup(self.categories)
+        self._attr_native_value = self.calculate_days()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update sensor with latest data from coordinator."""
+        self.async_update_state(
+            self.calculate_days,
+            partial(setattr, self, "_attr_native_value"),
+            self.user.size,
+        )
+
+    def calculate_days(self) -> int | None:
+        """Calculate the days between today and the start of the next absence."""
+        now = dt_util.now()
+        if self.user.get_entries_at(now, self.categories):
+            return 0
+        if next_absence := self.user.get_next_entry(now, self.categories):
+            return (dt_util.as_local(next_absence.event_date).date() - now.date()).days
+        return None
+
+
+class _TransitionSensor(_CalendarSensor):
+    """Base for the timestamp sensors that read the transitions of some categories.
+
+    The transitions are computed once per download, the sensor only moves its
+    cursor forward when time passes a boundary.
+    """
+
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    categories: tuple[CalendarEntryType, ...] = DAY_OFF_CATEGORIES
+
+    def __init__(self, coordinator: CalendarCoordinator, fullname: str) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator, fullname)
+        self.cursor = TransitionCursor()
+        self.user.register_transitions(self.categories)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update sensor with latest data from coordinator."""
+        self.async_update_state(
+            self.calculate_moment,
+            partial(setattr, self, "_attr_native_value"),
+            self.user.size,
+        )
+
+    @abstractmethod
+    def calculate_moment(self) -> datetime | None:
+        """Read the moment from the transitions."""
+
+
+class NextDayOffSensor(_TransitionSensor):
+    """Start of the next absence, public holiday or weekend."""
+
+    _attr_icon = "mdi:calendar-start"
+
+    def __init__(self, coordinator: CalendarCoordinator, fullname: str) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator, fullname)
+        self._attr_name = f"Next day off for {fullname}"
+        self._attr_unique_id = (
+            f"{DOMAIN}-next-day-off-{coordinator.user_unique_id(fullname)}"
+        )
+        self._attr_native_value = self.calculate_moment()
+
+    def calculate_moment(self) -> datetime | None:
+        """Read when the first day off after now starts."""
+        return self.cursor.next_start(
+            self.user.get_transitions(self.categories), dt_util.utcnow()
+        )
+
+
+class AbsenceEndSensor(_TransitionSensor):
+    """End of the ongoing absence, unknown while not absent."""
+
+    _attr_icon = "mdi:calendar-end"
+    categories = (CalendarEntryType.Absent,)
+
+    def __init__(self, coordinator: CalendarCoordinator, fullname: str) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator, fullname)
+        self._attr_name = f"Current absence ends for {fullname}"
+        self._attr_unique_id = (
+            f"{DOMAIN}-absence-ends-{coordinator.user_unique_id(fullname)}"
+        )
+        self._attr_native_value = self.calculate_moment()
+
+    def calculate_moment(self) -> datetime | None:
+        """Read when the ongoing absence ends."""
+        return self.cursor.current_end(
+            self.user.get_transitions(self.categories), dt_util.utcnow()
+        )
+
+
+class NextWorkdaySensor(_TransitionSensor):
+    """Start of the first workday after today."""
+
+    _attr_icon = "mdi:briefcase-arrow-left-right"
+
+    def __init__(self, coordinator: CalendarCoordinator, fullname: str) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator, fullname)
+        self._attr_name = f"Next workday for {fullname}"
+        self._attr_unique_id = (
+            f"{DOMAIN}-next-workday-{coordinator.user_unique_id(fullname)}"
+        )
+        self._attr_native_value = self.calculate_moment()
+
+    def calculate_moment(self) -> datetime | None:
+        """Read when the days off following today end."""
+        tomorrow = dt_util.start_of_local_day() + timedelta(days=1)
+        return self.cursor.first_free(
+            self.user.get_transitions(self.categories), tomorrow
+        )
+
+
+class RosterSensor(LoopBudgetEntity, SensorEntity):
+    """Number of users of an element that currently have an entry of a category."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:account-group"
+    coordinator: RosterCoordinator
+
+    def __init__(
+        self, coordinator: RosterCoordinator, category: CalendarEntryType
+    ) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator)
+        self.category = category
+        self._attr_name = (
+            f"{get_calendar_type_display_value(category)} now"
+            f" for {coordinator.element_id}"
+        )
+        self._attr_unique_id = (
+            f"{DOMAIN}-roster-{category.name.lower()}-{coordinator.element_id}"
+        )
+        self._set_users(self.calculate_users())
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update sensor with latest data from coordinator."""
+        self.async_update_state(
+            self.calculate_users, self._set_users, len(self.coordinator.table)
+        )
+
+    def calculate_users(self) -> list[str]:
+        """Look up the users that currently have an entry of the category."""
+        now = dt_util.now()
+        return self.coordinator.table.users_at(now, (self.category,))
+
+    def _set_users(self, users: list[str]) -> None:
+        self.users = users
+        self._attr_native_value = len(users)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the extra state attributes."""
+        return {"users": self.users}
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device information."""
+        return DeviceInfo(
+            entry_type=DeviceEntryType.SERVICE,
+            name=SERVICE_NAME,
+            manufacturer=MANUFACTURER_NAME,
+            model=MODEL_NAME,
+            sw_version=None,
+            identifiers={
+                (
+                    DOMAIN,
+                    f"slc-vaction-calendar-roster-{self.coordinator.element_id}",
+                )
+            },
+            configuration_url=DOMAIN_METRICS_URL,
+        )
@@ -0,0 +1,259 @@
+"""Services of the Skyline Communications Vacation Calendar integration."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, tzinfo
+import functools
+import heapq
+from itertools import islice
+import operator
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import CONF_LIMIT
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_register_admin_service
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_FULLNAME,
+    CONF_FULLNAMES,
+    DOMAIN,
+    SERVICE_DUMP_DIAGNOSTICS,
+    SERVICE_FIND_COMMON_WORKDAYS,
+    SERVICE_PROFILE,
+    SERVICE_SEARCH_EVENTS,
+)
+from .coordinator import CalendarCoordinator, UserCalendar
+from .diagnostics import async_dump_diagnostics
+from .profiler import async_start_profiler
+from .skyline.calendar_api import CalendarEntry, CalendarEntryType
+from .skyline.workdays import (
+    DAY_OFF_CATEGORIES,
+    at_least,
+    full_mask,
+    iter_days,
+    period_mask,
+)
+
+ATTR_REFRESHES = "refreshes"
+ATTR_DOWNLOAD = "download"
+ATTR_QUERY = "query"
+ATTR_CATEGORIES = "categories"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_MIN_AVAILABLE = "min_available"
+ATTR_AVOID_CATEGORIES = "avoid_categories"
+
+# Longest range the common workdays can be searched in.
+MAX_WORKDAY_RANGE_DAYS = 3660
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_REFRESHES, default=1): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+        vol.Optional(ATTR_DOWNLOAD, default=True): bool,
+    }
+)
+
+SEARCH_EVENTS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_QUERY): cv.string,
+        vol.Optional(CONF_FULLNAME): cv.string,
+        vol.Optional(ATTR_CATEGORIES): vol.All(
+            cv.ensure_list, [vol.In([category.name for category in CalendarEntryType])]
+        ),
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(CONF_LIMIT, default=20): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=1000)
+        ),
+    }
+)
+
+FIND_COMMON_WORKDAYS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_FULLNAMES): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_START): cv.date,
+        vol.Required(ATTR_END): cv.date,
+        vol.Optional(ATTR_MIN_AVAILABLE): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_AVOID_CATEGORIES, default=[]): vol.All(
+            cv.ensure_list, [vol.In([category.name for category in CalendarEntryType])]
+        ),
+    }
+)
+
+
+def _as_local(value: datetime | None) -> datetime | None:
+    """Return the moment in the local time zone, naive moments are local already."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=dt_util.get_default_time_zone())
+    return dt_util.as_local(value)
+
+
+def _common_workdays(
+    users: dict[str, UserCalendar],
+    first: date,
+    days: int,
+    tz: tzinfo,
+    min_available: int,
+    avoid: tuple[CalendarEntryType, ...],
+) -> list[dict[str, Any]]:
+    """Return the days on which at least min_available of the users are working.
+
+    Runs in the executor. A day is a workday for a user when none of their
+    absences, public holidays and weekends overlap it. Days on which any of
+    the users has an entry of the avoided categories are left out.
+    """
+    start = datetime.combine(first, time.min, tz)
+    end = datetime.combine(first + timedelta(days=days), time.min, tz)
+    workdays: dict[str, int] = {}
+    avoided = 0
+    for name, user in users.items():
+        days_off = user.get_transitions(DAY_OFF_CATEGORIES).periods_between(start, end)
+        workdays[name] = full_mask(days) & ~period_mask(days_off, first, days, tz)
+        if avoid:
+            periods = user.get_transitions(avoid).periods_between(start, end)
+            avoided |= period_mask(periods, first, days, tz)
+
+    if min_available == len(workdays):
+        common = functools.reduce(operator.and_, workdays.values())
+    else:
+        common = at_least(workdays.values(), min_available, days)
+    common &= ~avoided
+    return [
+        {
+            "date": day.isoformat(),
+            "working": [
+                name
+                for name, mask in workdays.items()
+                if mask >> (day - first).days & 1
+            ],
+        }
+        for day in iter_days(common, first)
+    ]
+
+
+@callback
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile the next refreshes of all config entries."""
+        coordinators = list(hass.data.get(DOMAIN, {}).values())
+        async_start_profiler(hass, coordinators, call.data[ATTR_REFRESHES])
+        if call.data[ATTR_DOWNLOAD]:
+            # Download the calendars right away instead of at the next poll.
+            for coordinator in coordinators:
+                hass.async_create_task(coordinator.async_refresh())
+
+    async def async_dump(call: ServiceCall) -> None:
+        """Write all entries of all config entries to a file."""
+        await async_dump_diagnostics(hass)
+
+    async def async_search_events(call: ServiceCall) -> ServiceResponse:
+        """Search the retained entries of all users by words in their text."""
+        fullname = call.data.get(CONF_FULLNAME)
+        categories = (
+            [CalendarEntryType[name] for name in call.data[ATTR_CATEGORIES]]
+            if ATTR_CATEGORIES in call.data
+            else None
+        )
+        start = _as_local(call.data.get(ATTR_START))
+        end = _as_local(call.data.get(ATTR_END))
+        query = call.data[ATTR_QUERY]
+        limit = call.data[CONF_LIMIT]
+
+        results: list[list[CalendarEntry]] = []
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            if not isinstance(coordinator, CalendarCoordinator):
+                continue
+            if fullname is not None and fullname not in coordinator.users:
+                continue
+            # Compacted entries are only counted per month, their text is gone.
+            if start is not None and start < (retained := coordinator.retained_from()):
+                raise ServiceValidationError(
+                    f"Only entries that end after {retained.date().isoformat()} can be"
+                    f" searched, increase the retention of {coordinator.name} to search"
+                    " further back"
+                )
+            for name, user in coordinator.users.items():
+                if fullname is not None and name != fullname:
+                    continue
+                index = user.snapshot.index
+                with coordinator.loop_budget.measure(
+                    "search_events", name, len(index)
+                ):
+                    results.append(index.search(query, categories, start, end, limit))
+
+        entries = heapq.merge(*results, key=lambda entry: entry.event_date)
+        return {"events": [entry.as_dict() for entry in islice(entries, limit)]}
+
+    async def async_find_common_workdays(call: ServiceCall) -> ServiceResponse:
+        """Find the days on which the users, or enough of them, are working."""
+        users: dict[str, UserCalendar] = {}
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            if isinstance(coordinator, CalendarCoordinator):
+                users.update(coordinator.users)
+        if CONF_FULLNAMES in call.data:
+            if unknown := set(call.data[CONF_FULLNAMES]) - users.keys():
+                raise ServiceValidationError(
+                    f"Users {', '.join(sorted(unknown))} are not tracked"
+                )
+            users = {name: users[name] for name in call.data[CONF_FULLNAMES]}
+        if not users:
+            raise ServiceValidationError("No users are tracked")
+
+        first: date = call.data[ATTR_START]
+        days = (call.data[ATTR_END] - first).days + 1
+        if not 0 < days <= MAX_WORKDAY_RANGE_DAYS:
+            raise ServiceValidationError(
+                f"The end must be after the start and at most"
+                f" {MAX_WORKDAY_RANGE_DAYS} days later"
+            )
+        min_available = min(call.data.get(ATTR_MIN_AVAILABLE, len(users)), len(users))
+        avoid = tuple(
+            CalendarEntryType[name] for name in call.data[ATTR_AVOID_CATEGORIES]
+        )
+
+        result = await hass.async_add_executor_job(
+            _common_workdays,
+            users,
+            first,
+            days,
+            dt_util.get_default_time_zone(),
+            min_available,
+            avoid,
+        )
+        return {"days": result}
+
+    async_register_admin_service(
+        hass, DOMAIN, SERVICE_PROFILE, async_profile, PROFILE_SCHEMA
+    )
+    async_register_admin_service(hass, DOMAIN, SERVICE_DUMP_DIAGNOSTICS, async_dump)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEARCH_EVENTS,
+        async_search_events,
+        schema=SEARCH_EVENTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_COMMON_WORKDAYS,
+        async_find_common_workdays,
+        schema=FIND_COMMON_WORKDAYS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
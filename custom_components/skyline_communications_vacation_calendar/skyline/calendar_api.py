@@ -1,13 +1,19 @@
-from dataclasses import dataclass  # noqa: D100
+from collections.abc import Iterator  # noqa: D100
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-
-import requests
+import time
+from typing import Any
 
 from homeassistant.core import HomeAssistant
 from homeassistant.util import dt as dt_util
 
-from ..const import DOMAIN_METRICS_URL
+from ..const import CONF_FULLNAME, DOMAIN_METRICS_URL
+from .json_stream import iter_json_array
+from .transport import RequestsTransport, Transport
+
+# Size of the decoded chunks read from the (possibly compressed) response stream.
+RESPONSE_CHUNK_SIZE = 64 * 1024
 
 
 class CalendarEntryType(Enum):
@@ -74,23 +80,87 @@ class CalendarEntry:
     description: str
     original_event_date: datetime
     originale_end_date: datetime
+    # Ids of the entries this one was coalesced from, empty when not coalesced.
+    merged_ids: tuple[str, ...] = ()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a json serializable representation, as actions and diagnostics show it."""
+        return {
+            "uid": self.id,
+            CONF_FULLNAME: self.name,
+            "category": self.category.name,
+            "start": self.event_date.isoformat(),
+            "end": self.end_date.isoformat(),
+            "description": self.description,
+            "merged_ids": list(self.merged_ids),
+        }
+
+
+@dataclass
+class FetchMetrics:
+    """Transfer metrics of the last calendar download."""
+
+    content_encoding: str | None
+    wire_bytes: int
+    decoded_bytes: int
+    entry_count: int
+    duration: float
+
+    @property
+    def compression_ratio(self) -> float | None:
+        """Return how many decoded bytes were received per byte on the wire."""
+        if not self.wire_bytes:
+            return None
+        return round(self.decoded_bytes / self.wire_bytes, 2)
+
+
+def _to_datetime(value: str) -> datetime:
+    """Converts a timestamp of the api to a datetime in the default time zone."""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S").replace(
+        tzinfo=dt_util.get_default_time_zone()
+    )
+
+
+def _to_calendar_entry(temp: dict) -> CalendarEntry:
+    """Converts a json object of the api to a CalendarEntry."""
+    return CalendarEntry(
+        id=temp["ID"],
+        name=temp["Name"],
+        category=CalendarEntryType(temp["Category"]),
+        event_date=_to_datetime(temp["EventDate"]),
+        end_date=_to_datetime(temp["EndDate"]),
+        description=temp["Description"],
+        original_event_date=_to_datetime(temp["OriginalEventDate"]),
+        originale_end_date=_to_datetime(temp["OriginalEndDate"]),
+    )
 
 
 class CalendarHelper:
     """Wrapper around the calendar api."""
 
-    def __init__(self, api_key: str = "") -> None:
-        """Initialize."""
+    def __init__(
+        self,
+        api_key: str = "",
+        host: str | None = None,
+        transport: Transport | None = None,
+    ) -> None:
+        """Initialize.
+
+        The host defaults to the production api, the transport to https with requests.
+        """
 
         self.api_key = api_key
+        self.host = host or DOMAIN_METRICS_URL
+        self.transport = transport or RequestsTransport()
+        self.last_fetch_metrics: FetchMetrics | None = None
 
     def authenticate(self) -> None:
         """Validate if the given api key is valid."""
 
-        url = DOMAIN_METRICS_URL + "/api/custom/calendar/ping"
+        url = self.host + "/api/custom/calendar/ping"
         headers = {"Authorization": "Bearer " + self.api_key}
-        response = requests.get(url=url, verify=True, headers=headers)
-        data = response.text
+        with self.transport.get(url, headers) as response:
+            data = response.text
         if data != "pong":
             raise CalendarException("Could not authenticate")
 
@@ -99,50 +169,90 @@ class CalendarHelper:
 
         return await hass.async_add_executor_job(self.authenticate)
 
-    def get_entries(self, fullname: str, element_id: str) -> list[CalendarEntry]:
-        """Get the entries for a given user."""
+    def iter_entries(
+        self, fullname: str, element_id: str, retain_after: datetime | None = None
+    ) -> Iterator[CalendarEntry]:
+        """Yield the entries for a given user while they are being received.
+
+        Entries that ended before retain_after are dropped without being kept.
+        """
 
         url = (
-            DOMAIN_METRICS_URL
+            self.host
             + f"/api/custom/calendar?elementId={element_id}&fullname={fullname}"
         )
+        return self._iter_entries(url, retain_after)
+
+    def iter_roster_entries(
+        self, element_id: str, retain_after: datetime | None = None
+    ) -> Iterator[CalendarEntry]:
+        """Yield the entries of all users of an element while they are being received."""
+
+        url = self.host + f"/api/custom/calendar?elementId={element_id}"
+        return self._iter_entries(url, retain_after)
+
+    def _iter_entries(
+        self, url: str, retain_after: datetime | None
+    ) -> Iterator[CalendarEntry]:
+        """Stream and decode the entries returned by a calendar url."""
+
         headers = {"Authorization": "Bearer " + self.api_key}
-        response = requests.get(url=url, verify=True, headers=headers)
-
-        entries: list[CalendarEntry] = []
-        jsonResponse = response.json()
-        if response.status_code >= 400:
-            raise CalendarException(jsonResponse["errors"][0]["detail"])
-
-        for temp in jsonResponse:
-            entry = CalendarEntry(
-                id=temp["ID"],
-                name=temp["Name"],
-                category=CalendarEntryType(temp["Category"]),
-                event_date=datetime.strptime(
-                    temp["EventDate"], "%Y-%m-%dT%H:%M:%S"
-                ).replace(tzinfo=dt_util.get_default_time_zone()),
-                end_date=datetime.strptime(
-                    temp["EndDate"], "%Y-%m-%dT%H:%M:%S"
-                ).replace(tzinfo=dt_util.get_default_time_zone()),
-                description=temp["Description"],
-                original_event_date=datetime.strptime(
-                    temp["OriginalEventDate"], "%Y-%m-%dT%H:%M:%S"
-                ).replace(tzinfo=dt_util.get_default_time_zone()),
-                originale_end_date=datetime.strptime(
-                    temp["OriginalEndDate"], "%Y-%m-%dT%H:%M:%S"
-                ).replace(tzinfo=dt_util.get_default_time_zone()),
-            )
-            entries.append(entry)
-
-        return entries
+        started = time.monotonic()
+        decoded_bytes = 0
+        entry_count = 0
+
+        def decoded_chunks() -> Iterator[bytes]:
+            nonlocal decoded_bytes
+            for chunk in response.iter_content(RESPONSE_CHUNK_SIZE):
+                decoded_bytes += len(chunk)
+                yield chunk
+
+        # A download that fails before a response has no metrics.
+        self.last_fetch_metrics = None
+        with self.transport.get(url, headers) as response:
+            try:
+                if response.status_code >= 400:
+                    jsonResponse = response.json()
+                    raise CalendarException(jsonResponse["errors"][0]["detail"])
+
+                # Decode the entries one by one while the (decompressed) chunks
+                # arrive, so the complete payload is never held in memory.
+                for temp in iter_json_array(decoded_chunks()):
+                    entry = _to_calendar_entry(temp)
+                    if retain_after is not None and entry.end_date < retain_after:
+                        continue
+                    entry_count += 1
+                    yield entry
+            finally:
+                # Also when the download fails or stops early, so the metrics
+                # never describe an earlier one.
+                self.last_fetch_metrics = FetchMetrics(
+                    content_encoding=response.content_encoding,
+                    wire_bytes=response.wire_bytes(),
+                    decoded_bytes=decoded_bytes,
+                    entry_count=entry_count,
+                    duration=time.monotonic() - started,
+                )
+
+    def get_entries(
+        self, fullname: str, element_id: str, retain_after: datetime | None = None
+    ) -> list[CalendarEntry]:
+        """Get the entries for a given user."""
+
+        return list(self.iter_entries(fullname, element_id, retain_after))
 
     async def get_entries_async(
-        self, hass: HomeAssistant, fullname: str, element_id: str
+        self,
+        hass: HomeAssistant,
+        fullname: str,
+        element_id: str,
+        retain_after: datetime | None = None,
     ) -> list[CalendarEntry]:
         """Get the entries for a given user async."""
 
-        return await hass.async_add_executor_job(self.get_entries, fullname, element_id)
+        return await hass.async_add_executor_job(
+            self.get_entries, fullname, element_id, retain_after
+        )
 
 
 class CalendarException(Exception):
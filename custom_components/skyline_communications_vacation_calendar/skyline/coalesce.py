@@ -0,0 +1,59 @@
+"""Merging of overlapping and back-to-back calendar entries into spans."""
+
+from collections.abc import Iterable
+from dataclasses import replace
+from datetime import timedelta
+
+from .calendar_api import CalendarEntry
+
+# End dates are the last second an entry covers, the next entry may start after it.
+ADJACENT = timedelta(seconds=1)
+
+
+def coalesce_entries(entries: Iterable[CalendarEntry]) -> list[CalendarEntry]:
+    """Merge the overlapping and adjacent entries of the same user and category.
+
+    A merged entry keeps the id of its first entry and lists the ids of all of
+    them in merged_ids. The entries are sorted once, so this is O(n log n).
+    """
+    ordered = sorted(
+        entries, key=lambda e: (e.name, e.category.value, e.event_date, e.end_date)
+    )
+    result: list[CalendarEntry] = []
+    # Entries merged into the last entry of the result.
+    group: list[CalendarEntry] = []
+
+    def flush() -> None:
+        if len(group) == 1:
+            result.append(group[0])
+        elif group:
+            first = group[0]
+            end = max(entry.end_date for entry in group)
+            descriptions = dict.fromkeys(entry.description for entry in group)
+            result.append(
+                replace(
+                    first,
+                    end_date=end,
+                    originale_end_date=end,
+                    description="; ".join(descriptions),
+                    merged_ids=tuple(entry.id for entry in group),
+                )
+            )
+        group.clear()
+
+    end = None
+    for entry in ordered:
+        if (
+            group
+            and entry.name == group[0].name
+            and entry.category == group[0].category
+            and entry.event_date <= end + ADJACENT
+        ):
+            group.append(entry)
+            end = max(end, entry.end_date)
+            continue
+        flush()
+        group.append(entry)
+        end = entry.end_date
+    flush()
+    return result
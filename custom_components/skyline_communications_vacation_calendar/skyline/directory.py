@@ -0,0 +1,50 @@
+"""Prefix index over the names of the users of an element."""
+
+from bisect import bisect_left
+from collections.abc import Iterable
+
+from .search import tokenize
+
+
+class UserDirectory:
+    """Names of users, searchable by the start of any of their words.
+
+    Every word of every name is kept in a sorted list, so the names matching a
+    prefix are found with a bisect. Matching ignores case and accents.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        """Initialize."""
+        self._exact = frozenset(names)
+        self.names = sorted(self._exact, key=str.casefold)
+        self._words = sorted(
+            (word, index)
+            for index, name in enumerate(self.names)
+            for word in tokenize(name)
+        )
+
+    def __len__(self) -> int:
+        """Return the number of names."""
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        """Return whether the name is in the directory, exactly."""
+        return name in self._exact
+
+    def _matching(self, word: str) -> set[int]:
+        position = bisect_left(self._words, (word,))
+        matches = set()
+        while position < len(self._words) and self._words[position][0].startswith(
+            word
+        ):
+            matches.add(self._words[position][1])
+            position += 1
+        return matches
+
+    def search(self, query: str, limit: int | None = None) -> list[str]:
+        """Return the names that have a word starting with every word of the query."""
+        words = tokenize(query)
+        if not words:
+            return self.names[:limit]
+        matches = set.intersection(*(self._matching(word) for word in words))
+        return [self.names[index] for index in sorted(matches)][:limit]
@@ -0,0 +1,117 @@
+"""Cache of the compacted entries of a user, downloaded again a month at a time."""
+
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Iterator
+from datetime import datetime, tzinfo
+
+from .calendar_api import CalendarEntry, CalendarEntryType
+
+# Number of months of compacted entries kept per user.
+HISTORY_CACHE_MONTHS = 24
+
+
+def month_start(moment: datetime, tz: tzinfo) -> datetime:
+    """Return the start of the month of the moment in the time zone."""
+    return moment.astimezone(tz).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def next_month(month: datetime) -> datetime:
+    """Return the start of the month after the given start of a month."""
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def iter_months(start: datetime, end: datetime, tz: tzinfo) -> Iterator[datetime]:
+    """Yield the start of every month that overlaps the range."""
+    month = month_start(start, tz)
+    while month <= end:
+        yield month
+        month = next_month(month)
+
+
+class HistoryCache:
+    """Entries of all categories of a user, per month of their start.
+
+    The calendar api cannot be asked for a range, every missing month costs a
+    download of the whole calendar of the user. Compacted entries do not change
+    any more, so a month before the retention window whose entries all ended
+    before it stays valid for good. Other months may still change and are only
+    valid for the key they were downloaded for. At most max_months are kept,
+    the least recently used ones are dropped first.
+    """
+
+    def __init__(self, tz: tzinfo, max_months: int = HISTORY_CACHE_MONTHS) -> None:
+        """Initialize."""
+        self.tz = tz
+        self.max_months = max_months
+        self._months: OrderedDict[datetime, list[CalendarEntry]] = OrderedDict()
+        # Months that can still change, with the key they were downloaded for.
+        self._open: dict[datetime, Hashable] = {}
+
+    def __len__(self) -> int:
+        """Return the number of cached months."""
+        return len(self._months)
+
+    def missing(self, key: Hashable, start: datetime, end: datetime) -> list[datetime]:
+        """Return the months of the range that have to be downloaded for the key."""
+        return [
+            month
+            for month in iter_months(start, end, self.tz)
+            if month not in self._months or self._open.get(month, key) != key
+        ]
+
+    def fill(
+        self,
+        key: Hashable,
+        months: list[datetime],
+        entries: Iterable[CalendarEntry],
+        retained_from: datetime,
+    ) -> None:
+        """Store all downloaded entries that start within the months."""
+        filled: dict[datetime, list[CalendarEntry]] = {month: [] for month in months}
+        for entry in entries:
+            month = month_start(entry.event_date, self.tz)
+            if month in filled:
+                filled[month].append(entry)
+        for month, month_entries in filled.items():
+            if next_month(month) <= retained_from and all(
+                entry.end_date < retained_from for entry in month_entries
+            ):
+                self._open.pop(month, None)
+            else:
+                self._open[month] = key
+        self._months.update(filled)
+
+    def entries_between(
+        self,
+        start: datetime,
+        end: datetime,
+        categories: Iterable[CalendarEntryType],
+        retained_from: datetime,
+    ) -> list[CalendarEntry]:
+        """Return the cached entries of the given categories that start within the range.
+
+        Only entries that ended before retained_from are returned, the store
+        holds the others. Months beyond max_months are only dropped afterwards, so a range that is
+        longer than that still gets all of its entries once.
+        """
+        categories = set(categories)
+        result: list[CalendarEntry] = []
+        for month in iter_months(start, end, self.tz):
+            if (entries := self._months.get(month)) is None:
+                continue
+            self._months.move_to_end(month)
+            result.extend(
+                entry
+                for entry in entries
+                if entry.category in categories
+                and start <= entry.event_date <= end
+                and entry.end_date < retained_from
+            )
+        while len(self._months) > self.max_months:
+            month, _ = self._months.popitem(last=False)
+            self._open.pop(month, None)
+        return result
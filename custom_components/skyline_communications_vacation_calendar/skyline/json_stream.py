@@ -0,0 +1,79 @@
+"""Incremental decoding of json arrays received in chunks."""
+
+from collections.abc import Iterable, Iterator
+import codecs
+import json
+from typing import Any
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Yield the items of a top level json array as soon as they are complete.
+
+    At most one chunk and the item that is currently being decoded are buffered,
+    so the memory used does not depend on the length of the array.
+    """
+
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunk_iterator = iter(chunks)
+    buffer = ""
+    pos = 0
+    eof = False
+    opened = False
+
+    def read_more() -> bool:
+        """Append the next chunk to the unprocessed part of the buffer."""
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = next(chunk_iterator, None)
+        if chunk is None:
+            eof = True
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            if read_more():
+                continue
+            raise ValueError("Unexpected end of json array")
+
+        char = buffer[pos]
+        if not opened:
+            if char != "[":
+                raise ValueError(f"Expected a json array, got {char!r}")
+            opened = True
+            pos += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            pos += 1
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if read_more():
+                continue
+            raise
+        if (
+            not eof
+            and not isinstance(item, (dict, list, str))
+            and (end == len(buffer) or buffer[end] not in _DELIMITERS)
+        ):
+            # A number or literal that is not followed by a delimiter yet might
+            # continue in the next chunk.
+            read_more()
+            continue
+
+        yield item
+        pos = end
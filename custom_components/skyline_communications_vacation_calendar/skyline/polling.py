@@ -0,0 +1,74 @@
+"""Adaptive download interval based on the time of day and how often data changes."""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from .calendar_api import CalendarEntryType
+from .recurrence import PERIODIC_CATEGORIES
+
+# Local hours during which calendars are most likely to be edited.
+WORKING_HOURS = range(8, 18)
+# Local hours during which calendars are hardly ever edited.
+NIGHT_HOURS = (*range(22, 24), *range(0, 6))
+# Downloads are done at the floor interval this long before an entry starts.
+UPCOMING_WINDOW = timedelta(hours=1)
+# Unchanged downloads at most double the interval this many times.
+MAX_BACKOFF_STEPS = 4
+# Categories whose entries are edited by people, so downloads speed up before they
+# start. Weekends and public holidays are known long in advance.
+UPCOMING_CATEGORIES = tuple(
+    category
+    for category in CalendarEntryType
+    if category not in (*PERIODIC_CATEGORIES, CalendarEntryType.Public_Holiday)
+)
+
+
+@dataclass
+class PollingPolicy:
+    """Chooses the interval until the next download.
+
+    Downloads are done at the floor interval during working hours and shortly
+    before an entry of UPCOMING_CATEGORIES starts, every base interval in the
+    evening and at the ceiling interval at night and in the weekend. Every
+    consecutive download that changed nothing doubles the interval, up to the
+    ceiling, so the load on the api follows how often the calendars actually
+    change.
+    """
+
+    floor: timedelta
+    base: timedelta
+    ceiling: timedelta
+    unchanged: int = 0
+
+    def record(self, changed: bool) -> None:
+        """Record whether the last download changed the data."""
+        self.unchanged = 0 if changed else self.unchanged + 1
+
+    def interval(self, now: datetime, upcoming: datetime | None) -> timedelta:
+        """Return the interval until the next download.
+
+        now is the local time, upcoming the start of the first entry of
+        UPCOMING_CATEGORIES after it.
+        """
+        if upcoming is not None and upcoming - now <= UPCOMING_WINDOW:
+            return self.floor
+        if now.weekday() >= 5 or now.hour in NIGHT_HOURS:
+            interval = self.ceiling
+        elif now.hour in WORKING_HOURS:
+            interval = self.floor
+        else:
+            interval = self.base
+        interval *= 2 ** min(self.unchanged, MAX_BACKOFF_STEPS)
+        if upcoming is not None:
+            # Wake up in time to be at the floor interval before the entry starts.
+            interval = min(interval, max(upcoming - now - UPCOMING_WINDOW, self.floor))
+        return max(self.floor, min(interval, self.ceiling))
+
+    def as_dict(self) -> dict[str, float | int]:
+        """Return a json serializable representation of the policy."""
+        return {
+            "floor_seconds": self.floor.total_seconds(),
+            "base_seconds": self.base.total_seconds(),
+            "ceiling_seconds": self.ceiling.total_seconds(),
+            "unchanged_downloads": self.unchanged,
+        }
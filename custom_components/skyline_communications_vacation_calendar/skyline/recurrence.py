@@ -0,0 +1,187 @@
+"""Compact representation of strictly periodic calendar entries."""
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, tzinfo
+from typing import Any
+
+from .calendar_api import CalendarEntry, CalendarEntryType
+
+# Categories of which the api returns every occurrence as a separate entry.
+PERIODIC_CATEGORIES = (CalendarEntryType.Weekend,)
+
+# A series needs at least this many occurrences before it is stored as a rule.
+MIN_OCCURRENCES = 4
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """A strictly periodic series of calendar entries with optional exceptions.
+
+    All arithmetic is done on the local wall clock (naive datetimes) so the start
+    and end times stay the same across daylight saving time transitions.
+    """
+
+    category: CalendarEntryType
+    name: str
+    description: str
+    first_start: datetime
+    duration: timedelta
+    interval: timedelta
+    count: int
+    exceptions: frozenset[int]
+    tz: tzinfo
+
+    @property
+    def last_end(self) -> datetime:
+        """Return the end of the last occurrence of the series."""
+        return self._occurrence(self.count - 1).end_date
+
+    def _to_wall_clock(self, moment: datetime) -> datetime:
+        return moment.astimezone(self.tz).replace(tzinfo=None)
+
+    def _occurrence(self, index: int) -> CalendarEntry:
+        start = self.first_start + index * self.interval
+        event_date = start.replace(tzinfo=self.tz)
+        end_date = (start + self.duration).replace(tzinfo=self.tz)
+        return CalendarEntry(
+            id=f"{self.category.name}-{self.name}-{start.isoformat()}",
+            name=self.name,
+            category=self.category,
+            event_date=event_date,
+            end_date=end_date,
+            description=self.description,
+            original_event_date=event_date,
+            originale_end_date=end_date,
+        )
+
+    def _is_occurrence(self, index: int) -> bool:
+        return 0 <= index < self.count and index not in self.exceptions
+
+    def occurrences(self) -> Iterator[CalendarEntry]:
+        """Yield all occurrences of the series."""
+        for index in range(self.count):
+            if index not in self.exceptions:
+                yield self._occurrence(index)
+
+    def occurrences_between(
+        self, start: datetime, end: datetime
+    ) -> Iterator[CalendarEntry]:
+        """Yield the occurrences that start within the given range."""
+        first = -((self.first_start - self._to_wall_clock(start)) // self.interval)
+        last = (self._to_wall_clock(end) - self.first_start) // self.interval
+        for index in range(max(first, 0), min(last, self.count - 1) + 1):
+            if index not in self.exceptions:
+                yield self._occurrence(index)
+
+    def occurrence_at(self, moment: datetime) -> CalendarEntry | None:
+        """Return the occurrence that is ongoing at the given moment."""
+        index = (self._to_wall_clock(moment) - self.first_start) // self.interval
+        if not self._is_occurrence(index):
+            return None
+        occurrence = self._occurrence(index)
+        if occurrence.event_date <= moment <= occurrence.end_date:
+            return occurrence
+        return None
+
+    def occurrences_after(self, moment: datetime) -> Iterator[CalendarEntry]:
+        """Yield the occurrences that start after the given moment."""
+        index = (self._to_wall_clock(moment) - self.first_start) // self.interval + 1
+        for index in range(max(index, 0), self.count):
+            if index not in self.exceptions:
+                yield self._occurrence(index)
+
+    def next_occurrence(self, moment: datetime) -> CalendarEntry | None:
+        """Return the first occurrence that starts after the given moment."""
+        return next(self.occurrences_after(moment), None)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a json serializable representation of the rule."""
+        return {
+            "category": self.category.name,
+            "name": self.name,
+            "description": self.description,
+            "first_start": self.first_start.isoformat(),
+            "duration": str(self.duration),
+            "interval": str(self.interval),
+            "count": self.count,
+            "exceptions": sorted(self.exceptions),
+        }
+
+
+def _to_rule(entries: list[CalendarEntry]) -> RecurrenceRule | None:
+    """Create a rule from entries with the same category, text, time and length."""
+    tz = entries[0].event_date.tzinfo
+    starts = sorted({entry.event_date.replace(tzinfo=None) for entry in entries})
+    if len(starts) != len(entries) or len(starts) < MIN_OCCURRENCES:
+        return None
+
+    first = entries[0]
+    duration = first.end_date.replace(tzinfo=None) - first.event_date.replace(
+        tzinfo=None
+    )
+    interval = min(b - a for a, b in zip(starts, starts[1:], strict=False))
+    if interval < duration or interval.total_seconds() <= 0:
+        return None
+
+    indexes = set()
+    for start in starts:
+        index, remainder = divmod(start - starts[0], interval)
+        if remainder:
+            return None
+        indexes.add(index)
+
+    count = max(indexes) + 1
+    exceptions = frozenset(range(count)) - indexes
+    # Only worth it when the series is mostly regular.
+    if len(exceptions) > len(indexes):
+        return None
+
+    return RecurrenceRule(
+        category=first.category,
+        name=first.name,
+        description=first.description,
+        first_start=starts[0],
+        duration=duration,
+        interval=interval,
+        count=count,
+        exceptions=exceptions,
+        tz=tz,
+    )
+
+
+def extract_recurrences(
+    entries: Iterable[CalendarEntry],
+    categories: Iterable[CalendarEntryType] = PERIODIC_CATEGORIES,
+) -> tuple[list[CalendarEntry], list[RecurrenceRule]]:
+    """Split the entries in regular entries and recurrence rules.
+
+    Entries of the given categories that cannot be described by a rule are
+    returned as regular entries.
+    """
+
+    periodic = set(categories)
+    remaining: list[CalendarEntry] = []
+    groups: dict[tuple, list[CalendarEntry]] = {}
+
+    for entry in entries:
+        if entry.category not in periodic:
+            remaining.append(entry)
+            continue
+        key = (
+            entry.category,
+            entry.name,
+            entry.description,
+            entry.event_date.time(),
+            entry.end_date.replace(tzinfo=None) - entry.event_date.replace(tzinfo=None),
+        )
+        groups.setdefault(key, []).append(entry)
+
+    rules: list[RecurrenceRule] = []
+    for group in groups.values():
+        if (rule := _to_rule(group)) is not None:
+            rules.append(rule)
+        else:
+            remaining.extend(group)
+
+    return remaining, rules
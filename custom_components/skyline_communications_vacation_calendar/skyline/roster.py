@@ -0,0 +1,130 @@
+"""Columnar storage of the calendar entries of all users of an element."""
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time, timedelta, tzinfo
+from itertools import compress
+
+from .calendar_api import CalendarEntry, CalendarEntryType
+
+
+class RosterTable:
+    """Calendar entries of many users stored as parallel arrays.
+
+    Every entry only takes a user index, a category code and a start and end
+    timestamp, so lookups over hundreds of users are a single pass over the
+    arrays instead of one scan per user.
+    """
+
+    def __init__(self, entries: Iterable[CalendarEntry]) -> None:
+        """Initialize."""
+        self.users: list[str] = []
+        self._user_indexes: dict[str, int] = {}
+        self.user_column = array("I")
+        self.category_column = array("B")
+        self.start_column = array("q")
+        self.end_column = array("q")
+
+        for entry in entries:
+            if (user_index := self._user_indexes.get(entry.name)) is None:
+                user_index = self._user_indexes[entry.name] = len(self.users)
+                self.users.append(entry.name)
+            self.user_column.append(user_index)
+            self.category_column.append(entry.category.value)
+            self.start_column.append(int(entry.event_date.timestamp()))
+            self.end_column.append(int(entry.end_date.timestamp()))
+
+        # Moments at which an entry starts or stops being ongoing, sorted.
+        self.change_column = array(
+            "q", sorted({*self.start_column, *(end + 1 for end in self.end_column)})
+        )
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self.user_column)
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether both tables hold the same entries."""
+        if not isinstance(other, RosterTable):
+            return NotImplemented
+        return (
+            self.users == other.users
+            and self.user_column == other.user_column
+            and self.category_column == other.category_column
+            and self.start_column == other.start_column
+            and self.end_column == other.end_column
+        )
+
+    def iter_rows(self) -> Iterator[tuple[str, CalendarEntryType, int, int]]:
+        """Yield the user, category, start and end timestamp of every entry."""
+        for user, category, start, end in zip(
+            self.user_column,
+            self.category_column,
+            self.start_column,
+            self.end_column,
+            strict=True,
+        ):
+            yield self.users[user], CalendarEntryType(category), start, end
+
+    def next_change(self, moment: datetime, tz: tzinfo) -> datetime | None:
+        """Return the first moment after the given one at which users_at can change."""
+        index = bisect_right(self.change_column, int(moment.timestamp()))
+        if index == len(self.change_column):
+            return None
+        return datetime.fromtimestamp(self.change_column[index], tz)
+
+    def next_change_of(
+        self, moment: datetime, categories: Iterable[CalendarEntryType], tz: tzinfo
+    ) -> datetime | None:
+        """Return the next moment at which an entry of the categories starts or ends."""
+        after = int(moment.timestamp())
+        codes = {category.value for category in categories}
+        rows = zip(
+            self.category_column, self.start_column, self.end_column, strict=True
+        )
+        change = min(
+            (
+                change
+                for category, start, end in rows
+                if category in codes
+                for change in (start, end + 1)
+                if change > after
+            ),
+            default=None,
+        )
+        return None if change is None else datetime.fromtimestamp(change, tz)
+
+    def _mask(
+        self, start: int, end: int, categories: Iterable[CalendarEntryType]
+    ) -> list[bool]:
+        """Return which entries of the categories overlap the [start, end] range."""
+        codes = {category.value for category in categories}
+        return [
+            category in codes and entry_start <= end and start <= entry_end
+            for category, entry_start, entry_end in zip(
+                self.category_column, self.start_column, self.end_column, strict=True
+            )
+        ]
+
+    def _user_names(self, mask: list[bool]) -> list[str]:
+        indexes = set(compress(self.user_column, mask))
+        return sorted(self.users[index] for index in indexes)
+
+    def users_at(
+        self, moment: datetime, categories: Iterable[CalendarEntryType]
+    ) -> list[str]:
+        """Return the users with an entry of the categories ongoing at the moment."""
+        timestamp = int(moment.timestamp())
+        return self._user_names(self._mask(timestamp, timestamp, categories))
+
+    def users_on(
+        self, day: date, categories: Iterable[CalendarEntryType], tz: tzinfo
+    ) -> list[str]:
+        """Return the users with an entry of the categories during the day."""
+        start = datetime.combine(day, time.min, tz)
+        end = datetime.combine(day + timedelta(days=1), time.min, tz)
+        # Entries touching the day only at midnight do not cover it.
+        return self._user_names(
+            self._mask(int(start.timestamp()) + 1, int(end.timestamp()) - 1, categories)
+        )
@@ -0,0 +1,170 @@
+"""Inverted index for full text search over calendar entries."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+import heapq
+from itertools import islice
+import re
+import unicodedata
+
+from .calendar_api import CalendarEntry, CalendarEntryType
+from .recurrence import RecurrenceRule
+
+_WORD = re.compile(r"\w+")
+# Sorts after every word that starts with the same prefix.
+_LAST_CHARACTER = chr(0x10FFFF)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a text in case and accent insensitive words."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _WORD.findall(stripped)
+
+
+def _entry_tokens(name: str, description: str) -> set[str]:
+    return {*tokenize(name), *tokenize(description)}
+
+
+def _contains(positions: array, position: int) -> bool:
+    index = bisect_left(positions, position)
+    return index < len(positions) and positions[index] == position
+
+
+def _iter_between(postings: list[array], low: int, high: int) -> Iterator[int]:
+    """Yield the positions within [low, high) of any of the postings, in order.
+
+    The postings are merged lazily, so a query with a limit stops reading them
+    as soon as it has enough entries.
+    """
+    ranges = [
+        map(
+            positions.__getitem__,
+            range(bisect_left(positions, low), bisect_left(positions, high)),
+        )
+        for positions in postings
+    ]
+    previous = None
+    for position in heapq.merge(*ranges):
+        if position != previous:
+            yield position
+            previous = position
+
+
+class SearchIndex:
+    """Token index over the name and description of entries and recurrence rules.
+
+    Every word maps to the positions of the entries containing it, with entries
+    sorted by start date. A query intersects the positions of its words, starting
+    with the rarest one, and narrows them to a date range with bisect. The last
+    word of a query also matches longer words, so it can be used while typing.
+    Their positions are merged lazily instead of being collected and sorted.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[CalendarEntry] = (),
+        recurrences: Iterable[RecurrenceRule] = (),
+    ) -> None:
+        """Initialize."""
+        self._entries = sorted(entries, key=lambda e: e.event_date)
+        self._starts = [entry.event_date for entry in self._entries]
+        postings: dict[str, array] = {}
+        for position, entry in enumerate(self._entries):
+            for token in _entry_tokens(entry.name, entry.description):
+                postings.setdefault(token, array("I")).append(position)
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+        self._rules = list(recurrences)
+        self._rule_tokens = [
+            _entry_tokens(rule.name, rule.description) for rule in self._rules
+        ]
+
+    def __len__(self) -> int:
+        """Return the number of indexed entries."""
+        return len(self._entries)
+
+    def _postings_of(self, token: str, prefix: bool) -> list[array]:
+        """Return the postings of the token, or of every word it is a prefix of."""
+        if not prefix:
+            return [self._postings[token]] if token in self._postings else []
+        index = bisect_left(self._vocabulary, token)
+        end = bisect_left(self._vocabulary, token + _LAST_CHARACTER, index)
+        return [self._postings[word] for word in self._vocabulary[index:end]]
+
+    @staticmethod
+    def _matches(tokens: set[str], words: list[str]) -> bool:
+        *complete, last = words
+        return all(word in tokens for word in complete) and any(
+            token.startswith(last) for token in tokens
+        )
+
+    def _iter_entries(
+        self, words: list[str], start: datetime | None, end: datetime | None
+    ) -> Iterator[CalendarEntry]:
+        postings = [
+            self._postings_of(word, prefix=index == len(words) - 1)
+            for index, word in enumerate(words)
+        ]
+        postings.sort(key=lambda group: sum(map(len, group)))
+        rarest, others = postings[0], postings[1:]
+        low = 0 if start is None else bisect_left(self._starts, start)
+        high = len(self._entries) if end is None else bisect_right(self._starts, end)
+        for position in _iter_between(rarest, low, high):
+            if all(
+                any(_contains(positions, position) for positions in group)
+                for group in others
+            ):
+                yield self._entries[position]
+
+    def _iter_occurrences(
+        self,
+        words: list[str],
+        categories: set[CalendarEntryType] | None,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> Iterator[CalendarEntry]:
+        series = []
+        for rule, tokens in zip(self._rules, self._rule_tokens, strict=True):
+            if categories is not None and rule.category not in categories:
+                continue
+            if not self._matches(tokens, words):
+                continue
+            if start is None and end is None:
+                series.append(rule.occurrences())
+            else:
+                series.append(
+                    rule.occurrences_between(
+                        start or rule.first_start.replace(tzinfo=rule.tz),
+                        end or rule.last_end,
+                    )
+                )
+        return heapq.merge(*series, key=lambda e: e.event_date)
+
+    def search(
+        self,
+        query: str,
+        categories: Iterable[CalendarEntryType] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[CalendarEntry]:
+        """Return the entries containing all words of the query, sorted by start date.
+
+        Only entries of the given categories that start within the range are returned.
+        """
+        if not (words := tokenize(query)):
+            return []
+        wanted = None if categories is None else set(categories)
+        matches = (
+            entry
+            for entry in heapq.merge(
+                self._iter_entries(words, start, end),
+                self._iter_occurrences(words, wanted, start, end),
+                key=lambda e: e.event_date,
+            )
+            if wanted is None or entry.category in wanted
+        )
+        return list(islice(matches, limit))
@@ -0,0 +1,142 @@
+"""Immutable snapshots of the derived calendar data of a user."""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from types import MappingProxyType
+
+from .calendar_api import CalendarEntry, CalendarEntryType
+from .search import SearchIndex
+from .statistics import AbsenceStatistics
+from .store import CalendarStore
+from .transitions import Transitions
+
+# Categories of a lookup, in the order in which ongoing entries are returned.
+LookupKey = tuple[CalendarEntryType, ...]
+
+
+@dataclass(frozen=True)
+class Lookup:
+    """Ongoing and next entry of some categories, valid until either changes."""
+
+    current: tuple[CalendarEntry, ...]
+    next: CalendarEntry | None
+    valid_from: datetime
+    valid_until: datetime | None
+
+    def is_valid(self, moment: datetime) -> bool:
+        """Return whether the lookup still holds at the moment."""
+        return self.valid_from <= moment and (
+            self.valid_until is None or moment < self.valid_until
+        )
+
+
+def build_lookup(
+    store: CalendarStore, moment: datetime, categories: LookupKey
+) -> Lookup:
+    """Look up the ongoing and next entries at the moment."""
+    current = tuple(store.entries_at(moment, categories))
+    upcoming = store.next_entry(moment, categories)
+    # The result changes when an ongoing entry ends or the next one starts.
+    changes = [entry.end_date for entry in current]
+    if upcoming is not None:
+        changes.append(upcoming.event_date)
+    return Lookup(current, upcoming, moment, min(changes, default=None))
+
+
+@dataclass(frozen=True)
+class CalendarSnapshot:
+    """Everything the entities of a user read, replaced as a whole on every change.
+
+    Snapshots are built in the executor and never mutated afterwards, so the event
+    loop can read them without locking while the next one is being built.
+    """
+
+    store: CalendarStore = field(default_factory=lambda: CalendarStore([]))
+    statistics: AbsenceStatistics = field(default_factory=AbsenceStatistics)
+    # Incremented whenever a download changes the retained entries.
+    generation: int = 0
+    modified: datetime | None = None
+    lookups: Mapping[LookupKey, Lookup] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    index: SearchIndex = field(default_factory=SearchIndex)
+    # Only depend on the retained entries, so they are kept until those change.
+    transitions: Mapping[LookupKey, Transitions] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+
+    def lookup(
+        self, moment: datetime, categories: Iterable[CalendarEntryType]
+    ) -> Lookup:
+        """Return the precomputed lookup, or compute it when missing or expired."""
+        key = tuple(categories)
+        if (lookup := self.lookups.get(key)) is not None and lookup.is_valid(moment):
+            return lookup
+        return build_lookup(self.store, moment, key)
+
+    def is_expired(self, moment: datetime, keys: Iterable[LookupKey]) -> bool:
+        """Return whether any of the lookups is missing or no longer holds."""
+        return any(
+            (lookup := self.lookups.get(key)) is None or not lookup.is_valid(moment)
+            for key in keys
+        )
+
+    def get_transitions(self, categories: Iterable[CalendarEntryType]) -> Transitions:
+        """Return the precomputed transitions, or compute them when missing."""
+        key = tuple(categories)
+        if (transitions := self.transitions.get(key)) is not None:
+            return transitions
+        return Transitions(self.store.iter_entries(key))
+
+    def lacks_transitions(self, keys: Iterable[LookupKey]) -> bool:
+        """Return whether any of the transitions is missing."""
+        return any(key not in self.transitions for key in keys)
+
+    def with_transitions(self, keys: Iterable[LookupKey]) -> "CalendarSnapshot":
+        """Return a copy with the missing transitions computed."""
+        return replace(
+            self,
+            transitions=MappingProxyType(
+                {key: self.get_transitions(key) for key in {*self.transitions, *keys}}
+            ),
+        )
+
+    def with_lookups(
+        self, moment: datetime, keys: Iterable[LookupKey]
+    ) -> "CalendarSnapshot":
+        """Return a copy with the lookups computed at the moment."""
+        return replace(
+            self,
+            lookups=MappingProxyType(
+                {key: build_lookup(self.store, moment, key) for key in keys}
+            ),
+        )
+
+    def updated(
+        self,
+        store: CalendarStore,
+        counted_entries: Iterable[CalendarEntry],
+        moment: datetime,
+        keys: Iterable[LookupKey],
+        transition_keys: Iterable[LookupKey] = (),
+    ) -> "CalendarSnapshot":
+        """Return the snapshot that follows this one after a download."""
+        statistics = self.statistics.copy()
+        statistics.apply(counted_entries)
+        generation, modified = self.generation, self.modified
+        if generation == 0 or store.digest != self.store.digest:
+            generation += 1
+            modified = moment
+        # The index and transitions only change with the retained entries.
+        if generation != self.generation:
+            snapshot = CalendarSnapshot(
+                store,
+                statistics,
+                generation,
+                modified,
+                index=SearchIndex(store.entries, store.recurrences),
+            )
+        else:
+            snapshot = replace(self, store=store, statistics=statistics)
+        return snapshot.with_transitions(transition_keys).with_lookups(moment, keys)
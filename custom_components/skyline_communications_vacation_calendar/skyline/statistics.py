@@ -0,0 +1,85 @@
+"""Incrementally maintained day counts per category."""
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date
+
+from .calendar_api import CalendarEntry, CalendarEntryType
+from .store import iter_entry_days
+
+# Categories for which the number of days is counted.
+STATISTIC_CATEGORIES = (
+    CalendarEntryType.Absent,
+    CalendarEntryType.WfH,
+    CalendarEntryType.Public_Holiday,
+)
+
+
+class AbsenceStatistics:
+    """Number of distinct days per category and month.
+
+    Only the difference with the previously applied entries is processed, so a
+    refresh that changes a single entry only recounts the days of that entry.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._entries: dict[str, CalendarEntry] = {}
+        # How many entries cover a day for a category, a day is counted once.
+        self._day_references: Counter[tuple[CalendarEntryType, date]] = Counter()
+        self._month_days: Counter[tuple[CalendarEntryType, int, int]] = Counter()
+
+    def _add(self, entry: CalendarEntry) -> None:
+        for day in iter_entry_days(entry):
+            key = (entry.category, day)
+            self._day_references[key] += 1
+            if self._day_references[key] == 1:
+                self._month_days[(entry.category, day.year, day.month)] += 1
+
+    def _remove(self, entry: CalendarEntry) -> None:
+        for day in iter_entry_days(entry):
+            key = (entry.category, day)
+            self._day_references[key] -= 1
+            if self._day_references[key] == 0:
+                del self._day_references[key]
+                month = (entry.category, day.year, day.month)
+                self._month_days[month] -= 1
+                if self._month_days[month] == 0:
+                    del self._month_days[month]
+
+    def copy(self) -> "AbsenceStatistics":
+        """Return a copy that can be updated without changing this one."""
+        statistics = AbsenceStatistics()
+        statistics._entries = dict(self._entries)
+        statistics._day_references = self._day_references.copy()
+        statistics._month_days = self._month_days.copy()
+        return statistics
+
+    def apply(self, entries: Iterable[CalendarEntry]) -> bool:
+        """Update the counts to the given entries and return whether they changed."""
+        current = {
+            entry.id: entry
+            for entry in entries
+            if entry.category in STATISTIC_CATEGORIES
+        }
+        changed = False
+        for entry_id, entry in self._entries.items():
+            if current.get(entry_id) != entry:
+                self._remove(entry)
+                changed = True
+        for entry_id, entry in current.items():
+            if self._entries.get(entry_id) != entry:
+                self._add(entry)
+                changed = True
+        self._entries = current
+        return changed
+
+    def days_in_month(self, category: CalendarEntryType, year: int, month: int) -> int:
+        """Return the number of days of the category in the month."""
+        return self._month_days.get((category, year, month), 0)
+
+    def days_in_year(self, category: CalendarEntryType, year: int) -> int:
+        """Return the number of days of the category in the year."""
+        return sum(
+            self.days_in_month(category, year, month) for month in range(1, 13)
+        )
@@ -0,0 +1,246 @@
+"""Indexed storage of calendar entries with compaction of the history."""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+import hashlib
+import heapq
+from itertools import islice
+from typing import Any
+
+from .calendar_api import CalendarEntry, CalendarEntryType
+from .recurrence import RecurrenceRule, extract_recurrences
+
+
+def iter_entry_days(entry: CalendarEntry) -> Iterator[date]:
+    """Yield the calendar days covered by an entry.
+
+    An entry that ends exactly at midnight does not cover the day it ends on.
+    """
+    day = entry.event_date.date()
+    last = entry.end_date.date()
+    if entry.end_date.time() == time(0, 0) and last > day:
+        last -= timedelta(days=1)
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+@dataclass
+class MonthSummary:
+    """Number of entries and days per category for a month of compacted history."""
+
+    year: int
+    month: int
+    counts: dict[CalendarEntryType, int] = field(default_factory=dict)
+    days: dict[CalendarEntryType, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a json serializable representation of the summary."""
+        return {
+            "month": f"{self.year:04d}-{self.month:02d}",
+            "counts": {category.name: count for category, count in self.counts.items()},
+            "days": {category.name: days for category, days in self.days.items()},
+        }
+
+
+class EntryIndex:
+    """Entries sorted by their start date for range lookups with bisect."""
+
+    def __init__(self, entries: Iterable[CalendarEntry]) -> None:
+        """Initialize."""
+        self._entries = sorted(entries, key=lambda e: e.event_date)
+        self._starts = [entry.event_date for entry in self._entries]
+        self._max_duration = max(
+            (entry.end_date - entry.event_date for entry in self._entries),
+            default=timedelta(0),
+        )
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[CalendarEntry]:
+        """Iterate over the entries sorted by start date."""
+        return iter(self._entries)
+
+    def between(self, start: datetime, end: datetime) -> list[CalendarEntry]:
+        """Return the entries that start within the range."""
+        return self._entries[
+            bisect_left(self._starts, start) : bisect_right(self._starts, end)
+        ]
+
+    def at(self, moment: datetime) -> list[CalendarEntry]:
+        """Return the entries that are ongoing at the moment."""
+        # Only entries that started at most the longest duration ago can be ongoing.
+        return [
+            entry
+            for entry in self.between(moment - self._max_duration, moment)
+            if moment <= entry.end_date
+        ]
+
+    def next_after(self, moment: datetime) -> CalendarEntry | None:
+        """Return the first entry that starts after the moment."""
+        index = bisect_right(self._starts, moment)
+        return self._entries[index] if index < len(self._entries) else None
+
+    def iter_after(self, moment: datetime) -> Iterator[CalendarEntry]:
+        """Yield the entries that start after the moment, sorted by start date."""
+        return islice(self._entries, bisect_right(self._starts, moment), None)
+
+
+class CalendarStore:
+    """Calendar entries of a user, kept in detail only within the retention window.
+
+    Entries that ended before retained_from are compacted in monthly summaries,
+    the remaining ones are indexed per category and periodic ones are kept as
+    recurrence rules.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[CalendarEntry],
+        retained_from: datetime | None = None,
+    ) -> None:
+        """Initialize."""
+        self.retained_from = retained_from
+        summaries: dict[tuple[int, int], MonthSummary] = {}
+        hot: list[CalendarEntry] = []
+
+        for entry in entries:
+            if retained_from is None or entry.end_date >= retained_from:
+                hot.append(entry)
+                continue
+            start = entry.event_date
+            summary = summaries.setdefault(
+                (start.year, start.month), MonthSummary(start.year, start.month)
+            )
+            summary.counts[entry.category] = summary.counts.get(entry.category, 0) + 1
+            for day in iter_entry_days(entry):
+                summary = summaries.setdefault(
+                    (day.year, day.month), MonthSummary(day.year, day.month)
+                )
+                summary.days[entry.category] = summary.days.get(entry.category, 0) + 1
+
+        self.summaries = [summaries[key] for key in sorted(summaries)]
+        self.entries, self.recurrences = extract_recurrences(hot)
+        self.size = len(self.entries) + sum(
+            rule.count - len(rule.exceptions) for rule in self.recurrences
+        )
+
+        by_category: dict[CalendarEntryType, list[CalendarEntry]] = {}
+        for entry in self.entries:
+            by_category.setdefault(entry.category, []).append(entry)
+        self.indexes = {
+            category: EntryIndex(category_entries)
+            for category, category_entries in by_category.items()
+        }
+
+        # Changes whenever the retained entries change, compacted history is ignored.
+        digest = hashlib.blake2b(digest_size=16)
+        for item in (*self.entries, *self.recurrences):
+            digest.update(repr(item).encode())
+        self.digest = digest.hexdigest()
+
+    def as_summary(self) -> dict[str, Any]:
+        """Return a summary whose size does not grow with the number of entries."""
+        counts: dict[str, int] = {}
+        for category, index in self.indexes.items():
+            counts[category.name] = len(index)
+        for rule in self.recurrences:
+            counts[rule.category.name] = (
+                counts.get(rule.category.name, 0) + rule.count - len(rule.exceptions)
+            )
+        starts = [entry.event_date for entry in self.entries]
+        starts.extend(
+            rule.first_start.replace(tzinfo=rule.tz) for rule in self.recurrences
+        )
+        ends = [entry.end_date for entry in self.entries]
+        ends.extend(rule.last_end for rule in self.recurrences)
+        return {
+            "retained_from": self.retained_from,
+            "first_start": min(starts, default=None),
+            "last_end": max(ends, default=None),
+            "entries": len(self.entries),
+            "recurrence_rules": len(self.recurrences),
+            "size": self.size,
+            "counts": counts,
+            "monthly_summaries": len(self.summaries),
+            "digest": self.digest,
+        }
+
+    def _rules(self, categories: Iterable[CalendarEntryType]) -> list[RecurrenceRule]:
+        return [rule for rule in self.recurrences if rule.category in categories]
+
+    def _indexes(self, categories: Iterable[CalendarEntryType]) -> list[EntryIndex]:
+        return [self.indexes[c] for c in dict.fromkeys(categories) if c in self.indexes]
+
+    def iter_entries(
+        self, categories: Iterable[CalendarEntryType]
+    ) -> Iterator[CalendarEntry]:
+        """Yield all retained entries of the given categories, with expanded rules."""
+        for index in self._indexes(categories):
+            yield from index
+        for rule in self._rules(categories):
+            yield from rule.occurrences()
+
+    def iter_entries_after(
+        self, moment: datetime, categories: Iterable[CalendarEntryType]
+    ) -> Iterator[CalendarEntry]:
+        """Yield the entries of the given categories that start after the moment.
+
+        The entries are merged lazily by start date, so taking the first few of
+        them does not touch the others.
+        """
+        return heapq.merge(
+            *(index.iter_after(moment) for index in self._indexes(categories)),
+            *(rule.occurrences_after(moment) for rule in self._rules(categories)),
+            key=lambda e: e.event_date,
+        )
+
+    def is_retained(self, moment: datetime) -> bool:
+        """Return whether entries ending at the moment are kept in detail."""
+        return self.retained_from is None or moment >= self.retained_from
+
+    def entries_between(
+        self,
+        start: datetime,
+        end: datetime,
+        categories: Iterable[CalendarEntryType],
+    ) -> list[CalendarEntry]:
+        """Return the entries of the given categories that start within the range."""
+        result: list[CalendarEntry] = []
+        for index in self._indexes(categories):
+            result.extend(index.between(start, end))
+        for rule in self._rules(categories):
+            result.extend(rule.occurrences_between(start, end))
+        return result
+
+    def entries_at(
+        self, moment: datetime, categories: Iterable[CalendarEntryType]
+    ) -> list[CalendarEntry]:
+        """Return the entries of the given categories that are ongoing at the moment.
+
+        The entries are ordered by the order of the given categories.
+        """
+        result: list[CalendarEntry] = []
+        for category in dict.fromkeys(categories):
+            if category in self.indexes:
+                result.extend(self.indexes[category].at(moment))
+            for rule in self._rules((category,)):
+                if occurrence := rule.occurrence_at(moment):
+                    result.append(occurrence)
+        return result
+
+    def next_entry(
+        self, moment: datetime, categories: Iterable[CalendarEntryType]
+    ) -> CalendarEntry | None:
+        """Return the first entry of the given categories that starts after the moment."""
+        candidates = [index.next_after(moment) for index in self._indexes(categories)]
+        candidates.extend(rule.next_occurrence(moment) for rule in self._rules(categories))
+        return min(
+            (entry for entry in candidates if entry is not None),
+            key=lambda e: e.event_date,
+            default=None,
+        )
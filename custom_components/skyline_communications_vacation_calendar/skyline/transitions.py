@@ -0,0 +1,107 @@
+"""Precomputed moments at which periods covered by calendar entries start or end."""
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import UTC, datetime
+
+from .calendar_api import CalendarEntry
+
+
+class Transitions:
+    """Merged periods covered by calendar entries, as sorted boundaries.
+
+    Overlapping and adjacent entries are merged into periods and the start and
+    end of every period are stored alternately, so the boundaries at even
+    positions start a period and those at odd positions end one. As with the
+    roster, the end date of an entry is the last second it covers.
+    """
+
+    def __init__(self, entries: Iterable[CalendarEntry]) -> None:
+        """Initialize."""
+        periods = sorted(
+            (int(entry.event_date.timestamp()), int(entry.end_date.timestamp()) + 1)
+            for entry in entries
+        )
+        self.boundaries = array("q")
+        for start, end in periods:
+            if self.boundaries and start <= self.boundaries[-1]:
+                self.boundaries[-1] = max(self.boundaries[-1], end)
+            else:
+                self.boundaries.extend((start, end))
+
+    def __len__(self) -> int:
+        """Return the number of boundaries."""
+        return len(self.boundaries)
+
+    def moment(self, position: int) -> datetime | None:
+        """Return the boundary at the position, or None past the last one."""
+        if position >= len(self.boundaries):
+            return None
+        return datetime.fromtimestamp(self.boundaries[position], UTC)
+
+    def position(self, moment: datetime) -> int:
+        """Return the number of boundaries at or before the moment."""
+        return bisect_right(self.boundaries, int(moment.timestamp()))
+
+    def next_after(self, moment: datetime) -> datetime | None:
+        """Return the first boundary after the moment."""
+        return self.moment(self.position(moment))
+
+    def periods_between(
+        self, start: datetime, end: datetime
+    ) -> Iterator[tuple[datetime, datetime]]:
+        """Yield the start and exclusive end of the periods that overlap the range."""
+        position = self.position(start)
+        # Inside a period, that period starts at the boundary before.
+        position -= position % 2
+        timestamp = int(end.timestamp())
+        boundaries = self.boundaries
+        while position < len(boundaries) and boundaries[position] < timestamp:
+            yield (
+                datetime.fromtimestamp(boundaries[position], UTC),
+                datetime.fromtimestamp(boundaries[position + 1], UTC),
+            )
+            position += 2
+
+
+class TransitionCursor:
+    """Position in the transitions that only moves forward as time passes.
+
+    Reading the periods around now is O(1) between boundaries, the cursor only
+    searches again when the transitions are replaced or time goes backwards.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._transitions: Transitions | None = None
+        self._position = 0
+
+    def seek(self, transitions: Transitions, moment: datetime) -> int:
+        """Move to the moment and return the number of boundaries at or before it."""
+        timestamp = int(moment.timestamp())
+        boundaries = transitions.boundaries
+        position = self._position
+        if transitions is not self._transitions or (
+            position > 0 and boundaries[position - 1] > timestamp
+        ):
+            position = transitions.position(moment)
+        else:
+            while position < len(boundaries) and boundaries[position] <= timestamp:
+                position += 1
+        self._transitions, self._position = transitions, position
+        return position
+
+    def current_end(self, transitions: Transitions, moment: datetime) -> datetime | None:
+        """Return when the period ongoing at the moment ends, None outside of one."""
+        position = self.seek(transitions, moment)
+        return transitions.moment(position) if position % 2 else None
+
+    def next_start(self, transitions: Transitions, moment: datetime) -> datetime | None:
+        """Return when the first period that starts after the moment starts."""
+        position = self.seek(transitions, moment)
+        return transitions.moment(position + position % 2)
+
+    def first_free(self, transitions: Transitions, moment: datetime) -> datetime:
+        """Return the first moment from the given one that is outside of any period."""
+        return self.current_end(transitions, moment) or moment
@@ -0,0 +1,316 @@
+"""Pluggable transports for the calendar api, including recording and replay.
+
+The recorder captures the responses of a real transport to a fixture file with
+the names of the users pseudonymized and their personal descriptions removed.
+The replay transport serves those responses again, optionally with simulated
+latency and bandwidth and with the dates shifted, so production payloads can be
+reproduced offline without an api key.
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Mapping
+from datetime import datetime, timedelta
+import json
+from pathlib import Path
+import time
+from typing import Any, Protocol
+from urllib.parse import parse_qsl, urlsplit
+
+# Categories whose descriptions are about the user and are removed when recording.
+PERSONAL_CATEGORIES = frozenset({0, 1, 2, 3, 4})
+# Fields of the entries of the api holding a date.
+DATE_FIELDS = ("EventDate", "EndDate", "OriginalEventDate", "OriginalEndDate")
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+FIXTURE_VERSION = 1
+
+
+class Response(ABC):
+    """Response of a transport, whose content is decoded already."""
+
+    status_code: int = 200
+    content_encoding: str | None = None
+
+    @abstractmethod
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        """Yield the decoded body in chunks."""
+
+    @abstractmethod
+    def wire_bytes(self) -> int:
+        """Return the number of bytes received so far, before decoding."""
+
+    def close(self) -> None:
+        """Release the connection."""
+
+    def __enter__(self) -> "Response":
+        """Return the response."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Release the connection."""
+        self.close()
+
+    @property
+    def text(self) -> str:
+        """Return the complete decoded body as text."""
+        return b"".join(self.iter_content(64 * 1024)).decode("utf-8")
+
+    def json(self) -> Any:
+        """Return the complete decoded body as json."""
+        return json.loads(self.text)
+
+
+class Transport(Protocol):
+    """Sends the requests of the calendar api."""
+
+    def get(self, url: str, headers: Mapping[str, str]) -> Response:
+        """Send a GET request and return the streamed response."""
+
+
+class _RequestsResponse(Response):
+    def __init__(self, response: Any) -> None:
+        self._response = response
+        self.status_code = response.status_code
+        self.content_encoding = response.headers.get("Content-Encoding")
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        return self._response.iter_content(chunk_size)
+
+    def wire_bytes(self) -> int:
+        return self._response.raw.tell()
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class RequestsTransport:
+    """Transport over https with requests, the default."""
+
+    def get(self, url: str, headers: Mapping[str, str]) -> Response:
+        """Send a GET request and return the streamed response."""
+
+        # Imported here, the http stack is only needed once the executor talks to the api.
+        import requests  # noqa: PLC0415
+        from urllib3.util.request import ACCEPT_ENCODING  # noqa: PLC0415
+
+        # Advertise every encoding urllib3 can decode (br only when brotli is installed).
+        headers = {"Accept-Encoding": ACCEPT_ENCODING, **headers}
+        return _RequestsResponse(
+            requests.get(url=url, verify=True, headers=headers, stream=True)
+        )
+
+
+def _request_key(url: str) -> str:
+    """Return the path and sorted query of a url, which identify a recording."""
+    parts = urlsplit(url)
+    query = "&".join(f"{key}={value}" for key, value in sorted(parse_qsl(parts.query)))
+    return f"{parts.path}?{query}" if query else parts.path
+
+
+class _RecordingResponse(Response):
+    def __init__(self, recorder: "RecordingTransport", url: str, response: Response):
+        self._recorder = recorder
+        self._url = url
+        self._response = response
+        self._body = bytearray()
+        self._started = time.monotonic()
+        self.status_code = response.status_code
+        self.content_encoding = response.content_encoding
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        for chunk in self._response.iter_content(chunk_size):
+            self._body.extend(chunk)
+            yield chunk
+
+    def wire_bytes(self) -> int:
+        return self._response.wire_bytes()
+
+    def close(self) -> None:
+        self._recorder.add(
+            self._url,
+            self.status_code,
+            self.content_encoding,
+            self._response.wire_bytes(),
+            time.monotonic() - self._started,
+            bytes(self._body),
+        )
+        self._response.close()
+
+
+class RecordingTransport:
+    """Passes requests on to another transport and records the responses."""
+
+    def __init__(self, transport: Transport | None = None) -> None:
+        """Initialize."""
+        self.transport = transport or RequestsTransport()
+        self.recorded_at = datetime.now().astimezone()
+        self.responses: list[dict[str, Any]] = []
+        self._pseudonyms: dict[str, str] = {}
+
+    def get(self, url: str, headers: Mapping[str, str]) -> Response:
+        """Send the request and record the response once it is closed."""
+        return _RecordingResponse(self, url, self.transport.get(url, headers))
+
+    def _pseudonym(self, name: str) -> str:
+        if name not in self._pseudonyms:
+            self._pseudonyms[name] = f"User {len(self._pseudonyms) + 1}"
+        return self._pseudonyms[name]
+
+    def _redact_url(self, url: str) -> str:
+        parts = urlsplit(url)
+        query = [
+            (key, self._pseudonym(value) if key == "fullname" else value)
+            for key, value in parse_qsl(parts.query)
+        ]
+        return _request_key(
+            f"{parts.path}?" + "&".join(f"{key}={value}" for key, value in query)
+        )
+
+    def _redact_body(self, body: bytes) -> str:
+        text = body.decode("utf-8")
+        try:
+            entries = json.loads(text)
+        except ValueError:
+            return text
+        if not isinstance(entries, list):
+            return text
+        for entry in entries:
+            if "Name" in entry:
+                entry["Name"] = self._pseudonym(entry["Name"])
+            if entry.get("Category") in PERSONAL_CATEGORIES:
+                entry["Description"] = ""
+        return json.dumps(entries)
+
+    def add(
+        self,
+        url: str,
+        status: int,
+        content_encoding: str | None,
+        wire_bytes: int,
+        elapsed: float,
+        body: bytes,
+    ) -> None:
+        """Record a response, redacted."""
+        self.responses.append(
+            {
+                "request": self._redact_url(url),
+                "status": status,
+                "content_encoding": content_encoding,
+                "wire_bytes": wire_bytes,
+                "elapsed": round(elapsed, 3),
+                "body": self._redact_body(body),
+            }
+        )
+
+    def save(self, path: str | Path) -> None:
+        """Write the recorded responses to a fixture file."""
+        fixture = {
+            "version": FIXTURE_VERSION,
+            "recorded_at": self.recorded_at.isoformat(),
+            "responses": self.responses,
+        }
+        Path(path).write_text(json.dumps(fixture, indent=2), encoding="utf-8")
+
+
+class _ReplayResponse(Response):
+    def __init__(
+        self,
+        status: int,
+        content_encoding: str | None,
+        body: bytes,
+        wire_bytes: int,
+        latency: float,
+        bandwidth: int | None,
+    ) -> None:
+        self.status_code = status
+        self.content_encoding = content_encoding
+        self._body = body
+        self._wire_bytes = wire_bytes
+        self._received = 0
+        self._latency = latency
+        self._bandwidth = bandwidth
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        if self._latency:
+            time.sleep(self._latency)
+        # The recorded compression ratio spreads the wire bytes over the chunks.
+        ratio = self._wire_bytes / len(self._body) if self._body else 0
+        for start in range(0, len(self._body), chunk_size):
+            chunk = self._body[start : start + chunk_size]
+            received = round(len(chunk) * ratio)
+            if self._bandwidth:
+                time.sleep(received / self._bandwidth)
+            self._received += received
+            yield chunk
+        self._received = self._wire_bytes
+
+    def wire_bytes(self) -> int:
+        return self._received
+
+
+def _shift_dates(body: str, shift: timedelta) -> str:
+    try:
+        entries = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(entries, list):
+        return body
+    for entry in entries:
+        for key in DATE_FIELDS:
+            if key in entry:
+                moment = datetime.strptime(entry[key], DATE_FORMAT) + shift
+                entry[key] = moment.strftime(DATE_FORMAT)
+    return json.dumps(entries)
+
+
+class ReplayTransport:
+    """Serves the responses of a fixture file recorded by RecordingTransport.
+
+    latency is added before every response in seconds and bandwidth limits the
+    recorded wire bytes per second. With shift_dates, all dates move by whole
+    weeks from the recording to now, so weekends stay weekends.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        latency: float = 0.0,
+        bandwidth: int | None = None,
+        shift_dates: bool = False,
+    ) -> None:
+        """Initialize."""
+        fixture = json.loads(Path(path).read_text(encoding="utf-8"))
+        if fixture.get("version") != FIXTURE_VERSION:
+            raise ValueError(f"Unsupported fixture version {fixture.get('version')}")
+        self.recorded_at = datetime.fromisoformat(fixture["recorded_at"])
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.shift = timedelta(0)
+        if shift_dates:
+            elapsed = datetime.now().astimezone() - self.recorded_at
+            self.shift = timedelta(weeks=elapsed // timedelta(weeks=1))
+        # The last recording of a request wins.
+        self.responses = {
+            response["request"]: response for response in fixture["responses"]
+        }
+        self.requests = 0
+
+    def get(self, url: str, headers: Mapping[str, str]) -> Response:
+        """Return the recorded response of the request."""
+        self.requests += 1
+        key = _request_key(url)
+        if (response := self.responses.get(key)) is None:
+            body = json.dumps({"errors": [{"detail": f"No recording of {key}"}]})
+            return _ReplayResponse(
+                404, None, body.encode(), len(body), self.latency, self.bandwidth
+            )
+        body = response["body"]
+        if self.shift:
+            body = _shift_dates(body, self.shift)
+        return _ReplayResponse(
+            response["status"],
+            response["content_encoding"],
+            body.encode("utf-8"),
+            response["wire_bytes"],
+            self.latency,
+            self.bandwidth,
+        )
@@ -0,0 +1,41 @@
+"""Bounded list of the next calendar entries, advanced as time passes."""
+
+from collections import deque
+from collections.abc import Iterator
+from datetime import datetime
+
+from .calendar_api import CalendarEntry, CalendarEntryType
+from .store import CalendarStore
+
+
+class UpcomingEntries:
+    """The next entries of some categories, at most limit of them.
+
+    The entries come from a lazy merge of the sorted indexes of the store, so
+    only the entries that are returned are ever looked at. Entries that started
+    are dropped from the front and replaced from the merge, which is only
+    started again, with a bisect per index, when the store is replaced.
+    """
+
+    def __init__(self, categories: tuple[CalendarEntryType, ...], limit: int) -> None:
+        """Initialize."""
+        self.categories = categories
+        self.limit = limit
+        self._store: CalendarStore | None = None
+        self._queue: deque[CalendarEntry] = deque()
+        self._source: Iterator[CalendarEntry] = iter(())
+
+    def get(self, store: CalendarStore, moment: datetime) -> list[CalendarEntry]:
+        """Return the entries that start after the moment, sorted by start date."""
+        if store is not self._store:
+            self._store = store
+            self._queue.clear()
+            self._source = store.iter_entries_after(moment, self.categories)
+        while self._queue and self._queue[0].event_date <= moment:
+            self._queue.popleft()
+        while len(self._queue) < self.limit:
+            if (entry := next(self._source, None)) is None:
+                break
+            if entry.event_date > moment:
+                self._queue.append(entry)
+        return list(self._queue)
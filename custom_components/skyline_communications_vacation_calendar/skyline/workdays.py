@@ -0,0 +1,78 @@
+"""Day bitsets to find the days on which several users are working.
+
+Bit i of a bitset stands for the i-th day of a range. Python integers are
+arbitrarily long, so combining the bitsets of many users over years of days
+takes a handful of big integer operations instead of a loop over the days.
+"""
+
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, timedelta, tzinfo
+
+from .calendar_api import CalendarEntryType
+
+# Categories of the entries that make a day a day off.
+DAY_OFF_CATEGORIES = (
+    CalendarEntryType.Absent,
+    CalendarEntryType.Public_Holiday,
+    CalendarEntryType.Weekend,
+)
+
+
+def full_mask(days: int) -> int:
+    """Return the bitset with all days of the range set."""
+    return (1 << days) - 1
+
+
+def period_mask(
+    periods: Iterable[tuple[datetime, datetime]], first: date, days: int, tz: tzinfo
+) -> int:
+    """Return the bitset of the days of the range that overlap any of the periods.
+
+    Periods end exclusively, a period ending at midnight does not cover that day.
+    """
+    mask = 0
+    for start, end in periods:
+        start_index = (start.astimezone(tz).date() - first).days
+        end_index = ((end - timedelta(seconds=1)).astimezone(tz).date() - first).days
+        start_index, end_index = max(start_index, 0), min(end_index, days - 1)
+        if start_index <= end_index:
+            mask |= full_mask(end_index - start_index + 1) << start_index
+    return mask
+
+
+def at_least(masks: Iterable[int], count: int, days: int) -> int:
+    """Return the bitset of the days set in at least count of the masks.
+
+    The masks are added in a bit-sliced counter, whose j-th plane holds bit j
+    of the number of masks set on every day, and the counters are compared
+    with count plane by plane, most significant first.
+    """
+    planes: list[int] = []
+    for mask in masks:
+        carry = mask
+        for index, plane in enumerate(planes):
+            planes[index] = plane ^ carry
+            carry &= plane
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+
+    greater = 0
+    equal = full_mask(days)
+    for index in reversed(range(max(len(planes), count.bit_length()))):
+        plane = planes[index] if index < len(planes) else 0
+        if count >> index & 1:
+            equal &= plane
+        else:
+            greater |= equal & plane
+            equal &= ~plane
+    return greater | equal
+
+
+def iter_days(mask: int, first: date) -> Iterator[date]:
+    """Yield the days set in the bitset."""
+    while mask:
+        lowest = mask & -mask
+        yield first + timedelta(days=lowest.bit_length() - 1)
+        mask ^= lowest
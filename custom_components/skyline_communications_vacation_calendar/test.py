@@ -1,10 +1,56 @@
+"""Print whether today is a workday for a user and list their entries.
+
+Talks to the live api with the key in the SKYLINE_API_KEY environment variable,
+optionally recording the responses, or replays a recorded fixture offline:
+
+    python test.py "Jane Doe" 477/147 --record fixture.json
+    python test.py "User 1" 477/147 --replay fixture.json --latency 0.5
+"""
+
+import argparse
 from datetime import datetime
-from skyline_communications_vacation_calendar.skyline.calendar_api import CalendarHelper, CalendarEntryType
+import os
+
+from skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarEntryType,
+    CalendarHelper,
+)
+from skyline_communications_vacation_calendar.skyline.transport import (
+    RecordingTransport,
+    ReplayTransport,
+    Transport,
+)
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("fullname")
+parser.add_argument("element_id")
+parser.add_argument("--host", help="url of the api")
+parser.add_argument("--record", help="record the responses to this fixture")
+parser.add_argument("--replay", help="replay the responses of this fixture")
+parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+parser.add_argument("--bandwidth", type=int, help="replayed bytes per second")
+parser.add_argument(
+    "--shift-dates", action="store_true", help="move replayed dates to today"
+)
+args = parser.parse_args()
+
+transport: Transport | None = None
+recorder: RecordingTransport | None = None
+if args.replay:
+    transport = ReplayTransport(
+        args.replay, args.latency, args.bandwidth, args.shift_dates
+    )
+elif args.record:
+    transport = recorder = RecordingTransport()
+
+helper = CalendarHelper(os.environ.get("SKYLINE_API_KEY", ""), args.host, transport)
+helper.authenticate()
+entries = helper.get_entries(args.fullname, args.element_id)
 
-helper = CalendarHelper("uhhFw2zWsM2OSAwOpdKcbmPFddVhMHbSUaKSm/fTYRA=")
-entries = helper.get_entries("Frederic Anthierens", "477/147")
+if recorder is not None:
+    recorder.save(args.record)
 
-now = datetime.now()
+now = datetime.now().astimezone()
 
 holiday_types = [
     CalendarEntryType.Absent,
@@ -27,4 +73,4 @@ else:
 for entry in entries:
     print(f"{entry.id}: {entry.category}")
 
-print(helper.authenticate())
\ No newline at end of file
+print(helper.last_fetch_metrics)
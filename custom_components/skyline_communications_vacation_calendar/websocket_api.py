@@ -0,0 +1,176 @@
+"""Websocket commands of the Skyline Communications Vacation Calendar integration."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.auth.permissions.const import POLICY_READ
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError, Unauthorized
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_CALENDAR_FEEDS, DOMAIN
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe_events)
+    websocket_api.async_register_command(hass, ws_feed_url)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/feed_url",
+        vol.Required("entity_id"): cv.entity_id,
+    }
+)
+@websocket_api.require_admin
+@callback
+def ws_feed_url(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Send the path of the iCalendar feed of a calendar.
+
+    The path holds the secret that gives access to the feed without logging in,
+    so it is not a state attribute and only administrators can read it.
+    """
+    feed = hass.data.get(DATA_CALENDAR_FEEDS, {}).get(msg["entity_id"])
+    if feed is None or (url := feed.url) is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Calendar entity not found"
+        )
+        return
+    connection.send_result(msg["id"], {"url": url})
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe_events",
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Required("start"): cv.datetime,
+        vol.Required("end"): cv.datetime,
+    }
+)
+@websocket_api.async_response
+async def ws_subscribe_events(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Send the events of a calendar within a window, then only the changes.
+
+    After every refresh that changed the data of the calendar a message with the
+    added, removed and changed events is sent, so clients do not need to request
+    the whole window again. A refresh whose events cannot be read sends an
+    error event instead, and the subscription ends with an error once the
+    entity is removed or reloaded.
+    """
+    if not connection.user.permissions.check_entity(msg["entity_id"], POLICY_READ):
+        raise Unauthorized(entity_id=msg["entity_id"], permission=POLICY_READ)
+
+    feed = hass.data.get(DATA_CALENDAR_FEEDS, {}).get(msg["entity_id"])
+    if feed is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Calendar entity not found"
+        )
+        return
+
+    entity = feed.entity
+    start = dt_util.as_local(msg["start"])
+    end = dt_util.as_local(msg["end"])
+
+    async def async_get_events() -> dict[str, dict[str, Any]]:
+        return {
+            event.uid or "": event.as_dict()
+            for event in await entity.async_get_events(hass, start, end)
+        }
+
+    try:
+        events = await async_get_events()
+    except HomeAssistantError as err:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_HOME_ASSISTANT_ERROR, str(err)
+        )
+        return
+    if hass.data.get(DATA_CALENDAR_FEEDS, {}).get(msg["entity_id"]) is not feed:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Calendar entity was removed"
+        )
+        return
+    generation = entity.user.generation
+    lock = asyncio.Lock()
+    removed = False
+
+    async def async_send_changes() -> None:
+        nonlocal events, generation
+        async with lock:
+            if removed or entity.user.generation == generation:
+                return
+            latest = entity.user.generation
+            try:
+                current = await async_get_events()
+            except HomeAssistantError as err:
+                # The next refresh tries again, the client keeps its events until then.
+                if not removed:
+                    connection.send_message(
+                        websocket_api.event_message(msg["id"], {"error": str(err)})
+                    )
+                return
+            if removed:
+                return
+            generation = latest
+            changes = {
+                "added": [event for uid, event in current.items() if uid not in events],
+                "removed": [uid for uid in events if uid not in current],
+                "changed": [
+                    event
+                    for uid, event in current.items()
+                    if uid in events and events[uid] != event
+                ],
+            }
+            events = current
+            if any(changes.values()):
+                connection.send_message(
+                    websocket_api.event_message(msg["id"], changes)
+                )
+
+    @callback
+    def async_coordinator_updated() -> None:
+        # Most refreshes do not download new data, those are ignored right away.
+        if entity.user.generation != generation:
+            hass.async_create_task(async_send_changes())
+
+    remove_coordinator_listener = entity.coordinator.async_add_listener(
+        async_coordinator_updated
+    )
+
+    @callback
+    def async_unsubscribe() -> None:
+        nonlocal removed
+        removed = True
+        remove_coordinator_listener()
+        remove_feed_listener()
+
+    @callback
+    def async_feed_removed() -> None:
+        # The entity was removed or reloaded, its coordinator is not updated anymore.
+        if connection.subscriptions.pop(msg["id"], None) is not None:
+            async_unsubscribe()
+            connection.send_error(
+                msg["id"], websocket_api.ERR_NOT_FOUND, "Calendar entity was removed"
+            )
+
+    remove_feed_listener = feed.async_on_removed(async_feed_removed)
+    connection.subscriptions[msg["id"]] = async_unsubscribe
+    connection.send_result(msg["id"])
+    connection.send_message(
+        websocket_api.event_message(msg["id"], {"events": list(events.values())})
+    )
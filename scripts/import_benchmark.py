@@ -0,0 +1,117 @@
+"""Import time benchmark of the Skyline Communications Vacation Calendar integration.
+
+Imports the modules Home Assistant loads when setting up a config entry in a fresh
+interpreter with ``-X importtime``, after Home Assistant itself and the platforms
+the integration builds on are imported, so only the cost of the integration is
+measured. Fails when the load time exceeds the budget, or when a module that is
+not needed at runtime (the config flow, the http client) is pulled in.
+
+Requires the packages of requirements.txt. Run it from the root of the repository:
+
+    python scripts/import_benchmark.py --runs 5 --budget 50
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = "custom_components.skyline_communications_vacation_calendar"
+
+# Already loaded by Home Assistant before the integration is set up.
+PRELOADED = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.calendar",
+    "homeassistant.components.http",
+    "homeassistant.components.sensor",
+    "homeassistant.components.websocket_api",
+)
+
+# Loaded when a config entry is set up.
+RUNTIME_MODULES = ("", ".binary_sensor", ".calendar", ".sensor")
+
+# Only needed for the config flow or once the executor talks to the api.
+FORBIDDEN = (f"{PACKAGE}.config_flow", "requests")
+
+MARKER = "--- integration ---"
+
+
+def measure() -> dict[str, tuple[int, int]]:
+    """Import the integration once and return the depth and time in us per module."""
+    code = "\n".join(
+        [
+            *(f"import {module}" for module in PRELOADED),
+            "import sys",
+            f"sys.stderr.write({MARKER!r} + '\\n')",
+            *(f"import {PACKAGE}{module}" for module in RUNTIME_MODULES),
+        ]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stderr.split(MARKER, 1)[1].splitlines()
+    modules: dict[str, tuple[int, int]] = {}
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented by two spaces per level.
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (depth, int(cumulative))
+    return modules
+
+
+def main() -> None:
+    """Run the benchmark and print a report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="number of interpreters")
+    parser.add_argument(
+        "--budget", type=float, default=None, help="maximum load time in ms"
+    )
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to show")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    # Top level imports add up to the total load time.
+    totals = []
+    for run in runs:
+        top = min(depth for depth, _ in run.values())
+        totals.append(sum(us for depth, us in run.values() if depth == top))
+    total_ms = statistics.median(totals) / 1000
+
+    names = {name for run in runs for name in run}
+    medians = {
+        name: statistics.median(run.get(name, (0, 0))[1] for run in runs)
+        for name in names
+    }
+    print(f"Integration load time (median of {args.runs}): {total_ms:.1f} ms")  # noqa: T201
+    print(f"Modules imported: {len(names)}")  # noqa: T201
+    for name, us in sorted(medians.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {us / 1000:8.2f} ms  {name}")  # noqa: T201
+
+    failures = [
+        f"{module} is imported while loading the integration"
+        for module in FORBIDDEN
+        if module in names
+    ]
+    if args.budget is not None and total_ms > args.budget:
+        failures.append(f"load time exceeds the budget of {args.budget} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")  # noqa: T201
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
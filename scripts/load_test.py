@@ -0,0 +1,322 @@
+"""Scale and load test harness for the Skyline Communications Vacation Calendar integration.
+
+Boots the integration in a test Home Assistant instance with many config entries
+that all talk to a local stub of the calendar api, and reports:
+
+* setup time of all config entries
+* CPU time and event loop lag while the coordinators refresh
+* executor queue depth
+* state writes per (simulated) minute
+* memory per config entry
+
+Requires the packages of requirements.txt and pytest-homeassistant-custom-component
+(for the test Home Assistant instance). Run it from the root of the repository:
+
+    python scripts/load_test.py --entries 300 --years 5
+
+With --fixture, every user gets the calendar of a fixture recorded with the
+RecordingTransport instead of a generated one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import gzip
+import json
+from pathlib import Path
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+from aiohttp import web
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+    async_test_home_assistant,
+)
+
+from homeassistant import loader
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_API_KEY, CONF_HOST, EVENT_STATE_CHANGED
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.skyline_communications_vacation_calendar.const import (  # noqa: E402
+    CONF_ELEMENT_ID,
+    CONF_FULLNAME,
+    DOMAIN,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.transport import (  # noqa: E402
+    ReplayTransport,
+)
+
+ELEMENT_ID = "1/1"
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def _entry(entry_id: int, name: str, category: int, start: datetime, days: int):
+    end = start + timedelta(days=days) - timedelta(seconds=1)
+    return {
+        "ID": str(entry_id),
+        "Name": name,
+        "Category": category,
+        "EventDate": start.strftime(DATE_FORMAT),
+        "EndDate": end.strftime(DATE_FORMAT),
+        "Description": "Load test",
+        "OriginalEventDate": start.strftime(DATE_FORMAT),
+        "OriginalEndDate": end.strftime(DATE_FORMAT),
+    }
+
+
+def generate_entries(name: str, years: int, seed: int) -> list[dict]:
+    """Generate a plausible history of weekends, absences, WfH days and holidays."""
+    rng = random.Random(seed)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    day = today - timedelta(days=365 * years)
+    last = today + timedelta(days=365)
+    entries = []
+    while day < last:
+        if day.weekday() == 5:
+            entries.append(_entry(len(entries), name, 6, day, 2))
+        elif day.weekday() < 5:
+            roll = rng.random()
+            if roll < 0.08:
+                entries.append(_entry(len(entries), name, 0, day, 1))
+            elif roll < 0.30:
+                entries.append(_entry(len(entries), name, 1, day, 1))
+            elif roll < 0.33:
+                entries.append(_entry(len(entries), name, 5, day, 1))
+        day += timedelta(days=1)
+    return entries
+
+
+def fixture_entries(path: str, name: str) -> list[dict]:
+    """Return the entries of the first calendar in a fixture, moved to today."""
+    transport = ReplayTransport(path, shift_dates=True)
+    for request in transport.responses:
+        if request.startswith("/api/custom/calendar?"):
+            with transport.get(request, {}) as response:
+                entries = response.json()
+            if isinstance(entries, list):
+                return [{**entry, "Name": name} for entry in entries]
+    raise ValueError(f"No calendar recorded in {path}")
+
+
+class CalendarApiStub:
+    """Local stand-in for the calendar api, serving generated (gzipped) payloads."""
+
+    def __init__(
+        self, users: list[str], years: int, latency: float, fixture: str | None
+    ) -> None:
+        """Initialize."""
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self.payloads = {
+            name: json.dumps(
+                fixture_entries(fixture, name)
+                if fixture
+                else generate_entries(name, years, index)
+            ).encode()
+            for index, name in enumerate(users)
+        }
+        self.compressed = {
+            name: gzip.compress(payload) for name, payload in self.payloads.items()
+        }
+
+    async def ping(self, request: web.Request) -> web.Response:
+        """Answer the authentication check."""
+        await asyncio.sleep(self.latency)
+        return web.Response(text="pong")
+
+    async def calendar(self, request: web.Request) -> web.Response:
+        """Return the entries of a user."""
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        name = request.query.get("fullname", "")
+        if name not in self.payloads:
+            return web.json_response(
+                {"errors": [{"detail": f"Unknown user {name}"}]}, status=404
+            )
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = self.compressed[name]
+            headers = {"Content-Encoding": "gzip"}
+        else:
+            body = self.payloads[name]
+            headers = {}
+        self.bytes_sent += len(body)
+        return web.Response(
+            body=body, headers=headers, content_type="application/json"
+        )
+
+    async def start(self) -> tuple[web.AppRunner, str]:
+        """Start the stub on a free local port and return its url."""
+        app = web.Application()
+        app.router.add_get("/api/custom/calendar/ping", self.ping)
+        app.router.add_get("/api/custom/calendar", self.calendar)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+        return runner, f"http://127.0.0.1:{port}"
+
+
+@dataclass
+class LoopProbe:
+    """Samples the event loop lag and the executor queue depth."""
+
+    interval: float = 0.05
+    lags: list[float] = field(default_factory=list)
+    queue_depths: list[int] = field(default_factory=list)
+
+    async def run(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Sample until cancelled."""
+        executor = loop._default_executor  # noqa: SLF001
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(loop.time() - started - self.interval)
+            if executor is not None:
+                self.queue_depths.append(executor._work_queue.qsize())  # noqa: SLF001
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Run the scenario and return the measurements."""
+    users = [f"Load Test User {index}" for index in range(args.entries)]
+    stub = CalendarApiStub(users, args.years, args.latency / 1000, args.fixture)
+
+    async with async_test_home_assistant() as hass:
+        # Same as the enable_custom_integrations fixture.
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+        runner, url = await stub.start()
+        await async_setup_component(hass, "http", {"http": {}})
+
+        state_writes = 0
+
+        def count_state_write(_event) -> None:
+            nonlocal state_writes
+            state_writes += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, count_state_write)
+        probe = LoopProbe()
+        probe_task = hass.loop.create_task(probe.run(hass.loop))
+
+        if args.memory:
+            tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0] if args.memory else 0
+
+        started = time.perf_counter()
+        for user in users:
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                title=f"Load test - {user}",
+                unique_id=f"Load test - {user}",
+                data={
+                    CONF_API_KEY: "load-test",
+                    CONF_HOST: url,
+                    CONF_FULLNAME: user,
+                    CONF_ELEMENT_ID: ELEMENT_ID,
+                },
+            )
+            entry.add_to_hass(hass)
+        await asyncio.gather(
+            *(
+                hass.config_entries.async_setup(entry.entry_id)
+                for entry in hass.config_entries.async_entries(DOMAIN)
+            )
+        )
+        await hass.async_block_till_done()
+        setup_time = time.perf_counter() - started
+
+        memory_after = tracemalloc.get_traced_memory()[0] if args.memory else 0
+        if args.memory:
+            tracemalloc.stop()
+
+        # Steady state: simulate minutes passing so every coordinator ticks.
+        state_writes = 0
+        probe.lags.clear()
+        probe.queue_depths.clear()
+        cpu_started = _cpu_seconds()
+        wall_started = time.perf_counter()
+        now = dt_util.utcnow()
+        for minute in range(1, args.minutes + 1):
+            async_fire_time_changed(hass, now + timedelta(minutes=minute))
+            await hass.async_block_till_done()
+        cpu_time = _cpu_seconds() - cpu_started
+        wall_time = time.perf_counter() - wall_started
+
+        loaded = sum(
+            1
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.state is ConfigEntryState.LOADED
+        )
+        probe_task.cancel()
+        await runner.cleanup()
+        await hass.async_stop(force=True)
+
+    return {
+        "config_entries": args.entries,
+        "config_entries_loaded": loaded,
+        "years_of_history": args.years,
+        "payload_bytes_per_user": statistics.mean(len(p) for p in stub.payloads.values()),
+        "setup_seconds": round(setup_time, 3),
+        "simulated_minutes": args.minutes,
+        "steady_state_cpu_seconds": round(cpu_time, 3),
+        "steady_state_cpu_percent": round(100 * cpu_time / wall_time, 1)
+        if wall_time
+        else None,
+        "loop_lag_p50_ms": round(1000 * _percentile(probe.lags, 0.5), 2),
+        "loop_lag_p99_ms": round(1000 * _percentile(probe.lags, 0.99), 2),
+        "loop_lag_max_ms": round(1000 * max(probe.lags, default=0.0), 2),
+        "executor_queue_depth_max": max(probe.queue_depths, default=0),
+        "state_writes_per_minute": round(state_writes / args.minutes, 1),
+        "api_requests": stub.requests,
+        "api_bytes_sent": stub.bytes_sent,
+        "memory_per_entry_bytes": round((memory_after - memory_before) / args.entries)
+        if args.memory
+        else None,
+    }
+
+
+def main() -> None:
+    """Parse the arguments, run the scenario and print the report as json."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100, help="config entries")
+    parser.add_argument("--years", type=int, default=3, help="years of history")
+    parser.add_argument(
+        "--minutes", type=int, default=120, help="simulated minutes of steady state"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=50, help="api latency in milliseconds"
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="measure memory with tracemalloc"
+    )
+    parser.add_argument("--fixture", help="serve the calendar of a recorded fixture")
+    report = asyncio.run(run(parser.parse_args()))
+    print(json.dumps(report, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Tests for the Skyline Communications Vacation Calendar integration."""
+
+from datetime import datetime, timedelta, tzinfo
+import random
+
+from custom_components.skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarEntry,
+    CalendarEntryType,
+)
+
+NAMES = ("Arne Maes", "Élodie Dupont", "Jan Janssens")
+DESCRIPTIONS = ("", "Skiing in Austria", "Doctor", "Release 10.4", "Team day")
+
+
+def make_entry(
+    start: datetime,
+    end: datetime,
+    category: CalendarEntryType = CalendarEntryType.Absent,
+    name: str = "Arne Maes",
+    description: str = "",
+    entry_id: str | None = None,
+) -> CalendarEntry:
+    """Return an entry like the api returns it."""
+    return CalendarEntry(
+        id=entry_id or f"{name}-{category.name}-{start.isoformat()}",
+        name=name,
+        category=category,
+        event_date=start,
+        end_date=end,
+        description=description,
+        original_event_date=start,
+        originale_end_date=end,
+    )
+
+
+def make_weekends(
+    first_saturday: datetime, count: int, name: str = "Arne Maes"
+) -> list[CalendarEntry]:
+    """Return the weekends of a user, from saturday midnight to the end of sunday."""
+    weekends = []
+    for week in range(count):
+        naive = first_saturday.replace(tzinfo=None) + timedelta(weeks=week)
+        saturday = naive.replace(tzinfo=first_saturday.tzinfo)
+        weekends.append(
+            make_entry(
+                saturday,
+                saturday + timedelta(days=2, seconds=-1),
+                CalendarEntryType.Weekend,
+                name,
+            )
+        )
+    return weekends
+
+
+def make_random_entries(
+    rng: random.Random, first: datetime, count: int, tz: tzinfo
+) -> list[CalendarEntry]:
+    """Return random entries of several users and categories after the first moment."""
+    categories = [c for c in CalendarEntryType if c is not CalendarEntryType.Weekend]
+    entries = []
+    for index in range(count):
+        start = (
+            first.replace(tzinfo=None)
+            + timedelta(days=rng.randrange(365), hours=rng.choice((0, 8, 9, 13)))
+        ).replace(tzinfo=tz)
+        length = rng.choice(
+            (
+                timedelta(hours=4),
+                timedelta(hours=8),
+                timedelta(days=1),
+                timedelta(days=5),
+            )
+        )
+        entries.append(
+            make_entry(
+                start,
+                start + length - timedelta(seconds=1),
+                rng.choice(categories),
+                rng.choice(NAMES),
+                rng.choice(DESCRIPTIONS),
+                entry_id=str(index),
+            )
+        )
+    return entries
+
+
+def entry_key(entry: CalendarEntry) -> tuple:
+    """Return what identifies an entry apart from its id."""
+    return (
+        entry.name,
+        entry.category.value,
+        entry.event_date,
+        entry.end_date,
+        entry.description,
+    )
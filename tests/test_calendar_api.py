@@ -0,0 +1,84 @@
+"""Tests for the metrics of the downloads of the calendar api."""
+
+from collections.abc import Iterator, Mapping
+import json
+
+import pytest
+
+from custom_components.skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarException,
+    CalendarHelper,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.transport import (
+    Response,
+)
+
+
+def _api_entry(index: int) -> dict:
+    return {
+        "ID": str(index),
+        "Name": "Arne Maes",
+        "Category": 0,
+        "EventDate": f"2024-01-{index:02d}T00:00:00",
+        "EndDate": f"2024-01-{index:02d}T23:59:59",
+        "Description": "",
+        "OriginalEventDate": f"2024-01-{index:02d}T00:00:00",
+        "OriginalEndDate": f"2024-01-{index:02d}T23:59:59",
+    }
+
+
+class _BodyResponse(Response):
+    def __init__(self, body: bytes, status_code: int = 200) -> None:
+        self.body = body
+        self.status_code = status_code
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        for index in range(0, len(self.body), chunk_size):
+            yield self.body[index : index + chunk_size]
+
+    def wire_bytes(self) -> int:
+        return len(self.body)
+
+
+class _BodyTransport:
+    def __init__(self, body: bytes, status_code: int = 200) -> None:
+        self.body = body
+        self.status_code = status_code
+
+    def get(self, url: str, headers: Mapping[str, str]) -> Response:
+        return _BodyResponse(self.body, self.status_code)
+
+
+def _helper(entries: int) -> CalendarHelper:
+    body = json.dumps([_api_entry(index) for index in range(1, entries + 1)])
+    return CalendarHelper(transport=_BodyTransport(body.encode()))
+
+
+def test_metrics_of_a_complete_download() -> None:
+    """The metrics count the entries and bytes of the download."""
+    helper = _helper(10)
+    assert len(helper.get_entries("Arne Maes", "1/2")) == 10
+    assert helper.last_fetch_metrics.entry_count == 10
+    assert helper.last_fetch_metrics.wire_bytes == len(helper.transport.body)
+
+
+def test_metrics_of_a_download_that_stopped_early() -> None:
+    """A download that is not read to the end replaces the earlier metrics."""
+    helper = _helper(10)
+    helper.get_entries("Arne Maes", "1/2")
+
+    entries = helper.iter_entries("Arne Maes", "1/2")
+    next(entries)
+    entries.close()
+    assert helper.last_fetch_metrics.entry_count == 1
+
+
+def test_metrics_of_a_failed_download() -> None:
+    """A download the api refuses replaces the earlier metrics."""
+    helper = _helper(10)
+    helper.get_entries("Arne Maes", "1/2")
+
+    helper.transport = _BodyTransport(b'{"errors": [{"detail": "Denied"}]}', 403)
+    with pytest.raises(CalendarException, match="Denied"):
+        helper.get_entries("Arne Maes", "1/2")
+    assert helper.last_fetch_metrics.entry_count == 0
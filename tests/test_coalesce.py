@@ -0,0 +1,94 @@
+"""Tests for merging overlapping and back-to-back entries."""
+
+from datetime import UTC, datetime, timedelta
+import random
+
+import pytest
+
+from custom_components.skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarEntryType,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.coalesce import (
+    coalesce_entries,
+)
+
+from . import make_entry
+
+FIRST = datetime(2024, 1, 1, tzinfo=UTC)
+SECOND = timedelta(seconds=1)
+
+
+def _day(index: int, description: str = "", entry_id: str | None = None):
+    start = FIRST + timedelta(days=index)
+    return make_entry(
+        start,
+        start + timedelta(days=1) - SECOND,
+        description=description,
+        entry_id=entry_id,
+    )
+
+
+def test_days_entered_one_by_one_are_merged() -> None:
+    """Back-to-back days become a single entry that lists the merged ids."""
+    merged = coalesce_entries(
+        [_day(2, "Ski", "c"), _day(0, "Ski", "a"), _day(1, "Doctor", "b")]
+    )
+
+    assert len(merged) == 1
+    assert merged[0].id == "a"
+    assert merged[0].merged_ids == ("a", "b", "c")
+    assert merged[0].event_date == FIRST
+    assert merged[0].end_date == FIRST + timedelta(days=3) - SECOND
+    assert merged[0].description == "Ski; Doctor"
+
+
+def test_gaps_users_and_categories_are_kept_apart() -> None:
+    """Only entries of the same user and category that touch are merged."""
+    other_user = _day(1)
+    other_user.name = "Jan Janssens"
+    other_category = _day(1)
+    other_category.category = CalendarEntryType.WfH
+    entries = [_day(0), _day(2), other_user, other_category]
+
+    merged = coalesce_entries(entries)
+
+    assert len(merged) == 4
+    assert all(entry.merged_ids == () for entry in merged)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_covers_the_same_minutes(seed: int) -> None:
+    """The merged entries cover the same minutes and no longer touch each other."""
+    rng = random.Random(seed)
+    entries = []
+    for index in range(60):
+        start = FIRST + timedelta(minutes=rng.randrange(2000))
+        end = start + timedelta(minutes=rng.randrange(1, 120)) - SECOND
+        entries.append(
+            make_entry(
+                start,
+                end,
+                rng.choice((CalendarEntryType.Absent, CalendarEntryType.WfH)),
+                rng.choice(("Arne Maes", "Jan Janssens")),
+                entry_id=str(index),
+            )
+        )
+
+    def minutes(group) -> dict[tuple, set[datetime]]:
+        covered: dict[tuple, set[datetime]] = {}
+        for entry in group:
+            moment = entry.event_date
+            while moment <= entry.end_date:
+                covered.setdefault((entry.name, entry.category), set()).add(moment)
+                moment += timedelta(minutes=1)
+        return covered
+
+    merged = coalesce_entries(entries)
+
+    assert minutes(merged) == minutes(entries)
+    assert sorted(i for entry in merged for i in entry.merged_ids or (entry.id,)) == (
+        sorted(entry.id for entry in entries)
+    )
+    for first, second in zip(merged, merged[1:], strict=False):
+        if (first.name, first.category) == (second.name, second.category):
+            assert second.event_date > first.end_date + SECOND
@@ -0,0 +1,106 @@
+"""Tests for the monthly cache of compacted history."""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from custom_components.skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarEntryType,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.history import (
+    HistoryCache,
+    iter_months,
+    next_month,
+)
+
+from . import make_entry
+
+TZ = ZoneInfo("Europe/Brussels")
+ALL = list(CalendarEntryType)
+RETAINED_FROM = datetime(2024, 6, 15, tzinfo=TZ)
+
+
+def _month(year: int, month: int) -> datetime:
+    return datetime(year, month, 1, tzinfo=TZ)
+
+
+def _entries(start: datetime, end: datetime) -> list:
+    """Return an entry on the 10th of every month of the range."""
+    return [
+        make_entry(month + timedelta(days=9), month + timedelta(days=10))
+        for month in iter_months(start, end, TZ)
+    ]
+
+
+def test_iter_months() -> None:
+    """Months are in the local time zone and the last one overlaps the end."""
+    start = datetime(2023, 11, 30, 23, 30, tzinfo=ZoneInfo("UTC"))
+    assert list(iter_months(start, _month(2024, 2), TZ)) == [
+        _month(2023, 12),
+        _month(2024, 1),
+        _month(2024, 2),
+    ]
+    assert next_month(_month(2024, 12)) == _month(2025, 1)
+
+
+def test_months_are_downloaded_once() -> None:
+    """Only the months that were not filled before are missing."""
+    cache = HistoryCache(TZ)
+    start, end = _month(2024, 1), _month(2024, 3)
+
+    missing = cache.missing(1, start, end)
+    assert missing == [_month(2024, 1), _month(2024, 2), _month(2024, 3)]
+    cache.fill(1, missing, _entries(start, end), RETAINED_FROM)
+
+    assert cache.missing(1, start, _month(2024, 4)) == [_month(2024, 4)]
+    entries = cache.entries_between(start, end + timedelta(days=20), ALL, RETAINED_FROM)
+    assert len(entries) == 3
+    wfh = [CalendarEntryType.WfH]
+    assert cache.entries_between(start, end, wfh, RETAINED_FROM) == []
+
+
+def test_compacted_months_outlive_the_key() -> None:
+    """Months whose entries all ended before the window stay valid for a new key."""
+    cache = HistoryCache(TZ)
+    start, end = _month(2024, 4), _month(2024, 6)
+    cache.fill(1, cache.missing(1, start, end), _entries(start, end), RETAINED_FROM)
+
+    # June ends after the start of the window, it can still change.
+    assert cache.missing(1, start, end) == []
+    assert cache.missing(2, start, end) == [_month(2024, 6)]
+
+    # A window that moved back leaves out the entries the store holds again.
+    earlier = datetime(2024, 5, 1, tzinfo=TZ)
+    entries = cache.entries_between(start, end + timedelta(days=20), ALL, earlier)
+    assert [entry.event_date.month for entry in entries] == [4]
+
+
+def test_months_with_retained_entries_stay_open() -> None:
+    """A month with an entry that ends within the window is downloaded again."""
+    cache = HistoryCache(TZ)
+    month = _month(2024, 3)
+    long_entry = make_entry(
+        month + timedelta(days=20), RETAINED_FROM + timedelta(days=5)
+    )
+    cache.fill(1, [month], [long_entry], RETAINED_FROM)
+
+    assert cache.missing(1, month, month) == []
+    assert cache.missing(2, month, month) == [month]
+    end = month + timedelta(days=30)
+    assert cache.entries_between(month, end, ALL, RETAINED_FROM) == []
+
+
+def test_least_recently_used_months_are_dropped() -> None:
+    """At most max_months are kept, but a longer range is returned in full once."""
+    cache = HistoryCache(TZ, max_months=2)
+    start, end = _month(2024, 1), _month(2024, 4)
+    cache.fill(1, cache.missing(1, start, end), _entries(start, end), RETAINED_FROM)
+
+    entries = cache.entries_between(start, end + timedelta(days=20), ALL, RETAINED_FROM)
+    assert len(entries) == 4
+    assert len(cache) == 2
+    assert cache.missing(1, start, end) == [_month(2024, 1), _month(2024, 2)]
+
+    cache.entries_between(_month(2024, 3), _month(2024, 3), ALL, RETAINED_FROM)
+    cache.fill(1, [start], _entries(start, start), RETAINED_FROM)
+    cache.entries_between(start, start, ALL, RETAINED_FROM)
+    assert cache.missing(1, start, end) == [_month(2024, 2), _month(2024, 4)]
@@ -0,0 +1,68 @@
+"""Tests for the incremental json array decoder."""
+
+import json
+
+import pytest
+
+from custom_components.skyline_communications_vacation_calendar.skyline.json_stream import (
+    iter_json_array,
+)
+
+DOCUMENT = json.dumps(
+    [
+        {"ID": "1", "Name": "Élodie Dupont", "Description": "Ski 🎿", "Category": 0},
+        12345,
+        -0.5e3,
+        "text with \\\"quotes\\\" and ] brackets",
+        [1, [2, 3]],
+        True,
+        None,
+        {},
+    ],
+    ensure_ascii=False,
+).encode()
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[index : index + size] for index in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 16, 64, len(DOCUMENT)])
+def test_items_split_over_chunks(size: int) -> None:
+    """Items are decoded the same however the document is split."""
+    assert list(iter_json_array(_chunks(DOCUMENT, size))) == json.loads(DOCUMENT)
+
+
+def test_numbers_are_not_cut_at_a_chunk_boundary() -> None:
+    """A number at the end of a chunk may continue in the next one."""
+    assert list(iter_json_array([b"[12", b"34, 5", b"6]"])) == [1234, 56]
+
+
+@pytest.mark.parametrize("document", [b"[]", b"  [ ]  ", b"\n[\n]\n"])
+def test_empty_array(document: bytes) -> None:
+    """An empty array yields nothing."""
+    assert list(iter_json_array(_chunks(document, 1))) == []
+
+
+def test_items_are_yielded_before_the_end() -> None:
+    """The first item is available before the remaining chunks are read."""
+
+    def chunks():
+        yield b'[{"a": 1},'
+        raise AssertionError("Read too far")
+
+    assert next(iter_json_array(chunks())) == {"a": 1}
+
+
+@pytest.mark.parametrize("document", [b'{"a": 1}', b"1", b'"text"'])
+def test_not_an_array(document: bytes) -> None:
+    """Only a top level array is accepted."""
+    with pytest.raises(ValueError):
+        list(iter_json_array([document]))
+
+
+@pytest.mark.parametrize("document", [b"", b"[", b'[{"a": 1}', b'[{"a": '])
+def test_truncated(document: bytes) -> None:
+    """A document that ends before the array is closed is an error."""
+    with pytest.raises(ValueError):
+        list(iter_json_array([document]))
@@ -0,0 +1,74 @@
+"""Tests for the adaptive download interval."""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from custom_components.skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarEntryType,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.polling import (
+    UPCOMING_CATEGORIES,
+    PollingPolicy,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.roster import (
+    RosterTable,
+)
+
+from . import make_entry, make_weekends
+
+TZ = ZoneInfo("Europe/Brussels")
+# A Wednesday.
+FIRST = datetime(2024, 1, 3, tzinfo=TZ)
+FLOOR = timedelta(minutes=15)
+BASE = timedelta(hours=1)
+CEILING = timedelta(hours=4)
+
+
+def _policy() -> PollingPolicy:
+    return PollingPolicy(FLOOR, BASE, CEILING)
+
+
+def test_time_of_day() -> None:
+    """Working hours use the floor, evenings the base and nights the ceiling."""
+    policy = _policy()
+    assert policy.interval(FIRST.replace(hour=10), None) == FLOOR
+    assert policy.interval(FIRST.replace(hour=19), None) == BASE
+    assert policy.interval(FIRST.replace(hour=23), None) == CEILING
+    assert policy.interval(FIRST.replace(day=6, hour=10), None) == CEILING
+
+
+def test_unchanged_downloads_back_off() -> None:
+    """Every unchanged download doubles the interval, up to the ceiling."""
+    policy = _policy()
+    policy.record(False)
+    assert policy.interval(FIRST.replace(hour=10), None) == 2 * FLOOR
+    for _ in range(5):
+        policy.record(False)
+    assert policy.interval(FIRST.replace(hour=10), None) == CEILING
+    policy.record(True)
+    assert policy.interval(FIRST.replace(hour=10), None) == FLOOR
+
+
+def test_upcoming_entry() -> None:
+    """Downloads speed up shortly before an entry starts."""
+    policy = _policy()
+    evening = FIRST.replace(hour=19)
+    assert policy.interval(evening, evening + timedelta(minutes=30)) == FLOOR
+    assert policy.interval(evening, evening + BASE) == FLOOR
+    assert policy.interval(evening, evening + 3 * BASE) == BASE
+
+
+def test_weekends_are_not_upcoming() -> None:
+    """A weekend starting does not bring Friday evening down to the floor."""
+    friday = datetime(2024, 1, 5, 23, 30, tzinfo=TZ)
+    monday = datetime(2024, 1, 8, 9, tzinfo=TZ)
+    table = RosterTable(
+        [
+            *make_weekends(datetime(2024, 1, 6, tzinfo=TZ), 2),
+            make_entry(monday, monday + timedelta(hours=8)),
+        ]
+    )
+
+    assert CalendarEntryType.Weekend not in UPCOMING_CATEGORIES
+    assert table.next_change_of(friday, UPCOMING_CATEGORIES, TZ) == monday
+    assert _policy().interval(friday, monday) == CEILING
@@ -0,0 +1,142 @@
+"""Tests for the recurrence rules of periodic entries."""
+
+from datetime import datetime, timedelta
+import random
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarEntryType,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.recurrence import (
+    MIN_OCCURRENCES,
+    extract_recurrences,
+)
+
+from . import entry_key, make_entry, make_random_entries, make_weekends
+
+TZ = ZoneInfo("Europe/Brussels")
+# The first saturday of 2024, the year crosses both daylight saving time changes.
+FIRST_SATURDAY = datetime(2024, 1, 6, tzinfo=TZ)
+
+
+def _occurrences(rules) -> list[tuple]:
+    return sorted(entry_key(entry) for rule in rules for entry in rule.occurrences())
+
+
+def test_weekends_become_a_rule() -> None:
+    """A year of weekends is stored as one rule with the same occurrences."""
+    weekends = make_weekends(FIRST_SATURDAY, 52)
+    entries, rules = extract_recurrences(weekends)
+
+    assert entries == []
+    assert len(rules) == 1
+    assert rules[0].count == 52
+    assert _occurrences(rules) == sorted(entry_key(entry) for entry in weekends)
+
+
+def test_weekends_keep_their_wall_clock_time() -> None:
+    """Occurrences start at midnight in summer and in winter."""
+    _, rules = extract_recurrences(make_weekends(FIRST_SATURDAY, 52))
+
+    starts = [entry.event_date for entry in rules[0].occurrences()]
+    assert {start.time() for start in starts} == {datetime.min.time()}
+    assert {start.utcoffset() for start in starts} == {
+        timedelta(hours=1),
+        timedelta(hours=2),
+    }
+
+
+def test_occurrences_have_synthetic_uids() -> None:
+    """Occurrences get ids from the rule instead of the ids of the api."""
+    weekends = make_weekends(FIRST_SATURDAY, 8)
+    _, rules = extract_recurrences(weekends)
+
+    ids = [entry.id for entry in rules[0].occurrences()]
+    assert len(set(ids)) == len(ids)
+    assert not set(ids) & {entry.id for entry in weekends}
+    assert all(uid.startswith("Weekend-Arne Maes-") for uid in ids)
+
+
+def test_missing_weekends_are_exceptions() -> None:
+    """Weekends that are not in the series are kept as exceptions."""
+    weekends = make_weekends(FIRST_SATURDAY, 20)
+    kept = [entry for index, entry in enumerate(weekends) if index not in (3, 4, 11)]
+    entries, rules = extract_recurrences(kept)
+
+    assert entries == []
+    assert rules[0].exceptions == frozenset({3, 4, 11})
+    assert _occurrences(rules) == sorted(entry_key(entry) for entry in kept)
+
+
+def test_short_series_stay_entries() -> None:
+    """Too few occurrences are not worth a rule."""
+    weekends = make_weekends(FIRST_SATURDAY, MIN_OCCURRENCES - 1)
+    entries, rules = extract_recurrences(weekends)
+
+    assert rules == []
+    assert entries == weekends
+
+
+def test_irregular_series_stay_entries() -> None:
+    """Entries that are not a multiple of the interval apart are not a rule."""
+    weekends = make_weekends(FIRST_SATURDAY, 6)
+    start = FIRST_SATURDAY + timedelta(days=3)
+    odd = make_entry(
+        start, start + timedelta(days=2, seconds=-1), CalendarEntryType.Weekend
+    )
+    entries, rules = extract_recurrences([*weekends, odd])
+
+    assert rules == []
+    assert sorted(map(entry_key, entries)) == sorted(map(entry_key, [*weekends, odd]))
+
+
+def test_other_categories_are_untouched() -> None:
+    """Only the periodic categories are turned into rules."""
+    other = make_random_entries(random.Random(1), FIRST_SATURDAY, 50, TZ)
+    entries, rules = extract_recurrences([*other, *make_weekends(FIRST_SATURDAY, 10)])
+
+    assert len(rules) == 1
+    assert entries == other
+
+
+def test_every_user_gets_a_rule() -> None:
+    """Weekends of different users are separate series."""
+    weekends = [
+        *make_weekends(FIRST_SATURDAY, 10, "Arne Maes"),
+        *make_weekends(FIRST_SATURDAY, 10, "Jan Janssens"),
+    ]
+    entries, rules = extract_recurrences(weekends)
+
+    assert entries == []
+    assert sorted(rule.name for rule in rules) == ["Arne Maes", "Jan Janssens"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lookups_match_a_scan(seed: int) -> None:
+    """The lookups of a rule return what a scan over its occurrences returns."""
+    rng = random.Random(seed)
+    weekends = make_weekends(FIRST_SATURDAY, 52)
+    kept = [entry for entry in weekends if rng.random() > 0.2]
+    _, (rule,) = extract_recurrences(kept)
+
+    for _ in range(200):
+        moment = FIRST_SATURDAY + timedelta(
+            seconds=rng.randrange(-7 * 86400, 380 * 86400)
+        )
+        end = moment + timedelta(hours=rng.randrange(1, 24 * 40))
+
+        assert [entry_key(e) for e in rule.occurrences_between(moment, end)] == [
+            entry_key(e) for e in kept if moment <= e.event_date <= end
+        ]
+        ongoing = [entry_key(e) for e in kept if e.event_date <= moment <= e.end_date]
+        occurrence = rule.occurrence_at(moment)
+        assert ([entry_key(occurrence)] if occurrence else []) == ongoing
+
+        following = [entry_key(e) for e in kept if e.event_date > moment]
+        assert [entry_key(e) for e in rule.occurrences_after(moment)] == following
+        next_occurrence = rule.next_occurrence(moment)
+        assert (entry_key(next_occurrence) if next_occurrence else None) == (
+            following[0] if following else None
+        )
@@ -0,0 +1,113 @@
+"""Tests for the full text search over calendar entries."""
+
+from datetime import datetime, timedelta
+import random
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarEntryType,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.recurrence import (
+    extract_recurrences,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.search import (
+    SearchIndex,
+    tokenize,
+)
+
+from . import entry_key, make_entry, make_random_entries, make_weekends
+
+TZ = ZoneInfo("Europe/Brussels")
+FIRST = datetime(2024, 1, 1, tzinfo=TZ)
+QUERIES = ("arne", "élodie", "ELODIE dup", "ski", "doc", "release 10", "team d", "x")
+
+
+def _matches(entry, words: list[str]) -> bool:
+    tokens = {*tokenize(entry.name), *tokenize(entry.description)}
+    *complete, last = words
+    return all(word in tokens for word in complete) and any(
+        token.startswith(last) for token in tokens
+    )
+
+
+def test_tokenize() -> None:
+    """Words are split and compared without case and accents."""
+    assert tokenize("Élodie DUPONT, skiën in Zürich") == [
+        "elodie",
+        "dupont",
+        "skien",
+        "in",
+        "zurich",
+    ]
+    assert tokenize(" ,. ") == []
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_search_matches_a_scan(seed: int) -> None:
+    """The index returns the same entries as a scan, sorted by start date."""
+    rng = random.Random(seed)
+    entries, rules = extract_recurrences(
+        [
+            *make_random_entries(rng, FIRST, 300, TZ),
+            *make_weekends(datetime(2024, 1, 6, tzinfo=TZ), 30, "Arne Maes"),
+        ]
+    )
+    everything = [*entries, *(e for rule in rules for e in rule.occurrences())]
+    index = SearchIndex(entries, rules)
+
+    for _ in range(100):
+        query = rng.choice(QUERIES)
+        categories = rng.choice(
+            (None, [CalendarEntryType.Weekend], [CalendarEntryType.Absent])
+        )
+        start = rng.choice((None, FIRST + timedelta(days=rng.randrange(200))))
+        end = rng.choice((None, FIRST + timedelta(days=rng.randrange(200, 400))))
+        limit = rng.choice((None, 5))
+
+        expected = sorted(
+            (
+                entry
+                for entry in everything
+                if _matches(entry, tokenize(query))
+                and (categories is None or entry.category in categories)
+                and (start is None or entry.event_date >= start)
+                and (end is None or entry.event_date <= end)
+            ),
+            key=lambda entry: entry.event_date,
+        )
+        result = index.search(query, categories, start, end, limit)
+
+        assert [entry.event_date for entry in result] == [
+            entry.event_date for entry in expected[:limit]
+        ]
+        if limit is None:
+            assert sorted(map(entry_key, result)) == sorted(map(entry_key, expected))
+
+
+def test_empty_query() -> None:
+    """A query without words finds nothing."""
+    index = SearchIndex(make_random_entries(random.Random(0), FIRST, 10, TZ))
+    assert index.search(" ") == []
+
+
+def test_prefix_with_many_words() -> None:
+    """A short prefix merges the entries of every word it matches, in order."""
+    entries = [
+        make_entry(
+            FIRST + timedelta(days=day),
+            FIRST + timedelta(days=day, hours=1),
+            description=f"d{day % 7}x{day}",
+        )
+        for day in range(100)
+    ]
+    index = SearchIndex(entries)
+
+    assert [entry.description for entry in index.search("d", limit=3)] == [
+        "d0x0",
+        "d1x1",
+        "d2x2",
+    ]
+    assert len(index.search("d3")) == 14
+    assert index.search("d3", start=FIRST + timedelta(days=90)) == [entries[94]]
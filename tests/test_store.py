@@ -0,0 +1,116 @@
+"""Tests for the indexed storage of calendar entries."""
+
+from datetime import date, datetime, timedelta
+import random
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.skyline_communications_vacation_calendar.skyline.calendar_api import (
+    CalendarEntryType,
+)
+from custom_components.skyline_communications_vacation_calendar.skyline.store import (
+    CalendarStore,
+    iter_entry_days,
+)
+
+from . import entry_key, make_entry, make_random_entries, make_weekends
+
+TZ = ZoneInfo("Europe/Brussels")
+FIRST = datetime(2024, 1, 1, tzinfo=TZ)
+RETAINED_FROM = datetime(2024, 4, 1, tzinfo=TZ)
+
+
+def _entries(seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        *make_random_entries(rng, FIRST, 400, TZ),
+        *make_weekends(datetime(2024, 1, 6, tzinfo=TZ), 52, "Arne Maes"),
+        *make_weekends(datetime(2024, 1, 6, tzinfo=TZ), 30, "Jan Janssens"),
+    ]
+
+
+def _keys(entries) -> list[tuple]:
+    return sorted(map(entry_key, entries))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_lookups_match_a_scan(seed: int) -> None:
+    """The store returns the same entries as a scan over the retained entries."""
+    rng = random.Random(seed)
+    entries = _entries(seed)
+    retained = [entry for entry in entries if entry.end_date >= RETAINED_FROM]
+    store = CalendarStore(entries, RETAINED_FROM)
+
+    assert store.recurrences
+    assert store.size == len(retained)
+    assert _keys(store.iter_entries(CalendarEntryType)) == _keys(retained)
+
+    for _ in range(200):
+        categories = rng.sample(list(CalendarEntryType), rng.randrange(1, 5))
+        moment = RETAINED_FROM + timedelta(seconds=rng.randrange(300 * 86400))
+        end = moment + timedelta(days=rng.randrange(1, 60))
+        selected = [entry for entry in retained if entry.category in categories]
+
+        assert _keys(store.entries_between(moment, end, categories)) == _keys(
+            entry for entry in selected if moment <= entry.event_date <= end
+        )
+        assert _keys(store.entries_at(moment, categories)) == _keys(
+            entry
+            for entry in selected
+            if entry.event_date <= moment <= entry.end_date
+        )
+        following = sorted(
+            (entry for entry in selected if entry.event_date > moment),
+            key=lambda entry: entry.event_date,
+        )
+        next_entry = store.next_entry(moment, categories)
+        assert (next_entry.event_date if next_entry else None) == (
+            following[0].event_date if following else None
+        )
+        after = list(store.iter_entries_after(moment, categories))
+        assert [entry.event_date for entry in after] == [
+            entry.event_date for entry in following
+        ]
+        assert _keys(after) == _keys(following)
+
+
+def test_history_is_summarized_per_month() -> None:
+    """Entries that ended before the retention window are only counted."""
+    entries = _entries(0)
+    store = CalendarStore(entries, RETAINED_FROM)
+    compacted = [entry for entry in entries if entry.end_date < RETAINED_FROM]
+
+    counts: dict[tuple[int, int, CalendarEntryType], int] = {}
+    for entry in compacted:
+        key = (entry.event_date.year, entry.event_date.month, entry.category)
+        counts[key] = counts.get(key, 0) + 1
+    assert {
+        (summary.year, summary.month, category): count
+        for summary in store.summaries
+        for category, count in summary.counts.items()
+    } == counts
+    assert not store.is_retained(RETAINED_FROM - timedelta(seconds=1))
+    assert store.is_retained(RETAINED_FROM)
+
+
+def test_digest_ignores_the_history() -> None:
+    """The digest only changes when the retained entries change."""
+    entries = _entries(0)
+    store = CalendarStore(entries, RETAINED_FROM)
+    retained = [entry for entry in entries if entry.end_date >= RETAINED_FROM]
+
+    assert CalendarStore(retained, RETAINED_FROM).digest == store.digest
+    changed = [*entries, make_entry(RETAINED_FROM, RETAINED_FROM + timedelta(hours=1))]
+    assert CalendarStore(changed, RETAINED_FROM).digest != store.digest
+
+
+def test_entry_days() -> None:
+    """An entry ending at midnight does not cover the day it ends on."""
+    start = datetime(2024, 3, 1, 9, tzinfo=TZ)
+    assert list(
+        iter_entry_days(make_entry(start, datetime(2024, 3, 3, tzinfo=TZ)))
+    ) == [date(2024, 3, 1), date(2024, 3, 2)]
+    assert list(
+        iter_entry_days(make_entry(start, datetime(2024, 3, 3, 0, 0, 1, tzinfo=TZ)))
+    ) == [date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 3)]
@@ -0,0 +1,119 @@
+"""Tests for the precomputed transitions and their cursor."""
+
+from datetime import UTC, datetime, timedelta
+import random
+
+import pytest
+
+from custom_components.skyline_communications_vacation_calendar.skyline.transitions import (
+    TransitionCursor,
+    Transitions,
+)
+
+from . import make_entry, make_random_entries
+
+FIRST = datetime(2024, 1, 1, tzinfo=UTC)
+SECOND = timedelta(seconds=1)
+
+
+def _covered(entries, moment: datetime) -> bool:
+    return any(entry.event_date <= moment <= entry.end_date for entry in entries)
+
+
+def _current_end(entries, moment: datetime) -> datetime | None:
+    """Return the first second after the moment that no entry covers."""
+    if not _covered(entries, moment):
+        return None
+    while _covered(entries, moment):
+        moment = max(
+            entry.end_date
+            for entry in entries
+            if entry.event_date <= moment <= entry.end_date
+        ) + SECOND
+    return moment
+
+
+def test_adjacent_and_overlapping_entries_are_merged() -> None:
+    """Entries that touch or overlap form a single period."""
+    transitions = Transitions(
+        [
+            make_entry(FIRST, FIRST + timedelta(hours=1) - SECOND),
+            make_entry(FIRST + timedelta(hours=1), FIRST + timedelta(hours=3)),
+            make_entry(
+                FIRST + timedelta(hours=2), FIRST + timedelta(hours=2, minutes=30)
+            ),
+            make_entry(FIRST + timedelta(hours=5), FIRST + timedelta(hours=6)),
+        ]
+    )
+
+    assert [transitions.moment(index) for index in range(len(transitions))] == [
+        FIRST,
+        FIRST + timedelta(hours=3) + SECOND,
+        FIRST + timedelta(hours=5),
+        FIRST + timedelta(hours=6) + SECOND,
+    ]
+    assert transitions.moment(len(transitions)) is None
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_a_scan(seed: int) -> None:
+    """The transitions agree with the entries that cover every moment."""
+    rng = random.Random(seed)
+    entries = make_random_entries(rng, FIRST, 150, UTC)
+    transitions = Transitions(entries)
+    cursor = TransitionCursor()
+    moment = FIRST - timedelta(days=2)
+
+    for _ in range(300):
+        # Mostly forward, sometimes back in time, like the clock of the cursor.
+        moment += timedelta(seconds=rng.randrange(-86400, 5 * 86400))
+        covered = _covered(entries, moment)
+
+        assert (transitions.position(moment) % 2 == 1) == covered
+        end = _current_end(entries, moment)
+        assert cursor.current_end(transitions, moment) == end
+        assert cursor.first_free(transitions, moment) == (end or moment)
+
+        starts = [
+            entry.event_date
+            for entry in entries
+            if entry.event_date > moment
+            and not _covered(entries, entry.event_date - SECOND)
+        ]
+        assert cursor.next_start(transitions, moment) == min(starts, default=None)
+
+
+def test_cursor_follows_replaced_transitions() -> None:
+    """A cursor searches again when it gets other transitions."""
+    cursor = TransitionCursor()
+    first = Transitions([make_entry(FIRST, FIRST + timedelta(days=1))])
+    second = Transitions([make_entry(FIRST, FIRST + timedelta(days=2))])
+    moment = FIRST + timedelta(hours=1)
+
+    assert cursor.current_end(first, moment) == FIRST + timedelta(days=1) + SECOND
+    assert cursor.current_end(second, moment) == FIRST + timedelta(days=2) + SECOND
+
+
+def test_periods_between() -> None:
+    """Only the periods that overlap the range are returned, the first one in full."""
+    transitions = Transitions(
+        [
+            make_entry(
+                FIRST + timedelta(days=day), FIRST + timedelta(days=day, hours=8)
+            )
+            for day in range(0, 10, 2)
+        ]
+    )
+
+    periods = list(
+        transitions.periods_between(
+            FIRST + timedelta(days=2, hours=4), FIRST + timedelta(days=6)
+        )
+    )
+    assert periods == [
+        (
+            FIRST + timedelta(days=day),
+            FIRST + timedelta(days=day, hours=8) + SECOND,
+        )
+        for day in (2, 4)
+    ]
@@ -0,0 +1,75 @@
+"""Tests for the day bitsets of the common workdays."""
+
+from datetime import date, datetime, timedelta
+from itertools import combinations
+import random
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.skyline_communications_vacation_calendar.skyline.workdays import (
+    at_least,
+    full_mask,
+    iter_days,
+    period_mask,
+)
+
+TZ = ZoneInfo("Europe/Brussels")
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_at_least_matches_counting(seed: int) -> None:
+    """The bit-sliced counter agrees with counting the masks of every day."""
+    rng = random.Random(seed)
+    days = rng.randrange(1, 200)
+    masks = [rng.getrandbits(days) for _ in range(rng.randrange(0, 12))]
+
+    for count in range(len(masks) + 2):
+        expected = 0
+        for day in range(days):
+            if sum(mask >> day & 1 for mask in masks) >= count:
+                expected |= 1 << day
+        assert at_least(masks, count, days) == expected
+
+
+def test_at_least_all_is_the_intersection() -> None:
+    """Requiring every mask is the same as and-ing them."""
+    rng = random.Random(0)
+    masks = [rng.getrandbits(64) for _ in range(5)]
+    for size in range(1, 6):
+        for subset in combinations(masks, size):
+            expected = full_mask(64)
+            for mask in subset:
+                expected &= mask
+            assert at_least(subset, size, 64) == expected
+
+
+def test_period_mask() -> None:
+    """Periods set the days they overlap, their end is exclusive."""
+    first = date(2024, 3, 25)
+    periods = [
+        # Ends at midnight, so only covers the 25th.
+        (datetime(2024, 3, 25, 9, tzinfo=TZ), datetime(2024, 3, 26, tzinfo=TZ)),
+        # Starts before the range.
+        (datetime(2024, 3, 20, tzinfo=TZ), datetime(2024, 3, 25, 1, tzinfo=TZ)),
+        # Crosses the end of the range.
+        (datetime(2024, 3, 30, 12, tzinfo=TZ), datetime(2024, 4, 5, tzinfo=TZ)),
+    ]
+
+    mask = period_mask(periods, first, 7, TZ)
+    assert list(iter_days(mask, first)) == [
+        date(2024, 3, 25),
+        date(2024, 3, 30),
+        date(2024, 3, 31),
+    ]
+
+
+def test_iter_days() -> None:
+    """The days of the set bits are yielded in order."""
+    first = date(2024, 1, 1)
+    assert list(iter_days(0b1000101, first)) == [
+        first,
+        first + timedelta(days=2),
+        first + timedelta(days=6),
+    ]
+    assert list(iter_days(0, first)) == []